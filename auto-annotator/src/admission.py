@@ -0,0 +1,317 @@
+"""
+Admission control for the annotation endpoints
+Each endpoint and each annotator can have a concurrency limit. A request
+holds one slot of its endpoint's limit and of every annotator it runs
+for as long as it is being processed. When a limit is reached, further
+requests wait in a bounded queue for a bounded time. A request that finds
+the queue full is rejected with 429; one that waits too long gets 503.
+Both carry a Retry-After estimate based on recent slot hold times, so
+spikes are turned away early instead of slowing every request down
+together.
+
+Background jobs take the same slots from their worker threads
+(admit_job), but are never turned away: they wait for as long as it
+takes, so job traffic counts toward every limit without failing when
+the service is busy.
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+from .config import (
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT_SEC,
+    ADMISSION_RETRY_AFTER_SEC,
+    ANNOTATOR_CONCURRENCY,
+    ENDPOINT_CONCURRENCY,
+)
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest hold time in the moving average used for Retry-After
+HOLD_SMOOTHING = 0.2
+
+
+class AdmissionRejected(Exception):
+    """Request turned away by a concurrency limit"""
+    
+    def __init__(self, limit: str, status_code: int, retry_after: int, detail: str):
+        super().__init__(detail)
+        self.limit = limit
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.detail = detail
+
+
+class Limiter:
+    """
+    Concurrency limit with a bounded FIFO queue
+    
+    Lives on the event loop; release() may be called from other threads.
+    """
+    
+    def __init__(self, name: str, limit: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._mean_hold: Optional[float] = None
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+    
+    @property
+    def queued(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+    
+    @property
+    def saturated(self) -> bool:
+        """At the limit with a full queue: the next request is rejected"""
+        return self.active >= self.limit and self.queued >= self.max_queue
+    
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free for a new arrival"""
+        if self._mean_hold is None:
+            return ADMISSION_RETRY_AFTER_SEC
+        return max(1, math.ceil(self._mean_hold * (self.queued + 1) / self.limit))
+    
+    async def acquire(self, deadline: Optional[float]) -> None:
+        """
+        Take a slot, waiting in the queue until deadline (monotonic time)
+        
+        With no deadline the wait is unbounded in time and skips the
+        queue bound; jobs wait this way.
+        
+        Raises:
+            AdmissionRejected: 429 if the queue is full, 503 if the deadline passes
+        """
+        self._loop = asyncio.get_running_loop()
+        if self.active < self.limit and not self.queued:
+            self.active += 1
+            self.admitted += 1
+            return
+        
+        if deadline is not None and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected(
+                self.name, 429, self.retry_after(),
+                f"Too many requests for {self.name} ({self.active} running, {self.queued} queued)",
+            )
+        
+        waiter = self._loop.create_future()
+        self._waiters.append(waiter)
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over as the wait ended; pass it on
+                self._release()
+            else:
+                waiter.cancel()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.timed_out += 1
+            raise AdmissionRejected(
+                self.name, 503, self.retry_after(),
+                f"Timed out after waiting {self.queue_timeout:g}s for {self.name}",
+            )
+        finally:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+        self.admitted += 1
+    
+    def release(self, held_seconds: Optional[float] = None) -> None:
+        """Free a slot (thread-safe) and record how long it was held"""
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop or self._loop is None or self._loop.is_closed():
+            self._release(held_seconds)
+        else:
+            self._loop.call_soon_threadsafe(self._release, held_seconds)
+    
+    def _release(self, held_seconds: Optional[float] = None) -> None:
+        if held_seconds is not None:
+            self._mean_hold = held_seconds if self._mean_hold is None else (
+                (1 - HOLD_SMOOTHING) * self._mean_hold + HOLD_SMOOTHING * held_seconds
+            )
+        # Hand the slot straight to the oldest waiter, so it cannot be
+        # taken by a newer arrival first
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "mean_hold_sec": self._mean_hold,
+            "saturated": self.saturated,
+            "retry_after_sec": self.retry_after(),
+        }
+
+
+class Ticket:
+    """Slots held by one admitted request; release() exactly once when it finishes"""
+    
+    def __init__(self, limiters: List[Limiter], on_release: Optional[Callable[[], None]] = None):
+        self.limiters = limiters
+        self._on_release = on_release
+        self._started = time.monotonic()
+        self._released = False
+        self._lock = threading.Lock()
+    
+    def release(self) -> None:
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        held = time.monotonic() - self._started
+        for limiter in reversed(self.limiters):
+            limiter.release(held)
+        if self._on_release is not None:
+            self._on_release()
+
+
+class AdmissionController:
+    """
+    Endpoint and annotator limits shared by every request in the process
+    
+    Slots are always taken in the same order (endpoint first, then
+    annotators by name), so requests holding some slots while waiting for
+    others cannot deadlock.
+    """
+    
+    def __init__(
+        self,
+        endpoint_limits: Dict[str, int] = ENDPOINT_CONCURRENCY,
+        annotator_limits: Dict[str, int] = ANNOTATOR_CONCURRENCY,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT_SEC,
+    ):
+        self.queue_timeout = queue_timeout
+        self.limiters: Dict[str, Limiter] = {}
+        for kind, limits in (("endpoint", endpoint_limits), ("annotator", annotator_limits)):
+            for name, limit in limits.items():
+                if limit > 0:
+                    key = f"{kind}:{name}"
+                    self.limiters[key] = Limiter(key, limit, max_queue, queue_timeout)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+        self._jobs_lock = threading.Lock()
+        self.jobs_waiting = 0
+        self.jobs_running = 0
+    
+    async def admit(self, endpoint: str, annotators: Iterable[str] = (), bounded: bool = True) -> Ticket:
+        """
+        Wait for a slot of the endpoint's limit and of each annotator's
+        
+        Args:
+            endpoint: Endpoint name (video, audio, ...)
+            annotators: Registry names of the annotators the request runs
+            bounded: Apply the queue bound and timeout; with False the
+                wait lasts until every slot is free
+                
+        Raises:
+            AdmissionRejected: When any of the limits turns the request away
+        """
+        keys = [f"endpoint:{endpoint}"] + [f"annotator:{name}" for name in sorted(set(annotators))]
+        deadline = time.monotonic() + self.queue_timeout if bounded else None
+        held: List[Limiter] = []
+        try:
+            for key in keys:
+                limiter = self.limiters.get(key)
+                if limiter is not None:
+                    await limiter.acquire(deadline)
+                    held.append(limiter)
+        except BaseException:
+            for limiter in reversed(held):
+                limiter.release()
+            raise
+        return Ticket(held)
+    
+    def bind_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Take job slots on the API's event loop, alongside its requests'"""
+        with self._loop_lock:
+            self._loop = loop
+    
+    def _job_loop(self) -> asyncio.AbstractEventLoop:
+        """The bound loop, or a private one when none is (standalone workers)"""
+        with self._loop_lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="admission", daemon=True).start()
+            return self._loop
+    
+    def admit_job(self, endpoint: str, annotators: Iterable[str] = ()) -> Ticket:
+        """
+        admit() for a job worker thread, blocking until every slot is free
+        
+        Jobs are never rejected; they wait without a deadline or queue
+        bound. Limits are per process, so standalone worker processes
+        each apply their own.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self.admit(endpoint, annotators, bounded=False), self._job_loop()
+        )
+        with self._jobs_lock:
+            self.jobs_waiting += 1
+        try:
+            ticket = future.result()
+        finally:
+            with self._jobs_lock:
+                self.jobs_waiting -= 1
+        with self._jobs_lock:
+            self.jobs_running += 1
+        return Ticket(ticket.limiters, on_release=self._job_released)
+    
+    def _job_released(self) -> None:
+        with self._jobs_lock:
+            self.jobs_running -= 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """Per-limit state, and whether new requests would currently be accepted"""
+        limits = {key: limiter.stats() for key, limiter in self.limiters.items()}
+        saturated = [key for key, stats in limits.items() if stats["saturated"]]
+        return {
+            "accepting": not saturated,
+            "saturated": saturated,
+            "queue_timeout_sec": self.queue_timeout,
+            "jobs": {"waiting": self.jobs_waiting, "running": self.jobs_running},
+            "limits": limits,
+        }
+
+
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    """Process-wide controller built from the environment"""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController()
+            if _controller.limiters:
+                limits = ", ".join(f"{k}={v.limit}" for k, v in _controller.limiters.items())
+                logger.info(f"Admission limits: {limits}")
+        return _controller
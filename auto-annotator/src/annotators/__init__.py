@@ -1,6 +1,7 @@
 """Annotator module exports"""
 
 from .base import BaseAnnotator
+from .batch import AnnotationBatch
 from .hand_pose import HandPoseAnnotator
 from .object_detector import ObjectDetector
 from .action_recognizer import ActionRecognizer
@@ -12,6 +13,7 @@ from .livecc_captioner import LiveCCAnnotator
 
 __all__ = [
     "BaseAnnotator",
+    "AnnotationBatch",
     "HandPoseAnnotator",
     "ObjectDetector",
     "ActionRecognizer",
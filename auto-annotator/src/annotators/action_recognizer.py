@@ -8,6 +8,7 @@ from typing import Any, Dict, List, Optional
 import numpy as np
 
 from .base import BaseAnnotator, AnnotationResult
+from .frames import to_gray
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +34,11 @@ class ActionRecognizer(BaseAnnotator):
     model_name = "timesformer"
     model_version = "1.0.0"
     
+    # Optical flow runs on small grayscale frames; magnitudes are scaled
+    # back to source pixels, so the motion thresholds keep their meaning
+    input_size = 320
+    input_color = "gray"
+    
     def __init__(
         self,
         window_size: int = 16,  # frames per window
@@ -63,16 +69,19 @@ class ActionRecognizer(BaseAnnotator):
         frames: np.ndarray,
         start_timestamp_ms: float = 0.0,
         fps: float = 30.0,
+        scale: float = 1.0,
         **kwargs
     ) -> List[AnnotationResult]:
         """
         Recognize action in a video segment
         
         Args:
-            frames: Video segment as numpy array (T, H, W, 3)
+            frames: Video segment as numpy array (T, H, W, 3), or grayscale (T, H, W)
             start_timestamp_ms: Start timestamp
             fps: Frames per second
-            
+            scale: Factor from frame pixels to the source video's, for
+                frames already downscaled to input_size
+                
         Returns:
             List containing single action result for the segment
         """
@@ -84,7 +93,7 @@ class ActionRecognizer(BaseAnnotator):
         end_timestamp_ms = start_timestamp_ms + duration_ms
         
         # Rule-based action classification using motion features
-        action, confidence = self._classify_action(frames)
+        action, confidence = self._classify_action(frames, scale)
         
         if confidence < self.confidence_threshold:
             return []
@@ -134,7 +143,7 @@ class ActionRecognizer(BaseAnnotator):
         
         return all_results
     
-    def _classify_action(self, frames: np.ndarray) -> tuple[str, float]:
+    def _classify_action(self, frames: np.ndarray, scale: float = 1.0) -> tuple[str, float]:
         """
         Classify action using motion analysis
         
@@ -149,12 +158,12 @@ class ActionRecognizer(BaseAnnotator):
         if len(frames) < 2:
             return "PAUSE", 0.5
         
-        # Calculate optical flow magnitude
-        prev_gray = cv2.cvtColor(frames[0], cv2.COLOR_RGB2GRAY)
+        # Calculate optical flow magnitude at input_size
+        prev_gray, shrink = to_gray(frames[0], self.input_size)
         total_flow = 0.0
         
         for frame in frames[1:]:
-            gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+            gray, _ = to_gray(frame, self.input_size)
             flow = cv2.calcOpticalFlowFarneback(
                 prev_gray, gray, None, 0.5, 3, 15, 3, 5, 1.2, 0
             )
@@ -162,7 +171,8 @@ class ActionRecognizer(BaseAnnotator):
             total_flow += np.mean(magnitude)
             prev_gray = gray
         
-        avg_flow = total_flow / (len(frames) - 1)
+        # In pixels of the source video
+        avg_flow = total_flow / (len(frames) - 1) * shrink * scale
         
         # Simple motion-based classification
         if avg_flow < 1.0:
@@ -176,6 +186,10 @@ class ActionRecognizer(BaseAnnotator):
         else:
             return "SEARCH", 0.6
     
+    def warmup(self) -> None:
+        """Classify one window of black frames"""
+        self.annotate(np.zeros((self.window_size, 224, 224, 3), dtype=np.uint8))
+    
     def cleanup(self) -> None:
         """Release model resources"""
         self._model = None
@@ -7,6 +7,8 @@ from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional
 from pydantic import BaseModel
 
+from ..metrics import timed_inference
+
 
 class AnnotationResult(BaseModel):
     """Standard annotation result format"""
@@ -24,8 +26,24 @@ class BaseAnnotator(ABC):
     model_name: str = "base"
     model_version: str = "0.0.0"
     
+    # Long side of the frames the model works at (None: full resolution)
+    # and their colour space ("rgb" or "gray"). The video pipeline hands
+    # frames over at this size, built once per frame for every annotator.
+    input_size: Optional[int] = None
+    input_color: str = "rgb"
+    
     def __init__(self):
         self._is_loaded = False
+        self._manager = None
+        self._registry_name: Optional[str] = None
+    
+    def __init_subclass__(cls, **kwargs):
+        # Record the latency of every concrete annotate/annotate_batch
+        super().__init_subclass__(**kwargs)
+        for method in ("annotate", "annotate_batch"):
+            fn = cls.__dict__.get(method)
+            if fn is not None and not getattr(fn, "__isabstractmethod__", False):
+                setattr(cls, method, timed_inference(method, fn))
     
     @abstractmethod
     def load_model(self) -> None:
@@ -60,6 +78,30 @@ class BaseAnnotator(ABC):
         """
         pass
     
+    def cache_params(self) -> Dict[str, Any]:
+        """
+        Settings that affect this annotator's output, for result cache keys
+        
+        Defaults to the public scalar attributes (thresholds, model paths,
+        window sizes); device placement and the model identity fields are
+        excluded since they are keyed separately or do not change results.
+        """
+        return {
+            key: value for key, value in vars(self).items()
+            if not key.startswith("_")
+            and key not in ("device", "model_name", "model_version")
+            and isinstance(value, (bool, int, float, str, type(None)))
+        }
+    
+    def warmup(self) -> None:
+        """
+        Run one synthetic inference so first-call costs are paid up front
+        
+        Called after load_model() when models are preloaded at startup;
+        the default does nothing.
+        """
+        pass
+    
     def cleanup(self) -> None:
         """Release resources"""
         self._is_loaded = False
@@ -69,7 +111,9 @@ class BaseAnnotator(ABC):
         return self._is_loaded
     
     def ensure_loaded(self) -> None:
-        """Ensure model is loaded"""
-        if not self._is_loaded:
+        """Ensure model is loaded (through the model manager, when one owns this annotator)"""
+        if self._manager is not None:
+            self._manager.touch(self)
+        elif not self._is_loaded:
             self.load_model()
             self._is_loaded = True
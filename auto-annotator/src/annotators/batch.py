@@ -0,0 +1,163 @@
+"""
+Columnar annotation results
+Per-frame annotators return one AnnotationBatch holding numpy columns
+instead of one pydantic AnnotationResult per detection. Dicts and
+AnnotationResult objects are only built when a caller asks for them.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+import numpy as np
+
+from .base import AnnotationResult
+from ..timings import stage
+
+
+class AnnotationBatch:
+    """
+    Annotation results from one annotator, stored as columns
+    
+    Row i is one detection: frame_id[i], timestamp_ms[i], confidence[i],
+    plus optional bbox[i] (x, y, w, h), keypoints[i] (K, 3) and any extra
+    per-row attributes (e.g. object_type, hand_index). Iterating yields
+    AnnotationResult objects, so a batch can stand in for the
+    List[AnnotationResult] that annotate() used to return.
+    """
+    
+    __slots__ = (
+        "model_name", "model_version", "frame_id", "timestamp_ms", "confidence",
+        "bbox", "keypoints", "keypoint_names", "attributes",
+    )
+    
+    def __init__(
+        self,
+        model_name: str,
+        model_version: str,
+        frame_id: np.ndarray,
+        timestamp_ms: np.ndarray,
+        confidence: np.ndarray,
+        bbox: Optional[np.ndarray] = None,
+        keypoints: Optional[np.ndarray] = None,
+        keypoint_names: Optional[Sequence[str]] = None,
+        attributes: Optional[Dict[str, np.ndarray]] = None,
+    ):
+        """
+        Args:
+            model_name: Producing model, shared by every row
+            model_version: Producing model version
+            frame_id: (N,) int64
+            timestamp_ms: (N,) float64
+            confidence: (N,) float32
+            bbox: (N, 4) float32 as x, y, w, h
+            keypoints: (N, K, 3) float32 as x, y, z
+            keypoint_names: K landmark names
+            attributes: Extra (N,) columns copied into each row's data
+        """
+        self.model_name = model_name
+        self.model_version = model_version
+        self.frame_id = frame_id
+        self.timestamp_ms = timestamp_ms
+        self.confidence = confidence
+        self.bbox = bbox
+        self.keypoints = keypoints
+        self.keypoint_names = keypoint_names
+        self.attributes = attributes or {}
+    
+    @classmethod
+    def for_frame(
+        cls,
+        model_name: str,
+        model_version: str,
+        frame_id: int,
+        timestamp_ms: float,
+        confidence: np.ndarray,
+        **columns
+    ) -> "AnnotationBatch":
+        """Batch whose rows all come from a single frame"""
+        n = len(confidence)
+        return cls(
+            model_name,
+            model_version,
+            frame_id=np.full(n, frame_id, dtype=np.int64),
+            timestamp_ms=np.full(n, timestamp_ms, dtype=np.float64),
+            confidence=confidence,
+            **columns
+        )
+    
+    def __len__(self) -> int:
+        return len(self.confidence)
+    
+    def __iter__(self) -> Iterator[AnnotationResult]:
+        for row in self.to_dicts():
+            yield AnnotationResult.model_construct(**row)
+    
+    def __getitem__(self, index: int) -> AnnotationResult:
+        return list(self)[index]
+    
+    def to_dicts(self, annotation_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Rows in AnnotationResult.model_dump() form, without pydantic
+        
+        Args:
+            annotation_type: If set, each dict is tagged with this "type"
+            
+        Returns:
+            One dict per row
+        """
+        n = len(self)
+        if n == 0:
+            return []
+        
+        # One tolist() per column converts to Python scalars in bulk
+        frame_ids = self.frame_id.tolist()
+        timestamps = self.timestamp_ms.tolist()
+        confidences = self.confidence.tolist()
+        attributes = {key: column.tolist() for key, column in self.attributes.items()}
+        boxes = self.bbox.tolist() if self.bbox is not None else None
+        keypoints = self.keypoints.tolist() if self.keypoints is not None else None
+        names = self.keypoint_names
+        
+        rows = []
+        for i in range(n):
+            data = {key: column[i] for key, column in attributes.items()}
+            if boxes is not None:
+                x, y, w, h = boxes[i]
+                data["bbox"] = {"x": x, "y": y, "w": w, "h": h}
+            if keypoints is not None:
+                data["keypoints"] = [
+                    {"x": x, "y": y, "z": z, "name": names[k]}
+                    for k, (x, y, z) in enumerate(keypoints[i])
+                ]
+            
+            row = {"type": annotation_type} if annotation_type else {}
+            row.update(
+                model_name=self.model_name,
+                model_version=self.model_version,
+                confidence=confidences[i],
+                timestamp_ms=timestamps[i],
+                frame_id=frame_ids[i],
+                data=data,
+            )
+            rows.append(row)
+        return rows
+
+
+Results = Union[AnnotationBatch, List[AnnotationResult]]
+
+
+def annotation_dicts(results: Results, annotation_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Response dicts for either result representation
+    
+    Args:
+        results: An AnnotationBatch or a list of AnnotationResult
+        annotation_type: If set, each dict is tagged with this "type"
+        
+    Returns:
+        One dict per result
+    """
+    with stage("serialise"):
+        if isinstance(results, AnnotationBatch):
+            return results.to_dicts(annotation_type)
+        if annotation_type:
+            return [{"type": annotation_type, **r.model_dump()} for r in results]
+        return [r.model_dump() for r in results]
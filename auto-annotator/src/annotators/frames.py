@@ -0,0 +1,44 @@
+"""
+Frame resolution helpers
+Annotators declare the long side they work at (BaseAnnotator.input_size);
+the video pipeline builds frames at that size once per frame, and frames
+passed in at full size are brought down to it here
+"""
+
+from typing import Optional, Tuple
+import numpy as np
+
+
+def fit_size(width: int, height: int, max_side: Optional[int]) -> Tuple[int, int]:
+    """
+    Size with the same aspect ratio and a long side of at most max_side
+    
+    Frames are never upscaled; max_side None keeps the size as is.
+    """
+    if not max_side or max(width, height) <= max_side:
+        return width, height
+    scale = max_side / max(width, height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def to_gray(frame: np.ndarray, max_side: Optional[int] = None) -> Tuple[np.ndarray, float]:
+    """
+    Grayscale frame with a long side of at most max_side
+    
+    Args:
+        frame: RGB or already grayscale image
+        max_side: Largest long side (None: keep the size)
+        
+    Returns:
+        (gray frame, factor from its pixels to the input's pixels)
+    """
+    import cv2
+    
+    height, width = frame.shape[:2]
+    size = fit_size(width, height, max_side)
+    if size != (width, height):
+        # Shrink before converting, so the conversion touches fewer pixels
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+    return frame, width / size[0]
@@ -7,10 +7,20 @@ import logging
 from typing import Any, Dict, List, Optional
 import numpy as np
 
-from .base import BaseAnnotator, AnnotationResult
+from .base import BaseAnnotator
+from .batch import AnnotationBatch
+from .warmup import warmup_frame
 
 logger = logging.getLogger(__name__)
 
+LANDMARK_NAMES = [
+    "WRIST", "THUMB_CMC", "THUMB_MCP", "THUMB_IP", "THUMB_TIP",
+    "INDEX_FINGER_MCP", "INDEX_FINGER_PIP", "INDEX_FINGER_DIP", "INDEX_FINGER_TIP",
+    "MIDDLE_FINGER_MCP", "MIDDLE_FINGER_PIP", "MIDDLE_FINGER_DIP", "MIDDLE_FINGER_TIP",
+    "RING_FINGER_MCP", "RING_FINGER_PIP", "RING_FINGER_DIP", "RING_FINGER_TIP",
+    "PINKY_MCP", "PINKY_PIP", "PINKY_DIP", "PINKY_TIP",
+]
+
 
 class HandPoseAnnotator(BaseAnnotator):
     """MediaPipe-based hand and pose detection"""
@@ -18,6 +28,10 @@ class HandPoseAnnotator(BaseAnnotator):
     model_name = "mediapipe_hands"
     model_version = "0.10.7"
     
+    # MediaPipe shrinks frames to its much smaller model inputs anyway;
+    # landmarks are normalised, so results need no rescaling
+    input_size = 640
+    
     def __init__(self, max_hands: int = 2, min_confidence: float = 0.5):
         super().__init__()
         self.max_hands = max_hands
@@ -45,7 +59,7 @@ class HandPoseAnnotator(BaseAnnotator):
         frame_id: int = 0,
         timestamp_ms: float = 0.0,
         **kwargs
-    ) -> List[AnnotationResult]:
+    ) -> AnnotationBatch:
         """
         Detect hands in a single frame
         
@@ -55,44 +69,36 @@ class HandPoseAnnotator(BaseAnnotator):
             timestamp_ms: Timestamp in milliseconds
             
         Returns:
-            List of hand detection results
+            Hand detections with (N, 21, 3) keypoints
         """
         self.ensure_loaded()
         
-        results = []
         detection = self._hands.process(frame)
+        hands = detection.multi_hand_landmarks or []
         
-        if detection.multi_hand_landmarks:
-            for idx, (hand_landmarks, handedness) in enumerate(
-                zip(detection.multi_hand_landmarks, detection.multi_handedness)
-            ):
-                hand_type = handedness.classification[0].label  # "Left" or "Right"
-                confidence = handedness.classification[0].score
-                
-                # Extract keypoints
-                keypoints = []
-                for landmark_idx, landmark in enumerate(hand_landmarks.landmark):
-                    keypoints.append({
-                        "x": landmark.x,
-                        "y": landmark.y,
-                        "z": landmark.z,
-                        "name": self._landmark_name(landmark_idx),
-                    })
-                
-                results.append(AnnotationResult(
-                    model_name=self.model_name,
-                    model_version=self.model_version,
-                    confidence=confidence,
-                    frame_id=frame_id,
-                    timestamp_ms=timestamp_ms,
-                    data={
-                        "hand_type": hand_type.upper(),
-                        "keypoints": keypoints,
-                        "hand_index": idx,
-                    },
-                ))
+        # Fill preallocated columns instead of building per-keypoint dicts
+        n = len(hands)
+        keypoints = np.empty((n, len(LANDMARK_NAMES), 3), dtype=np.float32)
+        confidence = np.empty(n, dtype=np.float32)
+        hand_type = np.empty(n, dtype=object)
         
-        return results
+        for idx, (hand_landmarks, handedness) in enumerate(zip(hands, detection.multi_handedness or [])):
+            classification = handedness.classification[0]
+            hand_type[idx] = classification.label.upper()  # "LEFT" or "RIGHT"
+            confidence[idx] = classification.score
+            for landmark_idx, landmark in enumerate(hand_landmarks.landmark):
+                keypoints[idx, landmark_idx] = (landmark.x, landmark.y, landmark.z)
+        
+        return AnnotationBatch.for_frame(
+            self.model_name,
+            self.model_version,
+            frame_id,
+            timestamp_ms,
+            confidence,
+            keypoints=keypoints,
+            keypoint_names=LANDMARK_NAMES,
+            attributes={"hand_type": hand_type, "hand_index": np.arange(n)},
+        )
     
     def annotate_batch(
         self,
@@ -100,7 +106,7 @@ class HandPoseAnnotator(BaseAnnotator):
         start_frame_id: int = 0,
         frame_interval_ms: float = 33.33,
         **kwargs
-    ) -> List[List[AnnotationResult]]:
+    ) -> List[AnnotationBatch]:
         """
         Detect hands in multiple frames
         
@@ -120,6 +126,10 @@ class HandPoseAnnotator(BaseAnnotator):
             all_results.append(results)
         return all_results
     
+    def warmup(self) -> None:
+        """Run inference on a black frame"""
+        self.annotate(warmup_frame())
+    
     def cleanup(self) -> None:
         """Release MediaPipe resources"""
         if self._hands:
@@ -130,11 +140,4 @@ class HandPoseAnnotator(BaseAnnotator):
     @staticmethod
     def _landmark_name(idx: int) -> str:
         """Get landmark name from index"""
-        names = [
-            "WRIST", "THUMB_CMC", "THUMB_MCP", "THUMB_IP", "THUMB_TIP",
-            "INDEX_FINGER_MCP", "INDEX_FINGER_PIP", "INDEX_FINGER_DIP", "INDEX_FINGER_TIP",
-            "MIDDLE_FINGER_MCP", "MIDDLE_FINGER_PIP", "MIDDLE_FINGER_DIP", "MIDDLE_FINGER_TIP",
-            "RING_FINGER_MCP", "RING_FINGER_PIP", "RING_FINGER_DIP", "RING_FINGER_TIP",
-            "PINKY_MCP", "PINKY_PIP", "PINKY_DIP", "PINKY_TIP",
-        ]
-        return names[idx] if idx < len(names) else f"LANDMARK_{idx}"
+        return LANDMARK_NAMES[idx] if idx < len(LANDMARK_NAMES) else f"LANDMARK_{idx}"
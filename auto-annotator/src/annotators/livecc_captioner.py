@@ -8,6 +8,7 @@ from typing import Any, Dict, List, Optional
 import numpy as np
 
 from .base import BaseAnnotator, AnnotationResult
+from .warmup import warmup_frame
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +19,9 @@ class LiveCCAnnotator(BaseAnnotator):
     model_name = "livecc"
     model_version = "1.0"
     
+    frames_per_segment = 8
+    default_prompt = "Describe what the person is doing in this video segment."
+    
     def __init__(self, 
                  model_path: str = "livecc_7b",
                  device: str = "cuda",
@@ -52,6 +56,9 @@ class LiveCCAnnotator(BaseAnnotator):
         video_path: str,
         fps: float = 30.0,
         context: Optional[str] = None,
+        start_ms: Optional[float] = None,
+        end_ms: Optional[float] = None,
+        ranges: Optional[List[List[Optional[float]]]] = None,
         **kwargs
     ) -> List[AnnotationResult]:
         """
@@ -61,6 +68,9 @@ class LiveCCAnnotator(BaseAnnotator):
             video_path: Path to video file
             fps: Video FPS for timestamp calculation
             context: Optional context prompt (e.g., "LEGO assembly video")
+            start_ms: Caption only from this time...
+            end_ms: ...to this time (timestamps stay relative to the video start)
+            ranges: Several [start_ms, end_ms] windows instead of start_ms/end_ms
             
         Returns:
             List of caption segments with timestamps
@@ -68,6 +78,8 @@ class LiveCCAnnotator(BaseAnnotator):
         self.ensure_loaded()
         
         import cv2
+        from ..pipeline.sampler import FrameSampler, resolve_gop_size
+        from ..pipeline.windows import frame_spans, time_ranges
         
         results = []
         cap = cv2.VideoCapture(video_path)
@@ -75,58 +87,120 @@ class LiveCCAnnotator(BaseAnnotator):
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         
         # Sample frames at caption_interval_sec intervals
-        frame_interval = int(video_fps * self.caption_interval_sec)
+        frame_interval = self.segment_interval(video_fps)
         
-        prompt = context or "Describe what the person is doing in this video segment."
+        prompt = context or self.default_prompt
         
-        frame_buffer = []
-        segment_start_frame = 0
+        windows = time_ranges(start_ms, end_ms, ranges)
+        spans = [(0, None)] if windows is None else frame_spans(windows, video_fps, total_frames)
         
-        frame_idx = 0
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            # Collect frames for this segment
-            if frame_idx % frame_interval < 8:  # Take 8 frames per segment
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                frame_buffer.append(frame_rgb)
-            
-            # Process segment
-            if len(frame_buffer) >= 8 or frame_idx == total_frames - 1:
-                if frame_buffer:
-                    caption = self._generate_caption(frame_buffer, prompt)
+        # Only the sampled frames are decoded; gaps (and the way to each
+        # window) are grabbed or seeked past
+        sampler = FrameSampler(cap, resolve_gop_size(video_path, video_fps), total_frames)
+        try:
+            for span_start, span_end in spans:
+                if span_end is None and total_frames > 0:
+                    span_end = total_frames
+                frame_buffer = []
+                segment_start_frame = span_start
+                
+                frame_idx = max(span_start, sampler.position)
+                at_eof = False
+                while span_end is None or frame_idx < span_end:
+                    # Collect the first frames_per_segment frames of each interval
+                    offset = frame_idx % frame_interval
+                    if offset >= self.frames_per_segment:
+                        frame_idx += frame_interval - offset
+                        continue
                     
-                    start_time = segment_start_frame / video_fps
-                    end_time = frame_idx / video_fps
+                    read = sampler.read(frame_idx)
+                    if read is None:
+                        at_eof = True
+                        break
+                    frame_idx, frame = read
+                    if span_end is not None and frame_idx >= span_end:
+                        break
+                    frame_buffer.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
                     
-                    results.append(AnnotationResult(
-                        model_name=self.model_name,
-                        model_version=self.model_version,
-                        confidence=0.85,  # LiveCC doesn't output confidence, use default
-                        frame_id=segment_start_frame,
-                        timestamp_ms=start_time * 1000,
-                        data={
-                            "caption": caption,
-                            "start_time": start_time,
-                            "end_time": end_time,
-                            "is_step": self._is_step_description(caption),
-                        },
-                    ))
+                    # Process segment
+                    if len(frame_buffer) >= self.frames_per_segment:
+                        results.append(self.caption_segment(
+                            frame_buffer, prompt, segment_start_frame, frame_idx, video_fps
+                        ))
+                        frame_buffer = []
+                        segment_start_frame = frame_idx
                     
-                    frame_buffer = []
-                    segment_start_frame = frame_idx
-            
-            frame_idx += 1
-        
-        cap.release()
+                    frame_idx += 1
+                
+                if frame_buffer:
+                    last_frame = (sampler.position if at_eof or span_end is None else span_end) - 1
+                    results.append(self.caption_segment(
+                        frame_buffer, prompt, segment_start_frame, last_frame, video_fps
+                    ))
+                if at_eof:
+                    break
+        finally:
+            cap.release()
         
         # Post-process to identify steps
         self._identify_steps(results)
         
         return results
     
+    def annotate_batch(
+        self,
+        video_paths: List[str],
+        **kwargs
+    ) -> List[List[AnnotationResult]]:
+        """Caption multiple videos"""
+        return [self.annotate(path, **kwargs) for path in video_paths]
+    
+    def segment_interval(self, fps: float) -> int:
+        """Frames between the starts of consecutive caption segments"""
+        return max(1, int(fps * self.caption_interval_sec))
+    
+    def caption_segment(
+        self,
+        frames: List[np.ndarray],
+        prompt: str,
+        start_frame: int,
+        end_frame: int,
+        fps: float,
+    ) -> AnnotationResult:
+        """
+        Caption one segment of already-decoded frames
+        
+        Args:
+            frames: RGB frames sampled from the segment
+            prompt: Caption prompt
+            start_frame: First frame of the segment
+            end_frame: Frame at which the segment was closed
+            fps: Video FPS for timestamp calculation
+            
+        Returns:
+            Caption result for the segment
+        """
+        self.ensure_loaded()
+        
+        caption = self._generate_caption(frames, prompt)
+        
+        start_time = start_frame / fps
+        end_time = end_frame / fps
+        
+        return AnnotationResult(
+            model_name=self.model_name,
+            model_version=self.model_version,
+            confidence=0.85,  # LiveCC doesn't output confidence, use default
+            frame_id=start_frame,
+            timestamp_ms=start_time * 1000,
+            data={
+                "caption": caption,
+                "start_time": start_time,
+                "end_time": end_time,
+                "is_step": self._is_step_description(caption),
+            },
+        )
+    
     def _generate_caption(self, frames: List[np.ndarray], prompt: str) -> str:
         """Generate caption from frames using LiveCC"""
         import torch
@@ -169,6 +243,11 @@ class LiveCCAnnotator(BaseAnnotator):
                 step_num += 1
                 result.data["step_number"] = step_num
     
+    def warmup(self) -> None:
+        """Caption one segment of black frames"""
+        frames = [warmup_frame()] * self.frames_per_segment
+        self.caption_segment(frames, self.default_prompt, 0, self.frames_per_segment, 30.0)
+    
     def cleanup(self) -> None:
         """Release model resources"""
         if self._model:
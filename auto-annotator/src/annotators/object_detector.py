@@ -7,7 +7,9 @@ import logging
 from typing import Any, Dict, List, Optional
 import numpy as np
 
-from .base import BaseAnnotator, AnnotationResult
+from .base import BaseAnnotator
+from .batch import AnnotationBatch
+from .warmup import warmup_frame
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +20,9 @@ class ObjectDetector(BaseAnnotator):
     model_name = "yolov8"
     model_version = "8.0.0"
     
+    # YOLO letterboxes to 640; larger frames would only be shrunk again
+    input_size = 640
+    
     # Custom class mapping for LEGO domain
     LEGO_CLASSES = {
         "person": "hand",  # Remap person to hand for our use case
@@ -60,8 +65,9 @@ class ObjectDetector(BaseAnnotator):
         frame_id: int = 0,
         timestamp_ms: float = 0.0,
         classes: Optional[List[str]] = None,
+        scale: float = 1.0,
         **kwargs
-    ) -> List[AnnotationResult]:
+    ) -> AnnotationBatch:
         """
         Detect objects in a single frame
         
@@ -70,9 +76,11 @@ class ObjectDetector(BaseAnnotator):
             frame_id: Frame number
             timestamp_ms: Timestamp in milliseconds
             classes: Filter to specific class names
-            
+            scale: Factor from frame pixels to the source video's, for
+                frames downscaled to input_size
+                
         Returns:
-            List of object detection results
+            Object detections with (N, 4) x/y/w/h boxes
         """
         self.ensure_loaded()
         
@@ -84,51 +92,20 @@ class ObjectDetector(BaseAnnotator):
             device=self.device,
         )
         
-        results = []
-        for pred in predictions:
-            boxes = pred.boxes
-            for i, (box, conf, cls) in enumerate(zip(boxes.xyxy, boxes.conf, boxes.cls)):
-                class_name = self._model.names[int(cls)]
-                
-                # Remap class names for LEGO domain
-                object_type = self.LEGO_CLASSES.get(class_name, class_name)
-                
-                # Filter by class if specified
-                if classes and object_type not in classes:
-                    continue
-                
-                # Get bounding box
-                x1, y1, x2, y2 = box.cpu().numpy()
-                bbox = {
-                    "x": float(x1),
-                    "y": float(y1),
-                    "w": float(x2 - x1),
-                    "h": float(y2 - y1),
-                }
-                
-                results.append(AnnotationResult(
-                    model_name=self.model_name,
-                    model_version=self.model_version,
-                    confidence=float(conf),
-                    frame_id=frame_id,
-                    timestamp_ms=timestamp_ms,
-                    data={
-                        "object_type": object_type,
-                        "original_class": class_name,
-                        "bbox": bbox,
-                        "detection_index": i,
-                    },
-                ))
-        
-        return results
+        # One image in, one prediction out
+        return self._parse_prediction(predictions[0], frame_id, timestamp_ms, classes, scale)
     
     def annotate_batch(
         self,
         frames: List[np.ndarray],
         start_frame_id: int = 0,
         frame_interval_ms: float = 33.33,
+        frame_ids: Optional[List[int]] = None,
+        timestamps_ms: Optional[List[float]] = None,
+        classes: Optional[List[str]] = None,
+        scale: float = 1.0,
         **kwargs
-    ) -> List[List[AnnotationResult]]:
+    ) -> List[AnnotationBatch]:
         """
         Detect objects in multiple frames
         
@@ -136,6 +113,10 @@ class ObjectDetector(BaseAnnotator):
             frames: List of RGB images
             start_frame_id: Starting frame ID
             frame_interval_ms: Time between frames in ms
+            frame_ids: Explicit frame IDs for non-consecutive (sampled) frames
+            timestamps_ms: Explicit timestamps matching frame_ids
+            classes: Filter to specific class names
+            scale: Factor from frame pixels to the source video's
             
         Returns:
             List of detection results per frame
@@ -152,41 +133,70 @@ class ObjectDetector(BaseAnnotator):
         
         all_results = []
         for idx, pred in enumerate(predictions):
-            frame_id = start_frame_id + idx
-            timestamp_ms = frame_id * frame_interval_ms
-            
-            frame_results = []
-            boxes = pred.boxes
-            for i, (box, conf, cls) in enumerate(zip(boxes.xyxy, boxes.conf, boxes.cls)):
-                class_name = self._model.names[int(cls)]
-                object_type = self.LEGO_CLASSES.get(class_name, class_name)
-                
-                x1, y1, x2, y2 = box.cpu().numpy()
-                bbox = {
-                    "x": float(x1),
-                    "y": float(y1),
-                    "w": float(x2 - x1),
-                    "h": float(y2 - y1),
-                }
-                
-                frame_results.append(AnnotationResult(
-                    model_name=self.model_name,
-                    model_version=self.model_version,
-                    confidence=float(conf),
-                    frame_id=frame_id,
-                    timestamp_ms=timestamp_ms,
-                    data={
-                        "object_type": object_type,
-                        "original_class": class_name,
-                        "bbox": bbox,
-                        "detection_index": i,
-                    },
-                ))
+            frame_id = frame_ids[idx] if frame_ids is not None else start_frame_id + idx
+            if timestamps_ms is not None:
+                timestamp_ms = timestamps_ms[idx]
+            else:
+                timestamp_ms = frame_id * frame_interval_ms
             
-            all_results.append(frame_results)
+            all_results.append(self._parse_prediction(pred, frame_id, timestamp_ms, classes, scale))
         
         return all_results
     
+    def _parse_prediction(
+        self,
+        pred: Any,
+        frame_id: int,
+        timestamp_ms: float,
+        classes: Optional[List[str]] = None,
+        scale: float = 1.0,
+    ) -> AnnotationBatch:
+        """Convert one YOLO prediction into columnar detections, boxes in source pixels"""
+        boxes = pred.boxes
+        
+        # Move each tensor to the host once rather than per box
+        xyxy = boxes.xyxy.cpu().numpy()
+        if scale != 1.0:
+            xyxy = xyxy * scale
+        confidence = boxes.conf.cpu().numpy()
+        class_ids = boxes.cls.cpu().numpy().astype(np.int64).tolist()
+        
+        # Remap class names for LEGO domain
+        original_class = np.array([self._model.names[c] for c in class_ids], dtype=object)
+        object_type = np.array(
+            [self.LEGO_CLASSES.get(name, name) for name in original_class], dtype=object
+        )
+        detection_index = np.arange(len(class_ids))
+        
+        # Filter by class if specified
+        if classes:
+            keep = np.array([t in classes for t in object_type], dtype=bool)
+            xyxy, confidence = xyxy[keep], confidence[keep]
+            original_class, object_type = original_class[keep], object_type[keep]
+            detection_index = detection_index[keep]
+        
+        bbox = np.empty((len(xyxy), 4), dtype=np.float32)
+        bbox[:, :2] = xyxy[:, :2]
+        bbox[:, 2:] = xyxy[:, 2:] - xyxy[:, :2]
+        
+        return AnnotationBatch.for_frame(
+            self.model_name,
+            self.model_version,
+            frame_id,
+            timestamp_ms,
+            confidence,
+            bbox=bbox,
+            attributes={
+                "object_type": object_type,
+                "original_class": original_class,
+                "detection_index": detection_index,
+            },
+        )
+    
+    def warmup(self) -> None:
+        """Run inference on a black frame"""
+        self.annotate(warmup_frame())
+    
     def cleanup(self) -> None:
         """Release model resources"""
         self._model = None
@@ -8,6 +8,7 @@ from typing import Any, Dict, List, Optional
 import numpy as np
 
 from .base import BaseAnnotator, AnnotationResult
+from .warmup import warmup_frame
 
 logger = logging.getLogger(__name__)
 
@@ -120,6 +121,41 @@ class SAM3Annotator(BaseAnnotator):
         
         return results
     
+    def annotate_batch(
+        self,
+        frames: List[np.ndarray],
+        start_frame_id: int = 0,
+        frame_interval_ms: float = 33.33,
+        frame_ids: Optional[List[int]] = None,
+        timestamps_ms: Optional[List[float]] = None,
+        **kwargs
+    ) -> List[List[AnnotationResult]]:
+        """
+        Segment multiple frames
+        
+        The predictor embeds one image at a time, so frames are processed
+        sequentially; batching still amortises dispatch from the pipeline.
+        
+        Args:
+            frames: List of RGB images
+            start_frame_id: Starting frame ID
+            frame_interval_ms: Time between frames in ms
+            frame_ids: Explicit frame IDs for non-consecutive (sampled) frames
+            timestamps_ms: Explicit timestamps matching frame_ids
+            
+        Returns:
+            List of segmentation results per frame
+        """
+        all_results = []
+        for idx, frame in enumerate(frames):
+            frame_id = frame_ids[idx] if frame_ids is not None else start_frame_id + idx
+            if timestamps_ms is not None:
+                timestamp_ms = timestamps_ms[idx]
+            else:
+                timestamp_ms = frame_id * frame_interval_ms
+            all_results.append(self.annotate(frame, frame_id, timestamp_ms, **kwargs))
+        return all_results
+    
     def _encode_mask(self, mask: np.ndarray) -> str:
         """Encode binary mask as RLE for storage"""
         import base64
@@ -132,6 +168,10 @@ class SAM3Annotator(BaseAnnotator):
         
         return encoded
     
+    def warmup(self) -> None:
+        """Run inference on a black frame"""
+        self.annotate(warmup_frame())
+    
     def cleanup(self) -> None:
         """Release model resources"""
         if self._model:
@@ -4,13 +4,18 @@ Uses PySceneDetect for automatic scene boundary detection
 """
 
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 import numpy as np
 
 from .base import BaseAnnotator, AnnotationResult
+from .frames import to_gray
 
 logger = logging.getLogger(__name__)
 
+# Long side of the grayscale frames annotate_frames compares; the mean
+# difference hardly changes, the pixel count drops sharply
+FRAME_DIFF_SIZE = 320
+
 
 class SceneSegmenter(BaseAnnotator):
     """PySceneDetect-based scene segmentation"""
@@ -41,10 +46,100 @@ class SceneSegmenter(BaseAnnotator):
             logger.error("scenedetect not installed. Run: pip install scenedetect")
             raise
     
+    def create_detector(self, min_scene_len: Optional[int] = None):
+        """
+        Create a fresh ContentDetector for a single pass over a video
+        
+        Detectors keep state between frames, so streaming callers need one
+        per video rather than the shared instance used by annotate().
+        
+        Args:
+            min_scene_len: Override the configured minimum scene length;
+                0 reports every frame over the threshold as a cut
+        """
+        from scenedetect import ContentDetector
+        return ContentDetector(
+            threshold=self.threshold,
+            min_scene_len=self.min_scene_len if min_scene_len is None else min_scene_len,
+        )
+    
+    def create_cut_filter(self, fps: float) -> Callable[[int, bool], List[int]]:
+        """
+        The minimum scene length filter of create_detector(), on its own
+        
+        Feeding it (frame_num, over_threshold) in frame order, with the
+        cuts a create_detector(min_scene_len=0) pass reported as the frames
+        over the threshold, reproduces the cuts of a normal pass. Frames
+        under the threshold only need to be fed where they can end a merge
+        (see chunked.SceneStitcher).
+        
+        Returns:
+            Callable returning the cut frames confirmed by each frame
+        """
+        from scenedetect import FrameTimecode
+        try:
+            from scenedetect.detector import FlashFilter
+        except ImportError:
+            FlashFilter = None
+        
+        if FlashFilter is None:
+            # Releases before the flash filter suppress cuts closer than
+            # min_scene_len to the previous cut (or the first frame)
+            last_cut: List[int] = []
+            
+            def suppress(frame_num: int, over_threshold: bool) -> List[int]:
+                if not last_cut:
+                    last_cut.append(frame_num)
+                if over_threshold and frame_num - last_cut[0] >= self.min_scene_len:
+                    last_cut[0] = frame_num
+                    return [frame_num]
+                return []
+            
+            return suppress
+        
+        # ContentDetector's default filter mode
+        flash_filter = FlashFilter(mode=FlashFilter.Mode.MERGE, length=self.min_scene_len)
+        
+        def merge(frame_num: int, over_threshold: bool) -> List[int]:
+            cuts = flash_filter.filter(FrameTimecode(frame_num, fps), over_threshold)
+            return [int(cut.frame_num) if hasattr(cut, "frame_num") else int(cut) for cut in cuts]
+        
+        return merge
+    
+    def scene_result(
+        self,
+        scene_index: int,
+        start_frame: int,
+        end_frame: int,
+        fps: float,
+        confidence: float = 1.0,
+    ) -> AnnotationResult:
+        """Build a scene segment result from frame boundaries"""
+        start_ms = (start_frame / fps) * 1000
+        end_ms = (end_frame / fps) * 1000
+        
+        return AnnotationResult(
+            model_name=self.model_name,
+            model_version=self.model_version,
+            confidence=confidence,
+            timestamp_ms=start_ms,
+            data={
+                "scene_index": scene_index,
+                "start_ms": start_ms,
+                "end_ms": end_ms,
+                "start_frame": start_frame,
+                "end_frame": end_frame,
+                "duration_ms": end_ms - start_ms,
+            },
+        )
+    
     def annotate(
         self,
         video_path: str,
         fps: float = 30.0,
+        start_ms: Optional[float] = None,
+        end_ms: Optional[float] = None,
+        ranges: Optional[List[List[Optional[float]]]] = None,
         **kwargs
     ) -> List[AnnotationResult]:
         """
@@ -53,17 +148,31 @@ class SceneSegmenter(BaseAnnotator):
         Args:
             video_path: Path to video file
             fps: Frames per second (used for timing)
+            start_ms: Detect only from this time...
+            end_ms: ...to this time (timestamps stay relative to the video start)
+            ranges: Several [start_ms, end_ms] windows instead of start_ms/end_ms
             
         Returns:
             List of scene segment results
         """
         self.ensure_loaded()
         
+        from ..pipeline.windows import time_ranges
+        windows = time_ranges(start_ms, end_ms, ranges) or [(None, None)]
+        
         try:
-            from scenedetect import open_video, detect
+            from scenedetect import detect
             
-            video = open_video(video_path)
-            scene_list = detect(video, self._detector)
+            # PySceneDetect seeks to each window's start and stops at its
+            # end; a fresh detector per window keeps cuts from spanning gaps
+            scene_list = []
+            for window_start, window_end in windows:
+                scene_list += detect(
+                    video_path,
+                    self.create_detector(),
+                    start_time=None if window_start is None else window_start / 1000,
+                    end_time=None if window_end is None else window_end / 1000,
+                )
             
             results = []
             for idx, (start, end) in enumerate(scene_list):
@@ -86,7 +195,7 @@ class SceneSegmenter(BaseAnnotator):
                 ))
             
             return results
-            
+        
         except Exception as e:
             logger.error(f"Scene detection failed: {e}")
             return []
@@ -101,7 +210,7 @@ class SceneSegmenter(BaseAnnotator):
         Detect scene boundaries from frame array
         
         Args:
-            frames: Video frames as numpy array (T, H, W, 3)
+            frames: Video frames as numpy array (T, H, W, 3), or grayscale (T, H, W)
             fps: Frames per second
             
         Returns:
@@ -119,10 +228,11 @@ class SceneSegmenter(BaseAnnotator):
         except ImportError:
             return results
         
-        prev_frame = frames[0] if len(frames) > 0 else None
+        prev_frame = to_gray(frames[0], FRAME_DIFF_SIZE)[0] if len(frames) > 0 else None
         
         for i, frame in enumerate(frames[1:], 1):
             # Calculate frame difference
+            frame, _ = to_gray(frame, FRAME_DIFF_SIZE)
             diff = cv2.absdiff(prev_frame, frame)
             mean_diff = np.mean(diff)
             
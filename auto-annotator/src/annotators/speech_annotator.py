@@ -8,6 +8,7 @@ from typing import Any, Dict, List, Optional
 import numpy as np
 
 from .base import BaseAnnotator, AnnotationResult
+from .warmup import silent_wav
 
 logger = logging.getLogger(__name__)
 
@@ -195,6 +196,17 @@ class SpeechAnnotator(BaseAnnotator):
         """Process multiple audio files"""
         return [self.annotate(path, **kwargs) for path in audio_paths]
     
+    def cache_params(self) -> Dict[str, Any]:
+        """Output-affecting settings; the HF token is a credential, not a setting"""
+        params = super().cache_params()
+        params.pop("hf_token", None)
+        return params
+    
+    def warmup(self) -> None:
+        """Run VAD on a second of silence"""
+        with silent_wav() as path:
+            self.annotate(path)
+    
     def cleanup(self) -> None:
         """Release resources"""
         self._vad_pipeline = None
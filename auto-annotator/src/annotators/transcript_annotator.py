@@ -8,6 +8,7 @@ from typing import Any, Dict, List, Optional
 import numpy as np
 
 from .base import BaseAnnotator, AnnotationResult
+from .warmup import silent_wav
 
 logger = logging.getLogger(__name__)
 
@@ -164,6 +165,11 @@ class TranscriptAnnotator(BaseAnnotator):
             logger.error(f"Language detection failed: {e}")
             return {"detected_language": "unknown", "confidence": 0.0}
     
+    def warmup(self) -> None:
+        """Transcribe a second of silence"""
+        with silent_wav() as path:
+            self.annotate(path)
+    
     def cleanup(self) -> None:
         """Release resources"""
         self._model = None
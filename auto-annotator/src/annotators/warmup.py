@@ -0,0 +1,35 @@
+"""
+Synthetic inputs for model warm-up
+A warm-up inference pays first-call costs (graph setup, kernel selection,
+allocator growth) before real traffic arrives
+"""
+
+import os
+import tempfile
+import wave
+from contextlib import contextmanager
+from typing import Iterator
+import numpy as np
+
+WARMUP_FRAME_SHAPE = (480, 640, 3)
+
+
+def warmup_frame() -> np.ndarray:
+    """Black RGB frame"""
+    return np.zeros(WARMUP_FRAME_SHAPE, dtype=np.uint8)
+
+
+@contextmanager
+def silent_wav(seconds: float = 1.0, sample_rate: int = 16000) -> Iterator[str]:
+    """Temporary 16-bit mono WAV of silence; removed when the block exits"""
+    fd, path = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+    try:
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(sample_rate)
+            f.writeframes(b"\x00\x00" * int(seconds * sample_rate))
+        yield path
+    finally:
+        os.unlink(path)
@@ -1,12 +1,30 @@
 """FastAPI routes for annotation endpoints"""
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, model_validator
 from typing import Optional, List, Dict, Any
-import tempfile
-import os
+import json
 import logging
 
+from .batching import get_batcher
+from .encoding import negotiate
+from .media import media_input, open_media, release_media
+from .streaming import stream_format, streaming_response
+from .uploads import spooled_upload
+from ..admission import AdmissionRejected, Ticket, get_admission_controller
+from ..annotators.batch import annotation_dicts
+from ..executors import run_in_executor
+from ..pipeline import (
+    annotate_audio_file,
+    annotate_video_file,
+    audio_annotators,
+    iter_video_annotations,
+    time_ranges,
+    video_annotators,
+)
+from ..timings import collect_timings
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
@@ -29,6 +47,20 @@ class VideoAnnotationRequest(AnnotationRequest):
     run_sam3: bool = False      # SAM3 segmentation (GPU intensive)
     run_livecc: bool = False    # LiveCC dense captioning (GPU intensive)
     frame_interval: int = 30    # Annotate every N frames
+    use_cache: bool = True      # Reuse cached per-annotator results for the same file
+    start_ms: Optional[float] = None    # Annotate only from here...
+    end_ms: Optional[float] = None      # ...to here (timestamps stay absolute)
+    ranges: Optional[List[List[Optional[float]]]] = None  # Or several [start_ms, end_ms] windows
+    fps: Optional[float] = None         # Frame rate of a .npy frame array (default 30)
+    
+    @model_validator(mode="after")
+    def _check_ranges(self) -> "VideoAnnotationRequest":
+        self.windows()
+        return self
+    
+    def windows(self):
+        """Merged (start_ms, end_ms) windows, or None for the whole video"""
+        return time_ranges(self.start_ms, self.end_ms, self.ranges)
 
 
 class AudioAnnotationRequest(AnnotationRequest):
@@ -37,6 +69,7 @@ class AudioAnnotationRequest(AnnotationRequest):
     run_diarization: bool = True
     run_asr: bool = True
     language: Optional[str] = None
+    use_cache: bool = True
 
 
 class AnnotationResponse(BaseModel):
@@ -45,6 +78,26 @@ class AnnotationResponse(BaseModel):
     job_id: Optional[str] = None
     annotations: Optional[List[Dict[str, Any]]] = None
     error: Optional[str] = None
+    timings: Optional[Dict[str, Any]] = None  # Stage breakdown, when requested with timings=true
+
+
+async def _admit(endpoint: str, annotators: List[str]) -> Ticket:
+    """
+    Take the request's admission slots, waiting up to the queue timeout
+    
+    Raises:
+        HTTPException: 429 when the queue is full, 503 when the wait times
+            out; both with a Retry-After header
+    """
+    try:
+        return await get_admission_controller().admit(endpoint, annotators)
+    except AdmissionRejected as e:
+        logger.warning(f"Rejected {endpoint} request: {e.detail}")
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Retry-After": str(e.retry_after)},
+        )
 
 
 # Health endpoint
@@ -57,7 +110,10 @@ async def api_health():
 # Video annotation endpoints
 @router.post("/annotate/video", response_model=AnnotationResponse)
 async def annotate_video(
-    file: UploadFile = File(...),
+    request: Request,
+    file: Optional[UploadFile] = File(None),
+    file_url: Optional[str] = Form(None),
+    media_asset_id: Optional[str] = Form(None),
     run_hands: bool = Form(True),
     run_objects: bool = Form(True),
     run_actions: bool = Form(True),
@@ -65,250 +121,270 @@ async def annotate_video(
     run_sam3: bool = Form(False),
     run_livecc: bool = Form(False),
     frame_interval: int = Form(30),
+    use_cache: bool = Form(True),
+    timings: bool = Form(False),
+    start_ms: Optional[float] = Form(None),
+    end_ms: Optional[float] = Form(None),
+    ranges: Optional[str] = Form(None),
+    fps: Optional[float] = Form(None),
     background_tasks: BackgroundTasks = None,
 ):
     """
     Full video annotation pipeline
     
     Runs hand detection, object detection, action recognition, scene segmentation,
-    SAM3 segmentation, and LiveCC dense captioning.
+    SAM3 segmentation, and LiveCC dense captioning over a single decode of the video.
+    
+    Send `Accept: application/x-ndjson` or `Accept: text/event-stream` to
+    receive annotations and progress events as they are produced, or
+    `Accept: application/vnd.apache.arrow.stream` / `application/msgpack`
+    for a binary response body.
+    
+    Per-annotator results are cached by file content, so resubmitting the
+    same video with another annotator enabled only runs that annotator.
+    Pass use_cache=false to force a full recompute.
+    
+    With timings=true the response also carries a per-stage breakdown
+    (upload, decode, rgb_convert, inference.<type>, serialise) with totals,
+    per-sample percentiles and bytes processed. Ignored when streaming.
+    
+    start_ms/end_ms (or ranges, a JSON list of [start_ms, end_ms] pairs)
+    restrict annotation to those windows: decoding seeks to the keyframe
+    before each window and stops at its end, and timestamps and frame
+    numbers stay relative to the start of the video.
+    
+    Requests beyond the video endpoint's or an annotator's concurrency
+    limit wait in a bounded queue; 429 (queue full) or 503 (wait timed
+    out) responses carry a Retry-After header.
+    
+    Instead of uploading, a file on a volume shared with the service can
+    be named with file_url (file:// URL or absolute path) or
+    media_asset_id, from the directories in LOCAL_MEDIA_DIRS; it is read
+    in place. A .npy file (local or uploaded) holds pre-decoded RGB
+    frames as a (T, H, W, 3) uint8 array, memory-mapped rather than
+    decoded; fps gives its frame rate.
     """
+    options = dict(
+        run_hands=run_hands,
+        run_objects=run_objects,
+        run_actions=run_actions,
+        run_scenes=run_scenes,
+        run_sam3=run_sam3,
+        run_livecc=run_livecc,
+        frame_interval=frame_interval,
+        use_cache=use_cache,
+        fps=fps,
+    )
+    try:
+        options["ranges"] = time_ranges(start_ms, end_ms, json.loads(ranges) if ranges else None)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid time range: {e}")
+    
+    fmt = stream_format(request.headers.get("accept"))
+    if fmt:
+        return await _stream_video(file, file_url, media_asset_id, fmt, options)
+    
+    ticket = await _admit("video", video_annotators(**options))
     try:
         from ..main import get_annotator
-        import cv2
-        import numpy as np
         
-        # Save uploaded file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as tmp:
-            content = await file.read()
-            tmp.write(content)
-            video_path = tmp.name
-        
-        all_annotations = []
-        
-        try:
-            # Open video
-            cap = cv2.VideoCapture(video_path)
-            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
-            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            
-            frame_id = 0
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                # Only annotate every N frames
-                if frame_id % frame_interval != 0:
-                    frame_id += 1
-                    continue
-                
-                # Convert BGR to RGB
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                timestamp_ms = (frame_id / fps) * 1000
-                
-                # Hand detection (MediaPipe)
-                if run_hands:
-                    hand_annotator = get_annotator("hand_pose")
-                    hand_results = hand_annotator.annotate(frame_rgb, frame_id, timestamp_ms)
-                    for r in hand_results:
-                        all_annotations.append({
-                            "type": "hand_pose",
-                            **r.model_dump(),
-                        })
-                
-                # Object detection (YOLOv8)
-                if run_objects:
-                    object_annotator = get_annotator("object")
-                    object_results = object_annotator.annotate(frame_rgb, frame_id, timestamp_ms)
-                    for r in object_results:
-                        all_annotations.append({
-                            "type": "object_detection",
-                            **r.model_dump(),
-                        })
-                
-                # SAM3 Segmentation (GPU intensive)
-                if run_sam3:
-                    sam3_annotator = get_annotator("sam3")
-                    sam3_results = sam3_annotator.annotate(frame_rgb, frame_id, timestamp_ms)
-                    for r in sam3_results:
-                        all_annotations.append({
-                            "type": "sam3_segmentation",
-                            **r.model_dump(),
-                        })
-                
-                frame_id += 1
-            
-            cap.release()
-            
-            # Scene segmentation (on full video)
-            if run_scenes:
-                scene_annotator = get_annotator("scene")
-                scene_results = scene_annotator.annotate(video_path, fps)
-                for r in scene_results:
-                    all_annotations.append({
-                        "type": "scene_segment",
-                        **r.model_dump(),
-                    })
-            
-            # LiveCC Dense Captioning (on full video)
-            if run_livecc:
-                livecc_annotator = get_annotator("livecc")
-                livecc_results = livecc_annotator.annotate(
-                    video_path, 
-                    fps, 
-                    context="LEGO assembly video - describe each building step"
+        with collect_timings(timings) as stage_timings:
+            # Spool an upload to disk in bounded chunks, hashing as it is
+            # copied; local files are used where they are
+            async with media_input(file, file_url, media_asset_id, suffix=".mp4", allow_frame_array=True) as media:
+                all_annotations = await run_in_executor(
+                    "video_pipeline",
+                    annotate_video_file,
+                    media.path,
+                    get_annotator,
+                    media_hash=media.media_hash,
+                    **options,
                 )
-                for r in livecc_results:
-                    all_annotations.append({
-                        "type": "dense_caption",
-                        **r.model_dump(),
-                    })
-            
-            return AnnotationResponse(
-                success=True,
-                annotations=all_annotations,
-            )
-            
-        finally:
-            os.unlink(video_path)
-            
+                
+                return await negotiate(request, AnnotationResponse(
+                    success=True,
+                    annotations=all_annotations,
+                    timings=stage_timings.summary() if stage_timings else None,
+                ), stage_timings)
+    
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Video annotation failed: {e}")
-        return AnnotationResponse(success=False, error=str(e))
+        return await negotiate(request, AnnotationResponse(success=False, error=str(e)))
+    finally:
+        ticket.release()
+
+
+async def _stream_video(
+    file: Optional[UploadFile],
+    file_url: Optional[str],
+    media_asset_id: Optional[str],
+    fmt: str,
+    options: Dict[str, Any],
+) -> StreamingResponse:
+    """
+    Stream video annotations as NDJSON or SSE
+    
+    The spooled file and admission slots live until the pipeline ends, or
+    are released straight away if the stream closes before it starts.
+    """
+    from ..main import get_annotator
+    
+    ticket = await _admit("video", video_annotators(**options))
+    try:
+        media = await open_media(file, file_url, media_asset_id, suffix=".mp4", allow_frame_array=True)
+    except BaseException:
+        ticket.release()
+        raise
+    
+    def cleanup() -> None:
+        try:
+            release_media(media)
+        finally:
+            ticket.release()
+    
+    def produce(on_progress):
+        return iter_video_annotations(
+            media.path, get_annotator, on_progress=on_progress, media_hash=media.media_hash, **options
+        )
+    
+    return streaming_response(produce, fmt, cleanup=cleanup)
 
 
 @router.post("/annotate/audio", response_model=AnnotationResponse)
 async def annotate_audio(
-    file: UploadFile = File(...),
+    request: Request,
+    file: Optional[UploadFile] = File(None),
+    file_url: Optional[str] = Form(None),
+    media_asset_id: Optional[str] = Form(None),
     run_vad: bool = Form(True),
     run_diarization: bool = Form(True),
     run_asr: bool = Form(True),
     language: Optional[str] = Form(None),
+    use_cache: bool = Form(True),
+    timings: bool = Form(False),
 ):
     """
     Full audio annotation pipeline
     
-    Runs VAD, speaker diarization, and ASR.
+    Runs VAD, speaker diarization, and ASR. With timings=true the response
+    also carries a per-stage breakdown (upload, inference.<type>, serialise).
+    Subject to the same admission limits as video, and like it takes a
+    local file_url/media_asset_id in place of an upload.
     """
+    ticket = await _admit("audio", audio_annotators(run_vad=run_vad, run_asr=run_asr))
     try:
         from ..main import get_annotator
         
-        # Save uploaded file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-            content = await file.read()
-            tmp.write(content)
-            audio_path = tmp.name
-        
-        all_annotations = []
-        
-        try:
-            # Speech detection (VAD + diarization)
-            if run_vad:
-                speech_annotator = get_annotator("speech")
-                speech_results = speech_annotator.annotate(
-                    audio_path,
+        with collect_timings(timings) as stage_timings:
+            async with media_input(file, file_url, media_asset_id, suffix=".wav") as media:
+                all_annotations = await run_in_executor(
+                    "audio_pipeline",
+                    annotate_audio_file,
+                    media.path,
+                    get_annotator,
+                    run_vad=run_vad,
                     run_diarization=run_diarization,
+                    run_asr=run_asr,
+                    language=language,
+                    media_hash=media.media_hash,
+                    use_cache=use_cache,
                 )
-                for r in speech_results:
-                    all_annotations.append({
-                        "type": "speech_segment",
-                        **r.model_dump(),
-                    })
-            
-            # ASR
-            if run_asr:
-                transcript_annotator = get_annotator("transcript")
-                transcript_results = transcript_annotator.annotate(audio_path)
-                for r in transcript_results:
-                    all_annotations.append({
-                        "type": "transcript",
-                        **r.model_dump(),
-                    })
-            
-            return AnnotationResponse(
-                success=True,
-                annotations=all_annotations,
-            )
-            
-        finally:
-            os.unlink(audio_path)
-            
+                
+                return await negotiate(request, AnnotationResponse(
+                    success=True,
+                    annotations=all_annotations,
+                    timings=stage_timings.summary() if stage_timings else None,
+                ), stage_timings)
+    
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Audio annotation failed: {e}")
-        return AnnotationResponse(success=False, error=str(e))
+        return await negotiate(request, AnnotationResponse(success=False, error=str(e)))
+    finally:
+        ticket.release()
 
 
 # Individual annotation endpoints
+def _decode_image(content: bytes):
+    """Decode an uploaded image to an RGB array"""
+    import cv2
+    import numpy as np
+    
+    nparr = np.frombuffer(content, np.uint8)
+    frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError("Could not decode image")
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+
 @router.post("/annotate/hands", response_model=AnnotationResponse)
-async def annotate_hands_only(file: UploadFile = File(...)):
+async def annotate_hands_only(request: Request, file: UploadFile = File(...)):
     """Hand detection only"""
+    ticket = await _admit("hands", ["hand_pose"])
     try:
         from ..main import get_annotator
-        import cv2
-        import numpy as np
         
         content = await file.read()
-        nparr = np.frombuffer(content, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        frame_rgb = await run_in_executor("preprocess", _decode_image, content)
         
         annotator = get_annotator("hand_pose")
-        results = annotator.annotate(frame_rgb)
+        results = await run_in_executor("hand_pose", annotator.annotate, frame_rgb)
         
-        return AnnotationResponse(
+        return await negotiate(request, AnnotationResponse(
             success=True,
-            annotations=[r.model_dump() for r in results],
-        )
+            annotations=annotation_dicts(results),
+        ))
     except Exception as e:
-        return AnnotationResponse(success=False, error=str(e))
+        return await negotiate(request, AnnotationResponse(success=False, error=str(e)))
+    finally:
+        ticket.release()
 
 
 @router.post("/annotate/objects", response_model=AnnotationResponse)
-async def annotate_objects_only(file: UploadFile = File(...)):
+async def annotate_objects_only(request: Request, file: UploadFile = File(...)):
     """Object detection only"""
+    ticket = await _admit("objects", ["object"])
     try:
         from ..main import get_annotator
-        import cv2
-        import numpy as np
         
         content = await file.read()
-        nparr = np.frombuffer(content, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        frame_rgb = await run_in_executor("preprocess", _decode_image, content)
         
-        annotator = get_annotator("object")
-        results = annotator.annotate(frame_rgb)
+        # Coalesced with concurrent requests into one batched YOLO call
+        results = await get_batcher("object", get_annotator).annotate(frame_rgb)
         
-        return AnnotationResponse(
+        return await negotiate(request, AnnotationResponse(
             success=True,
-            annotations=[r.model_dump() for r in results],
-        )
+            annotations=annotation_dicts(results),
+        ))
     except Exception as e:
-        return AnnotationResponse(success=False, error=str(e))
+        return await negotiate(request, AnnotationResponse(success=False, error=str(e)))
+    finally:
+        ticket.release()
 
 
 @router.post("/annotate/asr", response_model=AnnotationResponse)
-async def annotate_asr_only(file: UploadFile = File(...)):
+async def annotate_asr_only(request: Request, file: UploadFile = File(...)):
     """ASR transcription only"""
+    ticket = await _admit("asr", ["transcript"])
     try:
         from ..main import get_annotator
         
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-            content = await file.read()
-            tmp.write(content)
-            audio_path = tmp.name
-        
-        try:
+        async with spooled_upload(file, suffix=".wav") as audio_path:
             annotator = get_annotator("transcript")
-            results = annotator.annotate(audio_path)
+            results = await run_in_executor("transcript", annotator.annotate, audio_path)
             
-            return AnnotationResponse(
+            return await negotiate(request, AnnotationResponse(
                 success=True,
-                annotations=[r.model_dump() for r in results],
-            )
-        finally:
-            os.unlink(audio_path)
-            
+                annotations=annotation_dicts(results),
+            ))
+    
+    except HTTPException:
+        raise
     except Exception as e:
-        return AnnotationResponse(success=False, error=str(e))
+        return await negotiate(request, AnnotationResponse(success=False, error=str(e)))
+    finally:
+        ticket.release()
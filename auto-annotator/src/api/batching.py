@@ -0,0 +1,115 @@
+"""
+Request coalescing for single-image endpoints
+Concurrent requests for the same annotator are gathered for up to
+max_wait_ms (or until max_batch_size images arrive) and run as one
+annotate_batch call; each caller receives only its own results.
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import numpy as np
+
+from ..annotators.batch import Results
+from ..config import MICROBATCH_MAX_SIZE, MICROBATCH_MAX_WAIT_MS
+from ..executors import run_in_executor
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-image calls into batched inference"""
+    
+    def __init__(
+        self,
+        name: str,
+        get_annotator: Callable[[str], Any],
+        max_batch_size: int = MICROBATCH_MAX_SIZE,
+        max_wait_ms: float = MICROBATCH_MAX_WAIT_MS,
+    ):
+        """
+        Args:
+            name: Annotator name; also the executor pool the batch runs on
+            get_annotator: Lookup for loaded annotator instances
+            max_batch_size: Flush as soon as this many images are waiting
+            max_wait_ms: Flush this long after the first image arrives
+        """
+        self.name = name
+        self.get_annotator = get_annotator
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max_wait_ms
+        self._pending: List[Tuple[np.ndarray, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # In-flight batches; the event loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+    
+    async def annotate(self, frame: np.ndarray) -> Results:
+        """Queue one image and wait for its results"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((frame, future))
+        
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+        
+        return await future
+    
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def close(self) -> None:
+        """Run the images still waiting and wait for every in-flight batch"""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+    
+    async def _run(self, batch: List[Tuple[np.ndarray, asyncio.Future]]) -> None:
+        frames = [frame for frame, _ in batch]
+        try:
+            annotator = self.get_annotator(self.name)
+            batch_results = await run_in_executor(
+                self.name,
+                annotator.annotate_batch,
+                frames,
+                frame_ids=[0] * len(frames),
+                timestamps_ms=[0.0] * len(frames),
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        logger.debug(f"{self.name} micro-batch of {len(frames)} images")
+        for (_, future), results in zip(batch, batch_results):
+            # Callers that disconnected have cancelled their futures
+            if not future.done():
+                future.set_result(results)
+
+
+_batchers: Dict[str, MicroBatcher] = {}
+
+
+def get_batcher(name: str, get_annotator: Callable[[str], Any]) -> MicroBatcher:
+    """Process-wide batcher for an annotator"""
+    batcher = _batchers.get(name)
+    if batcher is None:
+        batcher = MicroBatcher(name, get_annotator)
+        _batchers[name] = batcher
+    return batcher
+
+
+async def close_batchers() -> None:
+    """Finish the in-flight batches of every batcher (on shutdown)"""
+    for batcher in list(_batchers.values()):
+        await batcher.close()
+    _batchers.clear()
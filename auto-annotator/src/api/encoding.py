@@ -0,0 +1,185 @@
+"""
+Binary response encodings for annotation payloads
+Clients that send `Accept: application/vnd.apache.arrow.stream` receive
+annotations as an Arrow IPC stream with one row per annotation, and
+`Accept: application/msgpack` returns the JSON structure as msgpack.
+JSON remains the default.
+"""
+
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from ..executors import run_in_executor
+from ..timings import StageTimings
+
+logger = logging.getLogger(__name__)
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# Accept header value -> (encoding, module it needs)
+ENCODING_MEDIA_TYPES = {
+    ARROW_MEDIA_TYPE: ("arrow", "pyarrow"),
+    MSGPACK_MEDIA_TYPE: ("msgpack", "msgpack"),
+    "application/x-msgpack": ("msgpack", "msgpack"),
+}
+
+# Annotation fields stored as dictionary-encoded columns
+CATEGORICAL_FIELDS = ("type", "model_name", "model_version")
+
+
+def response_encoding(accept: Optional[str]) -> Optional[str]:
+    """
+    Binary encoding requested by an Accept header, if any
+    
+    Encodings whose library is not installed are skipped, so such
+    clients get JSON (check the Content-Type of the response).
+    """
+    if not accept:
+        return None
+    for part in accept.split(","):
+        media_type = part.split(";")[0].strip().lower()
+        if media_type in ENCODING_MEDIA_TYPES:
+            encoding, module = ENCODING_MEDIA_TYPES[media_type]
+            try:
+                __import__(module)
+            except ImportError:
+                logger.warning(f"{module} not installed; cannot encode {media_type}")
+                continue
+            return encoding
+    return None
+
+
+def _data_column(pa, key: str, values: List[Any]):
+    """Arrow array for one data field, typed from the values present"""
+    present = [v for v in values if v is not None]
+    
+    if key == "bbox" and all(isinstance(v, dict) for v in present):
+        bbox_type = pa.struct([(name, pa.float32()) for name in ("x", "y", "w", "h")])
+        return pa.array(values, type=bbox_type)
+    if key == "keypoints" and all(isinstance(v, list) for v in present):
+        # Landmark names move to the schema metadata; rows keep (x, y, z)
+        points = [
+            None if v is None else [(p["x"], p["y"], p["z"]) for p in v]
+            for v in values
+        ]
+        return pa.array(points, type=pa.list_(pa.list_(pa.float32(), 3)))
+    
+    if all(isinstance(v, str) for v in present):
+        return pa.array(values, type=pa.string()).dictionary_encode()
+    if all(isinstance(v, bool) for v in present):
+        return pa.array(values, type=pa.bool_())
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+        return pa.array(values, type=pa.int64())
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return pa.array(values, type=pa.float64())
+    
+    # Nested or mixed values are kept as JSON text
+    return pa.array([None if v is None else json.dumps(v) for v in values], type=pa.string())
+
+
+def annotations_to_arrow(annotations: List[Dict[str, Any]], metadata: Optional[Dict[str, Any]] = None):
+    """
+    Columnar table of annotation dicts
+    
+    Top-level fields become columns (type/model_name/model_version
+    dictionary-encoded); each key of `data` becomes a `data.<key>` column.
+    Strings are dictionary-encoded, bbox is a float32 struct and keypoints
+    a list of float32 (x, y, z) triples whose names are listed once in
+    the schema metadata under "keypoint_names".
+    
+    Args:
+        annotations: Annotation dicts as returned in AnnotationResponse
+        metadata: Extra schema metadata (values are JSON-encoded)
+        
+    Returns:
+        pyarrow.Table
+    """
+    import pyarrow as pa
+    
+    columns = {
+        field: pa.array([a.get(field) for a in annotations], type=pa.string()).dictionary_encode()
+        for field in CATEGORICAL_FIELDS
+    }
+    columns["confidence"] = pa.array([a.get("confidence") for a in annotations], type=pa.float64())
+    columns["timestamp_ms"] = pa.array([a.get("timestamp_ms") for a in annotations], type=pa.float64())
+    columns["frame_id"] = pa.array([a.get("frame_id") for a in annotations], type=pa.int64())
+    
+    keys: Dict[str, None] = {}
+    for a in annotations:
+        keys.update(dict.fromkeys(a.get("data") or {}))
+    for key in keys:
+        values = [(a.get("data") or {}).get(key) for a in annotations]
+        columns[f"data.{key}"] = _data_column(pa, key, values)
+    
+    schema_metadata = {k: json.dumps(v) for k, v in (metadata or {}).items()}
+    if "keypoints" in keys:
+        first = next(
+            (a["data"]["keypoints"] for a in annotations if (a.get("data") or {}).get("keypoints")),
+            [],
+        )
+        schema_metadata["keypoint_names"] = json.dumps([p.get("name") for p in first])
+    
+    table = pa.table(columns)
+    return table.replace_schema_metadata(schema_metadata)
+
+
+def encode_arrow(payload: Dict[str, Any]) -> bytes:
+    """Arrow IPC stream for an AnnotationResponse dict; other fields go in the schema metadata"""
+    import pyarrow as pa
+    
+    annotations = payload.get("annotations") or []
+    metadata = {k: v for k, v in payload.items() if k != "annotations"}
+    table = annotations_to_arrow(annotations, metadata)
+    
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_msgpack(payload: Dict[str, Any]) -> bytes:
+    """msgpack encoding of an AnnotationResponse dict"""
+    import msgpack
+    return msgpack.packb(payload, use_bin_type=True)
+
+
+def encode_json(payload: Dict[str, Any]) -> bytes:
+    """JSON encoding as FastAPI's default response would render it"""
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+ENCODERS = {
+    "arrow": (encode_arrow, ARROW_MEDIA_TYPE),
+    "msgpack": (encode_msgpack, MSGPACK_MEDIA_TYPE),
+}
+
+
+async def negotiate(request: Request, response: Any, timings: Optional[StageTimings] = None) -> Any:
+    """
+    Encode a response model in the format the client asked for
+    
+    Returns the model unchanged for JSON, or a Response holding the
+    binary payload. Encoding runs on the preprocess pool so large
+    payloads do not block the event loop.
+    
+    With timings, JSON is rendered here too so the encode time can be
+    measured; it is reported, with each stage's total, in a Server-Timing
+    header (the body is already complete by then).
+    """
+    encoding = response_encoding(request.headers.get("accept"))
+    if encoding is None and timings is None:
+        return response
+    
+    encode, media_type = ENCODERS[encoding] if encoding else (encode_json, "application/json")
+    started = time.perf_counter()
+    body = await run_in_executor("preprocess", encode, response.model_dump())
+    headers = None
+    if timings is not None:
+        headers = {"Server-Timing": timings.server_timing(encode=time.perf_counter() - started)}
+    return Response(content=body, media_type=media_type, headers=headers)
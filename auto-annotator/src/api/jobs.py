@@ -0,0 +1,139 @@
+"""FastAPI routes for asynchronous annotation jobs"""
+
+import logging
+
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Request
+from pydantic import BaseModel, ValidationError
+from typing import Optional
+
+from . import AnnotationResponse, AudioAnnotationRequest, VideoAnnotationRequest
+from .encoding import negotiate
+from .media import open_media, release_media
+from ..config import JOB_STORAGE_DIR
+from ..jobs import JobStatus, get_job_queue
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Request model and spool suffix per job kind
+JOB_KINDS = {
+    "video": (VideoAnnotationRequest, ".mp4"),
+    "audio": (AudioAnnotationRequest, ".wav"),
+}
+
+# Request fields that are pipeline options (the rest describe the asset)
+PIPELINE_FIELDS = {
+    "video": {"run_hands", "run_objects", "run_actions", "run_scenes",
+              "run_sam3", "run_livecc", "frame_interval", "use_cache", "fps"},
+    "audio": {"run_vad", "run_diarization", "run_asr", "language", "use_cache"},
+}
+
+
+def _windows(request: BaseModel) -> dict:
+    """Time windows of a video request, as a pipeline option"""
+    if isinstance(request, VideoAnnotationRequest):
+        return {"ranges": request.windows()}
+    return {}
+
+
+class JobStatusResponse(BaseModel):
+    """Job state returned by submit and poll"""
+    job_id: str
+    kind: str
+    status: JobStatus
+    progress: float
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+def _status_response(job) -> JobStatusResponse:
+    return JobStatusResponse(
+        job_id=job.id,
+        kind=job.kind,
+        status=job.status,
+        progress=job.progress,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+@router.post("/jobs", response_model=JobStatusResponse, status_code=202)
+async def submit_job(
+    file: Optional[UploadFile] = File(None),
+    kind: str = Form("video"),
+    params: str = Form("{}"),
+):
+    """
+    Queue an annotation job and return immediately
+    
+    `params` is a JSON object with the fields of VideoAnnotationRequest or
+    AudioAnnotationRequest, depending on `kind`. Without an upload, its
+    file_url or media_asset_id names a local file (see media.resolve_local_media),
+    which workers read in place and leave behind.
+    
+    Returns 503 if the job cannot be queued (e.g. Redis is unreachable).
+    """
+    if kind not in JOB_KINDS:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind: {kind}")
+    
+    request_model, suffix = JOB_KINDS[kind]
+    try:
+        request = request_model.model_validate_json(params)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_context=False))
+    
+    media = await open_media(
+        file,
+        request.file_url,
+        request.media_asset_id,
+        suffix=suffix,
+        allow_frame_array=kind == "video",
+        dir=JOB_STORAGE_DIR,
+    )
+    try:
+        job = get_job_queue().submit(
+            kind,
+            media.path,
+            {**request.model_dump(include=PIPELINE_FIELDS[kind]), **_windows(request), "media_hash": media.media_hash},
+            keep_input=media.local,
+        )
+    except Exception as e:
+        # No worker will ever see the input, so it is removed here
+        release_media(media)
+        logger.error(f"Could not queue {kind} job: {e}")
+        raise HTTPException(status_code=503, detail=f"Could not queue job: {e}")
+    return _status_response(job)
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str):
+    """Poll job status and progress"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return _status_response(job)
+
+
+@router.get("/jobs/{job_id}/result", response_model=AnnotationResponse)
+async def get_job_result(request: Request, job_id: str):
+    """Fetch the annotations of a finished job"""
+    job_queue = get_job_queue()
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    if job.status == JobStatus.FAILED:
+        return await negotiate(request, AnnotationResponse(success=False, job_id=job.id, error=job.error))
+    if job.status != JobStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job.status.value}")
+    
+    return await negotiate(request, AnnotationResponse(
+        success=True,
+        job_id=job.id,
+        annotations=job_queue.result(job_id) or [],
+    ))
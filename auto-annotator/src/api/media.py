@@ -0,0 +1,165 @@
+"""
+Media inputs for the video/audio endpoints
+A request either uploads its file, which is spooled to disk, or names a
+file already on a volume the service shares with its clients (file_url or
+media_asset_id), which is annotated in place without being copied
+"""
+
+import hashlib
+import logging
+import os
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, List, Optional
+from urllib.parse import unquote, urlparse
+
+from fastapi import HTTPException, UploadFile
+
+from .uploads import spool_upload
+from ..cache import stat_hash
+from ..config import LOCAL_MEDIA_ASSET_PATH, LOCAL_MEDIA_DIRS
+from ..pipeline.frame_array import FRAME_ARRAY_SUFFIX, is_frame_array
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MediaInput:
+    """A request's media file on disk"""
+    path: str
+    media_hash: str
+    local: bool  # Named by the request (left in place) rather than spooled
+
+
+def _allowed_dirs() -> List[str]:
+    return [os.path.realpath(d.strip()) for d in LOCAL_MEDIA_DIRS]
+
+
+def _is_allowed(path: str, dirs: List[str]) -> bool:
+    return any(os.path.commonpath([path, d]) == d for d in dirs)
+
+
+def resolve_local_media(file_url: Optional[str], media_asset_id: Optional[str]) -> Optional[str]:
+    """
+    Path of the local file a request names, if it names one
+    
+    file_url may be a file:// URL or an absolute path; media_asset_id is
+    looked up as LOCAL_MEDIA_ASSET_PATH in each of LOCAL_MEDIA_DIRS, the
+    first existing file winning. Symlinks are resolved before the path is
+    checked against the allowed directories, so they cannot point out of
+    them.
+    
+    Args:
+        file_url: file:// URL or absolute path
+        media_asset_id: Asset id on the shared volume
+        
+    Returns:
+        Real path of the file, or None if the request names none
+        
+    Raises:
+        HTTPException: 400 for a non-local URL, 403 when local media is
+            disabled or the path is outside LOCAL_MEDIA_DIRS, 404 when no
+            such file exists
+    """
+    if not file_url and not media_asset_id:
+        return None
+    dirs = _allowed_dirs()
+    if not dirs:
+        raise HTTPException(status_code=403, detail="Local media is disabled (set LOCAL_MEDIA_DIRS)")
+    
+    if file_url:
+        url = urlparse(file_url)
+        if url.scheme not in ("", "file") or (url.scheme == "file" and url.netloc not in ("", "localhost")):
+            raise HTTPException(status_code=400, detail=f"Only file:// URLs or local paths are supported: {file_url}")
+        candidates = [unquote(url.path)]
+        if not os.path.isabs(candidates[0]):
+            raise HTTPException(status_code=400, detail=f"Local media path must be absolute: {file_url}")
+    else:
+        relative = LOCAL_MEDIA_ASSET_PATH.format(media_asset_id=media_asset_id)
+        candidates = [os.path.join(d, relative) for d in dirs]
+    
+    for candidate in candidates:
+        path = os.path.realpath(candidate)
+        if not _is_allowed(path, dirs):
+            raise HTTPException(status_code=403, detail=f"Path is outside the allowed media directories: {candidate}")
+        if os.path.isfile(path):
+            return path
+    raise HTTPException(status_code=404, detail=f"Media not found: {file_url or media_asset_id}")
+
+
+async def open_media(
+    file: Optional[UploadFile],
+    file_url: Optional[str] = None,
+    media_asset_id: Optional[str] = None,
+    suffix: str = "",
+    allow_frame_array: bool = False,
+    **kwargs: Any
+) -> MediaInput:
+    """
+    Locate a request's media, spooling it to disk if it was uploaded
+    
+    Local files are hashed from their path, size and modification time
+    rather than their contents, so the result cache does not cost a full
+    read of the file. Where frame arrays are allowed (video), a .npy
+    upload keeps its suffix, so it is read as one; elsewhere .npy media
+    is refused.
+    
+    Args:
+        file: Upload, or None when the request names a local file
+        file_url: file:// URL or absolute path of a local file
+        media_asset_id: Asset id of a local file
+        suffix: Suffix for a spooled upload (e.g. ".mp4")
+        allow_frame_array: Accept .npy frame arrays (video endpoints only)
+        **kwargs: spool_upload options
+        
+    Returns:
+        The media; release with release_media()
+        
+    Raises:
+        HTTPException: 400 unless exactly one of an upload and a local
+            file is given, or for a frame array where none is allowed;
+            see resolve_local_media and spool_upload
+    """
+    local = resolve_local_media(file_url, media_asset_id)
+    if (file is None) == (local is None):
+        raise HTTPException(status_code=400, detail="Send either a file or a file_url/media_asset_id")
+    name = local if local is not None else file.filename
+    frame_array = bool(name) and is_frame_array(name)
+    if frame_array and not allow_frame_array:
+        raise HTTPException(status_code=400, detail="Frame arrays (.npy) are only accepted for video")
+    if local is not None:
+        logger.debug(f"Annotating local file {local}")
+        return MediaInput(local, stat_hash(local), local=True)
+    
+    if frame_array:
+        suffix = FRAME_ARRAY_SUFFIX
+    digest = hashlib.sha256()
+    path = await spool_upload(file, suffix, digest=digest, **kwargs)
+    return MediaInput(path, digest.hexdigest(), local=False)
+
+
+def release_media(media: MediaInput) -> None:
+    """Remove a spooled upload; local files are left alone"""
+    if media.local:
+        return
+    try:
+        os.unlink(media.path)
+    except FileNotFoundError:
+        pass
+
+
+@asynccontextmanager
+async def media_input(
+    file: Optional[UploadFile],
+    file_url: Optional[str] = None,
+    media_asset_id: Optional[str] = None,
+    suffix: str = "",
+    allow_frame_array: bool = False,
+    **kwargs: Any
+) -> AsyncIterator[MediaInput]:
+    """open_media() for the duration of a block"""
+    media = await open_media(file, file_url, media_asset_id, suffix, allow_frame_array, **kwargs)
+    try:
+        yield media
+    finally:
+        release_media(media)
@@ -0,0 +1,206 @@
+"""
+Streaming annotation responses
+Annotations are sent to the client as NDJSON lines or Server-Sent Events
+while the pipeline runs, instead of being collected into one response.
+A bounded queue between the pipeline thread and the response keeps
+server memory flat: a slow client pauses the pipeline rather than
+letting results pile up.
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import logging
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from ..config import STREAM_PROGRESS_INTERVAL_SEC, STREAM_QUEUE_SIZE
+from ..executors import get_executor
+
+logger = logging.getLogger(__name__)
+
+# Accept header value -> stream format
+STREAM_MEDIA_TYPES = {
+    "application/x-ndjson": "ndjson",
+    "text/event-stream": "sse",
+}
+
+
+class _ClientGone(Exception):
+    """Raised in the pipeline thread once the client has disconnected"""
+
+
+class StreamCleanup:
+    """
+    Per-stream cleanup (spooled upload, admission slots) that runs exactly once
+    
+    The pipeline thread runs it when it finishes. If the pipeline never
+    starts, because the client left before the response body was iterated
+    or the stream closed before the executor picked the pipeline up, the
+    response runs it instead and the pipeline is skipped.
+    """
+    
+    def __init__(self, callback: Optional[Callable[[], None]] = None):
+        self._callback = callback
+        self._lock = threading.Lock()
+        self._started = False
+        self._done = False
+    
+    def start(self) -> bool:
+        """Claim the stream for the pipeline; False if it was already cleaned up"""
+        with self._lock:
+            if self._done:
+                return False
+            self._started = True
+            return True
+    
+    def __call__(self) -> None:
+        """Run the cleanup, unless it already ran"""
+        with self._lock:
+            if self._done:
+                return
+            self._done = True
+        if self._callback:
+            self._callback()
+    
+    def abandon(self) -> None:
+        """Run the cleanup unless the pipeline started (it cleans up itself then)"""
+        with self._lock:
+            if self._started:
+                return
+        self()
+
+
+def stream_format(accept: Optional[str]) -> Optional[str]:
+    """Streaming format requested by an Accept header, if any"""
+    if not accept:
+        return None
+    for part in accept.split(","):
+        media_type = part.split(";")[0].strip().lower()
+        if media_type in STREAM_MEDIA_TYPES:
+            return STREAM_MEDIA_TYPES[media_type]
+    return None
+
+
+def media_type_for(fmt: str) -> str:
+    """Response media type for a stream format"""
+    return next(m for m, f in STREAM_MEDIA_TYPES.items() if f == fmt)
+
+
+def format_event(fmt: str, event: str, data: Dict[str, Any]) -> str:
+    """Encode one event as an NDJSON line or an SSE message"""
+    if fmt == "sse":
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({"event": event, "data": data}) + "\n"
+
+
+async def stream_annotations(
+    produce: Callable[[Callable[[int, int], None]], Iterator[Dict[str, Any]]],
+    fmt: str,
+    pool: str = "video_pipeline",
+    cleanup: Optional[Callable[[], None]] = None,
+) -> AsyncIterator[str]:
+    """
+    Run a pipeline on an executor pool and yield its output as events
+    
+    Args:
+        produce: Called with a progress callback; returns the annotation iterator
+        fmt: "ndjson" or "sse"
+        pool: Executor pool the pipeline runs on
+        cleanup: Called once the pipeline has finished, or when the stream
+            closes before it started (see StreamCleanup)
+            
+    Yields:
+        "annotation" events as they are produced, throttled "progress"
+        events, then a final "complete" or "error" event
+    """
+    if not isinstance(cleanup, StreamCleanup):
+        cleanup = StreamCleanup(cleanup)
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+    client_gone = threading.Event()
+    
+    def put(item: Any) -> None:
+        # Block the pipeline thread while the queue is full, but give up
+        # once the client has gone away
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            try:
+                future.result(timeout=0.5)
+                return
+            except concurrent.futures.TimeoutError:
+                if client_gone.is_set():
+                    future.cancel()
+                    raise _ClientGone()
+    
+    last_progress = [0.0]
+    
+    def on_progress(done: int, total: int) -> None:
+        now = time.monotonic()
+        if now - last_progress[0] < STREAM_PROGRESS_INTERVAL_SEC:
+            return
+        last_progress[0] = now
+        put(("progress", {
+            "frames_done": done,
+            "frame_count": total,
+            "progress": min(done / total, 1.0) if total > 0 else None,
+        }))
+    
+    def run() -> None:
+        if not cleanup.start():
+            # The stream closed before the pipeline got going
+            return
+        count = 0
+        try:
+            try:
+                for annotation in produce(on_progress):
+                    put(("annotation", annotation))
+                    count += 1
+                put(("complete", {"success": True, "count": count}))
+            except _ClientGone:
+                raise
+            except Exception as e:
+                logger.error(f"Streaming annotation failed: {e}")
+                put(("error", {"success": False, "error": str(e)}))
+            put(None)
+        except _ClientGone:
+            logger.info(f"Client disconnected after {count} annotations")
+        finally:
+            cleanup()
+    
+    try:
+        loop.run_in_executor(get_executor(pool), run)
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            event, data = item
+            yield format_event(fmt, event, data)
+    finally:
+        # Stops a producer that is still running or blocked on a full queue
+        client_gone.set()
+        cleanup.abandon()
+
+
+def streaming_response(
+    produce: Callable[[Callable[[int, int], None]], Iterator[Dict[str, Any]]],
+    fmt: str,
+    pool: str = "video_pipeline",
+    cleanup: Optional[Callable[[], None]] = None,
+) -> StreamingResponse:
+    """
+    Streaming response running stream_annotations
+    
+    cleanup also runs as the response's background task, so it happens
+    even if the body is never iterated (the client disconnected first).
+    """
+    guard = StreamCleanup(cleanup)
+    return StreamingResponse(
+        stream_annotations(produce, fmt, pool=pool, cleanup=guard),
+        media_type=media_type_for(fmt),
+        background=BackgroundTask(guard.abandon),
+    )
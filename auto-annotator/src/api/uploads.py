@@ -0,0 +1,144 @@
+"""
+Upload spooling for media endpoints
+Streams multipart uploads to disk in fixed-size chunks so peak memory per
+request stays bounded regardless of file size. Requests whose declared
+Content-Length is already over the limit are refused before their body is
+read at all.
+"""
+
+import logging
+import os
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Iterable, Optional
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+from ..config import MAX_UPLOAD_BYTES, UPLOAD_CHUNK_BYTES, UPLOAD_DIR
+from ..timings import current_timings
+
+logger = logging.getLogger(__name__)
+
+# Room for multipart boundaries, part headers and form fields on top of
+# the file itself when comparing Content-Length with the limit
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+async def spool_upload(
+    file: UploadFile,
+    suffix: str = "",
+    max_bytes: Optional[int] = MAX_UPLOAD_BYTES,
+    chunk_size: int = UPLOAD_CHUNK_BYTES,
+    dir: Optional[str] = UPLOAD_DIR,
+    digest: Optional[Any] = None,
+) -> str:
+    """
+    Copy an upload to a temporary file one chunk at a time
+    
+    Args:
+        file: Incoming multipart upload
+        suffix: Suffix for the temporary file (e.g. ".mp4")
+        max_bytes: Reject uploads larger than this (None or 0 disables the limit)
+        chunk_size: Bytes read per iteration
+        dir: Directory for the spooled file (None for the system temp dir)
+        digest: hashlib object updated with every chunk, so the content
+            hash comes for free with the copy
+            
+    Returns:
+        Path to the spooled file; the caller is responsible for removing it
+        
+    Raises:
+        HTTPException: 413 if the upload exceeds max_bytes
+    """
+    if max_bytes and file.size is not None and file.size > max_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Upload exceeds maximum size of {max_bytes} bytes",
+        )
+    
+    if dir:
+        os.makedirs(dir, exist_ok=True)
+    started = time.perf_counter()
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=dir)
+    written = 0
+    try:
+        with tmp:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if max_bytes and written > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Upload exceeds maximum size of {max_bytes} bytes",
+                    )
+                tmp.write(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
+    
+    timings = current_timings()
+    if timings is not None:
+        timings.add("upload", time.perf_counter() - started, written)
+    
+    logger.debug(f"Spooled {written} bytes from {file.filename} to {tmp.name}")
+    return tmp.name
+
+
+@asynccontextmanager
+async def spooled_upload(
+    file: UploadFile,
+    suffix: str = "",
+    **kwargs
+) -> AsyncIterator[str]:
+    """Spool an upload to disk and remove the file when the block exits"""
+    path = await spool_upload(file, suffix, **kwargs)
+    try:
+        yield path
+    finally:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+class UploadLimitMiddleware:
+    """
+    ASGI middleware refusing oversized uploads from their Content-Length
+    
+    The multipart body is parsed (and spooled by Starlette) before an
+    endpoint runs, so spool_upload's own check comes after the whole
+    upload has been received. Here a declared length over max_bytes gets
+    413 before anything is read. Chunked uploads without a length are
+    still limited by spool_upload.
+    """
+    
+    def __init__(self, app, paths: Iterable[str], max_bytes: Optional[int] = MAX_UPLOAD_BYTES):
+        """
+        Args:
+            app: Wrapped ASGI app
+            paths: Request paths of the upload endpoints
+            max_bytes: Largest upload accepted (None or 0 disables the check)
+        """
+        self.app = app
+        self.paths = frozenset(paths)
+        self.max_bytes = max_bytes
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and self.max_bytes and scope["path"] in self.paths:
+            length = dict(scope["headers"]).get(b"content-length")
+            if length is not None and length.isdigit() and int(length) > self.max_bytes + MULTIPART_OVERHEAD_BYTES:
+                logger.warning(f"Rejected {int(length)}-byte upload to {scope['path']} before reading it")
+                response = JSONResponse(
+                    {"detail": f"Upload exceeds maximum size of {self.max_bytes} bytes"},
+                    status_code=413,
+                    headers={"Connection": "close"},
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
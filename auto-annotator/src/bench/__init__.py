@@ -0,0 +1,20 @@
+"""
+Benchmarking and load-testing tools
+Synthetic media, deterministic stub model backends, the offline
+benchmark suite (python -m src.bench.run) and the API load generator
+(python -m src.bench.load)
+"""
+
+from .media import SyntheticAudio, SyntheticVideo, synthetic_audio, synthetic_video
+from .stubs import install_stub_backend, load_annotator, stub_annotator, stub_factories
+
+__all__ = [
+    "SyntheticAudio",
+    "SyntheticVideo",
+    "synthetic_audio",
+    "synthetic_video",
+    "install_stub_backend",
+    "load_annotator",
+    "stub_annotator",
+    "stub_factories",
+]
@@ -0,0 +1,497 @@
+"""
+Load generator for the annotation API
+Replays a weighted mix of /api/annotate/video, /audio, /hands and /objects
+requests at fixed target rates and reports throughput, latency
+percentiles, error rate and memory growth per rate. The app runs
+in-process with stub models by default; with --url it targets a running
+server instead, e.g. one started with the stub models by the serve command.
+
+Run with:
+    python -m src.bench.load run --rate 5,10,20 --duration 30
+    python -m src.bench.load serve --port 8001 --workers 4 --latency-ms 20
+    python -m src.bench.load run --url http://127.0.0.1:8001 --rate 5,10,20
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+from .media import render_frame, synthetic_audio, synthetic_video
+from .run import environment
+from .stubs import stub_factories
+
+logger = logging.getLogger(__name__)
+
+# Mix name -> (route, payload kind)
+ENDPOINTS = {
+    "video": ("/api/annotate/video", "video"),
+    "audio": ("/api/annotate/audio", "audio"),
+    "hands": ("/api/annotate/hands", "image"),
+    "objects": ("/api/annotate/objects", "image"),
+}
+DEFAULT_MIX = "hands=4,objects=4,video=1,audio=1"
+MEMORY_SAMPLE_SEC = 0.5
+
+
+@dataclass
+class Payloads:
+    """Upload bodies shared by every request of a kind"""
+    video: bytes
+    audio: bytes
+    image: bytes
+    video_form: Dict[str, str] = field(default_factory=dict)
+    audio_form: Dict[str, str] = field(default_factory=dict)
+    
+    def files(self, kind: str) -> Dict[str, Tuple[str, bytes, str]]:
+        if kind == "video":
+            return {"file": ("load.mp4", self.video, "video/mp4")}
+        if kind == "audio":
+            return {"file": ("load.wav", self.audio, "audio/wav")}
+        return {"file": ("load.jpg", self.image, "image/jpeg")}
+    
+    def form(self, kind: str) -> Dict[str, str]:
+        return {"video": self.video_form, "audio": self.audio_form}.get(kind, {})
+
+
+@dataclass
+class Sample:
+    """Outcome of one request"""
+    endpoint: str
+    latency: float  # Seconds from the scheduled send time to the full response
+    status: str  # HTTP status code, "timeout" or "error"
+    ok: bool
+
+
+def make_payloads(
+    workdir: str,
+    video_seconds: float = 2.0,
+    audio_seconds: float = 2.0,
+    width: int = 320,
+    height: int = 240,
+    video_options: Optional[Dict[str, str]] = None,
+    use_cache: bool = False,
+) -> Payloads:
+    """
+    Generate the synthetic uploads
+    
+    Args:
+        workdir: Directory for the intermediate files
+        video_seconds: Duration of the uploaded video
+        audio_seconds: Duration of the uploaded audio
+        width: Video and image width
+        height: Video and image height
+        video_options: Extra /annotate/video form fields (run_actions, frame_interval, ...)
+        use_cache: Let the server reuse cached results (every request uploads the same media)
+    """
+    import cv2
+    
+    video = synthetic_video(os.path.join(workdir, "load.mp4"), video_seconds, 15.0, width, height, cut_every_sec=1.0)
+    audio = synthetic_audio(os.path.join(workdir, "load.wav"), audio_seconds)
+    ok, image = cv2.imencode(".jpg", render_frame(7, width, height, []))
+    if not ok:
+        raise RuntimeError("Could not encode the synthetic image")
+    
+    with open(video.path, "rb") as f:
+        video_bytes = f.read()
+    with open(audio.path, "rb") as f:
+        audio_bytes = f.read()
+    
+    cache = {"use_cache": str(use_cache).lower()}
+    return Payloads(
+        video=video_bytes,
+        audio=audio_bytes,
+        image=image.tobytes(),
+        video_form={**cache, **(video_options or {})},
+        audio_form=cache,
+    )
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse "hands=4,video=1" into endpoint weights"""
+    weights = {}
+    for part in mix.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {name!r} (expected one of {', '.join(ENDPOINTS)})")
+        weights[name] = float(weight) if weight else 1.0
+    if not weights or sum(weights.values()) <= 0:
+        raise ValueError("Request mix is empty")
+    return weights
+
+
+def _options(text: str) -> Dict[str, str]:
+    """Parse "run_actions=false,frame_interval=15" into form fields"""
+    return dict(part.strip().split("=", 1) for part in text.split(",") if part.strip())
+
+
+def latency_stats(seconds: List[float]) -> Dict[str, Any]:
+    """Latency percentiles in milliseconds"""
+    if not seconds:
+        return {"count": 0}
+    ms = np.asarray(seconds) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99]).tolist()
+    return {
+        "count": len(ms),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "max_ms": float(ms.max()),
+    }
+
+
+def _outcome_stats(samples: List[Sample], elapsed: float) -> Dict[str, Any]:
+    statuses: Dict[str, int] = {}
+    for sample in samples:
+        statuses[sample.status] = statuses.get(sample.status, 0) + 1
+    errors = sum(1 for s in samples if not s.ok)
+    return {
+        "completed": len(samples),
+        "throughput_rps": len(samples) / elapsed if elapsed else None,
+        "ok_rps": (len(samples) - errors) / elapsed if elapsed else None,
+        "error_rate": errors / len(samples) if samples else None,
+        "status_codes": statuses,
+        "latency": latency_stats([s.latency for s in samples]),
+    }
+
+
+class Target:
+    """Where requests go: the app in-process over ASGI, or a server over HTTP"""
+    
+    def __init__(self, url: Optional[str] = None, timeout: float = 120.0):
+        self.url = url
+        self.timeout = timeout
+        self.client = None
+        self._lifespan = None
+    
+    @property
+    def mode(self) -> str:
+        return "http" if self.url else "in_process"
+    
+    async def __aenter__(self) -> "Target":
+        import httpx
+        
+        if self.url:
+            self.client = httpx.AsyncClient(base_url=self.url, timeout=self.timeout)
+        else:
+            from ..main import app
+            
+            self._lifespan = app.router.lifespan_context(app)
+            await self._lifespan.__aenter__()
+            self.client = httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://load", timeout=self.timeout
+            )
+        return self
+    
+    async def __aexit__(self, *exc) -> None:
+        await self.client.aclose()
+        if self._lifespan is not None:
+            await self._lifespan.__aexit__(*exc)
+    
+    async def resident_bytes(self) -> Optional[int]:
+        """RSS of the serving process (for --url, whichever worker answers /metrics)"""
+        if not self.url:
+            from ..model_manager import _resident_bytes
+            
+            return _resident_bytes() or None
+        try:
+            response = await self.client.get("/metrics")
+        except Exception:
+            return None
+        for line in response.text.splitlines():
+            if line.startswith("process_resident_memory_bytes "):
+                return int(float(line.split()[1]))
+        return None
+
+
+async def send(target: Target, payloads: Payloads, endpoint: str, scheduled: float) -> Sample:
+    """POST one request; latency counts from the scheduled time so client-side queueing is included"""
+    import httpx
+    
+    route, kind = ENDPOINTS[endpoint]
+    try:
+        response = await target.client.post(route, files=payloads.files(kind), data=payloads.form(kind))
+        ok = response.status_code < 400
+        if ok and response.headers.get("content-type", "").startswith("application/json"):
+            ok = bool(response.json().get("success"))
+        status = str(response.status_code)
+    except httpx.TimeoutException:
+        ok, status = False, "timeout"
+    except Exception as e:
+        logger.debug(f"{endpoint} request failed: {e}")
+        ok, status = False, "error"
+    return Sample(endpoint, time.perf_counter() - scheduled, status, ok)
+
+
+async def _sample_resources(target: Target, stop: asyncio.Event, memory: List[int], pools: Dict[str, Dict[str, int]]) -> None:
+    """Record RSS (and in-process pool queue depth) until stop is set"""
+    from ..executors import pool_stats
+    
+    while True:
+        rss = await target.resident_bytes()
+        if rss:
+            memory.append(rss)
+        if target.mode == "in_process":
+            for name, stats in pool_stats().items():
+                entry = pools.setdefault(name, {"workers": stats["workers"], "peak_queued": 0})
+                entry["peak_queued"] = max(entry["peak_queued"], stats["queued"])
+        try:
+            await asyncio.wait_for(stop.wait(), MEMORY_SAMPLE_SEC)
+            return
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_stage(
+    target: Target,
+    payloads: Payloads,
+    weights: Dict[str, float],
+    rate: float,
+    duration: float,
+    max_in_flight: int = 256,
+    poisson: bool = False,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Offer requests at a fixed rate for a fixed time (open loop)
+    
+    Arrivals do not wait for earlier responses, so a saturated server shows
+    up as growing latency and errors rather than as a lower offered rate.
+    Beyond max_in_flight, requests wait client-side and that wait counts
+    towards their latency.
+    
+    Args:
+        target: Where to send requests
+        payloads: Upload bodies
+        weights: Relative frequency of each endpoint
+        rate: Requests per second offered
+        duration: Seconds to keep offering requests
+        max_in_flight: Cap on concurrent connections
+        poisson: Exponential inter-arrival times instead of a fixed interval
+        seed: Seed for the endpoint choice and arrival times
+    """
+    rng = random.Random(seed)
+    names, shares = list(weights), list(weights.values())
+    slots = asyncio.Semaphore(max_in_flight)
+    
+    async def one(endpoint: str, scheduled: float) -> Sample:
+        async with slots:
+            return await send(target, payloads, endpoint, scheduled)
+    
+    memory: List[int] = []
+    pools: Dict[str, Dict[str, int]] = {}
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(_sample_resources(target, stop, memory, pools))
+    
+    tasks: List[asyncio.Task] = []
+    started = time.perf_counter()
+    next_at = started
+    while next_at < started + duration:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        endpoint = rng.choices(names, shares)[0]
+        tasks.append(asyncio.create_task(one(endpoint, next_at)))
+        next_at += rng.expovariate(rate) if poisson else 1 / rate
+    
+    samples: List[Sample] = await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await sampler
+    
+    result = {"offered_rps": rate, "sent": len(tasks), "elapsed_sec": elapsed}
+    result.update(_outcome_stats(samples, elapsed))
+    result["endpoints"] = {
+        name: _outcome_stats([s for s in samples if s.endpoint == name], elapsed)
+        for name in names
+    }
+    result["memory"] = {
+        "start_bytes": memory[0] if memory else None,
+        "end_bytes": memory[-1] if memory else None,
+        "peak_bytes": max(memory) if memory else None,
+        "growth_bytes": memory[-1] - memory[0] if memory else None,
+    }
+    if pools:
+        result["pools"] = pools
+    return result
+
+
+async def warm_up(target: Target, payloads: Payloads, weights: Dict[str, float]) -> None:
+    """One request per endpoint so model loads are not part of the first stage"""
+    for endpoint in weights:
+        sample = await send(target, payloads, endpoint, time.perf_counter())
+        if not sample.ok:
+            logger.warning(f"Warm-up {endpoint} request failed ({sample.status})")
+
+
+def install_stubs(latency_ms: float = 0.0) -> None:
+    """Swap every model in the service's ModelManager for a stub backend"""
+    from ..main import model_manager
+    
+    model_manager.unload_all()
+    model_manager.factories = stub_factories(latency_ms)
+
+
+def stub_app():
+    """The service app with stub models (latency from LOAD_STUB_LATENCY_MS), for uvicorn --factory"""
+    from ..main import app
+    
+    install_stubs(float(os.getenv("LOAD_STUB_LATENCY_MS", "0")))
+    return app
+
+
+async def run_load(
+    rates: List[float],
+    duration: float,
+    mix: str = DEFAULT_MIX,
+    url: Optional[str] = None,
+    latency_ms: float = 0.0,
+    max_in_flight: int = 256,
+    poisson: bool = False,
+    timeout: float = 120.0,
+    payload_options: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Run one stage per rate and return the results document
+    
+    Args:
+        rates: Offered request rates, run in order
+        duration: Seconds per stage
+        mix: Endpoint weights, e.g. "hands=4,objects=4,video=1,audio=1"
+        url: Base URL of a running server (None runs the app in-process with stubs)
+        latency_ms: Simulated model time per stub call (in-process only)
+        max_in_flight: Cap on concurrent requests
+        poisson: Exponential inter-arrival times
+        timeout: Per-request timeout in seconds
+        payload_options: Keyword arguments for make_payloads
+    """
+    weights = parse_mix(mix)
+    if not url:
+        install_stubs(latency_ms)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        payloads = make_payloads(tmp, **(payload_options or {}))
+    
+    stages = []
+    async with Target(url, timeout) as target:
+        await warm_up(target, payloads, weights)
+        for index, rate in enumerate(rates):
+            logger.info(f"Offering {rate:g} req/s for {duration:g}s")
+            stage = await run_stage(target, payloads, weights, rate, duration, max_in_flight, poisson, seed=index)
+            stages.append(stage)
+            latency = stage["latency"]
+            print(
+                f"{rate:g} req/s: {stage['throughput_rps']:.1f} done/s, "
+                f"p50 {latency.get('p50_ms', 0):.0f} ms, p95 {latency.get('p95_ms', 0):.0f} ms, "
+                f"p99 {latency.get('p99_ms', 0):.0f} ms, errors {stage['error_rate'] or 0:.1%}",
+                file=sys.stderr,
+            )
+    
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": environment(),
+        "config": {
+            "mode": target.mode,
+            "url": url,
+            "mix": weights,
+            "duration_sec": duration,
+            "stub_latency_ms": None if url else latency_ms,
+            "max_in_flight": max_in_flight,
+            "arrivals": "poisson" if poisson else "uniform",
+            "payload_bytes": {"video": len(payloads.video), "audio": len(payloads.audio), "image": len(payloads.image)},
+            "video_form": payloads.video_form,
+        },
+        "stages": stages,
+    }
+
+
+def serve(host: str, port: int, workers: int, latency_ms: float) -> None:
+    """Run uvicorn with the stub-model app"""
+    import uvicorn
+    
+    os.environ["LOAD_STUB_LATENCY_MS"] = str(latency_ms)
+    uvicorn.run("src.bench.load:stub_app", factory=True, host=host, port=port, workers=workers)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Load-test the annotation API")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    run = commands.add_parser("run", help="Offer a request mix at one or more rates")
+    run.add_argument("--url", help="Base URL of a running server (default: the app in-process with stub models)")
+    run.add_argument("--rate", default="5", help="Comma-separated offered rates in req/s, one stage each")
+    run.add_argument("--duration", type=float, default=30.0, help="Seconds per stage")
+    run.add_argument("--mix", default=DEFAULT_MIX, help="Endpoint weights (video, audio, hands, objects)")
+    run.add_argument("--latency-ms", type=float, default=0.0, help="Simulated model time per stub call (in-process)")
+    run.add_argument("--max-in-flight", type=int, default=256)
+    run.add_argument("--poisson", action="store_true", help="Exponential inter-arrival times")
+    run.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    run.add_argument("--video-seconds", type=float, default=2.0)
+    run.add_argument("--audio-seconds", type=float, default=2.0)
+    run.add_argument("--width", type=int, default=320)
+    run.add_argument("--height", type=int, default=240)
+    run.add_argument("--video-options", default="", help="Extra video form fields, e.g. run_actions=false,frame_interval=15")
+    run.add_argument("--use-cache", action="store_true", help="Allow result cache hits (off: every request recomputes)")
+    run.add_argument("--output", help="Write the results JSON here (default: stdout)")
+    
+    srv = commands.add_parser("serve", help="Run the API with stub models under uvicorn")
+    srv.add_argument("--host", default="127.0.0.1")
+    srv.add_argument("--port", type=int, default=8001)
+    srv.add_argument("--workers", type=int, default=1)
+    srv.add_argument("--latency-ms", type=float, default=0.0, help="Simulated model time per stub call")
+    args = parser.parse_args()
+    
+    if args.command == "serve":
+        serve(args.host, args.port, args.workers, args.latency_ms)
+        return
+    
+    try:
+        rates = [float(r) for r in args.rate.split(",") if r.strip()]
+        parse_mix(args.mix)
+        video_options = _options(args.video_options)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    document = asyncio.run(run_load(
+        rates,
+        args.duration,
+        mix=args.mix,
+        url=args.url,
+        latency_ms=args.latency_ms,
+        max_in_flight=args.max_in_flight,
+        poisson=args.poisson,
+        timeout=args.timeout,
+        payload_options=dict(
+            video_seconds=args.video_seconds,
+            audio_seconds=args.audio_seconds,
+            width=args.width,
+            height=args.height,
+            video_options=video_options,
+            use_cache=args.use_cache,
+        ),
+    ))
+    
+    text = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+        logger.info(f"Wrote {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Synthetic benchmark media
+Deterministic videos (coloured blocks moving over a background that changes
+colour at scripted cuts) and audio (tone bursts separated by silence), so
+benchmark runs need no fixtures or network access
+"""
+
+import math
+import wave
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Tuple
+import numpy as np
+
+# Background colours (BGR) cycled at each scripted cut
+BACKGROUNDS = [(40, 40, 40), (200, 180, 160), (30, 90, 160), (150, 60, 60), (70, 150, 70)]
+BLOCK_COLOURS = [(0, 0, 255), (0, 255, 255), (255, 0, 0), (0, 200, 0), (255, 255, 255), (255, 0, 255)]
+
+
+@dataclass
+class SyntheticVideo:
+    """Description of a generated video"""
+    path: str
+    fps: float
+    frame_count: int
+    width: int
+    height: int
+    cut_frames: List[int] = field(default_factory=list)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class SyntheticAudio:
+    """Description of a generated audio file"""
+    path: str
+    sample_rate: int
+    seconds: float
+    bursts: List[Tuple[float, float]] = field(default_factory=list)  # (start_sec, end_sec)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def render_frame(
+    frame_id: int,
+    width: int,
+    height: int,
+    cut_frames: List[int],
+    blocks: int = 4,
+) -> np.ndarray:
+    """
+    One BGR frame of the synthetic video
+    
+    Blocks move on fixed Lissajous paths, so any frame can be rendered
+    on its own and the content is identical from run to run.
+    """
+    scene = sum(1 for cut in cut_frames if cut <= frame_id)
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    frame[:] = BACKGROUNDS[scene % len(BACKGROUNDS)]
+    
+    size = max(8, min(width, height) // 6)
+    for b in range(blocks):
+        phase = frame_id / 30.0 * (0.7 + 0.3 * b) + b
+        x = int((math.sin(phase) * 0.5 + 0.5) * (width - size))
+        y = int((math.cos(phase * 1.3 + b) * 0.5 + 0.5) * (height - size))
+        frame[y:y + size, x:x + size] = BLOCK_COLOURS[b % len(BLOCK_COLOURS)]
+    return frame
+
+
+def synthetic_video(
+    path: str,
+    seconds: float = 10.0,
+    fps: float = 30.0,
+    width: int = 640,
+    height: int = 360,
+    cut_every_sec: float = 3.0,
+    blocks: int = 4,
+) -> SyntheticVideo:
+    """
+    Write a synthetic MP4 (mp4v) video
+    
+    Args:
+        path: Output path
+        seconds: Duration
+        fps: Frame rate
+        width: Frame width
+        height: Frame height
+        cut_every_sec: Interval between scripted hard cuts (0 for none)
+        blocks: Number of moving blocks
+        
+    Returns:
+        Description of the video, including the cut frames
+    """
+    import cv2
+    
+    frame_count = int(round(seconds * fps))
+    step = int(round(cut_every_sec * fps)) if cut_every_sec > 0 else 0
+    cut_frames = list(range(step, frame_count, step)) if step else []
+    
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"Could not open video writer for {path}")
+    try:
+        for frame_id in range(frame_count):
+            writer.write(render_frame(frame_id, width, height, cut_frames, blocks))
+    finally:
+        writer.release()
+    
+    return SyntheticVideo(path, fps, frame_count, width, height, cut_frames)
+
+
+def synthetic_audio(
+    path: str,
+    seconds: float = 10.0,
+    sample_rate: int = 16000,
+    burst_sec: float = 0.8,
+    gap_sec: float = 0.4,
+    frequencies: Tuple[float, ...] = (220.0, 440.0, 660.0),
+) -> SyntheticAudio:
+    """
+    Write a 16-bit mono WAV of tone bursts separated by silence
+    
+    Args:
+        path: Output path
+        seconds: Duration
+        sample_rate: Sample rate in Hz
+        burst_sec: Length of each tone burst
+        gap_sec: Silence between bursts
+        frequencies: Tone frequencies, cycled burst by burst
+        
+    Returns:
+        Description of the audio, including the burst intervals
+    """
+    samples = np.zeros(int(seconds * sample_rate), dtype=np.float32)
+    bursts = []
+    start, index = gap_sec, 0
+    while start + burst_sec <= seconds:
+        begin, end = int(start * sample_rate), int((start + burst_sec) * sample_rate)
+        t = np.arange(end - begin, dtype=np.float32) / sample_rate
+        samples[begin:end] = 0.5 * np.sin(2 * np.pi * frequencies[index % len(frequencies)] * t)
+        bursts.append((start, start + burst_sec))
+        start += burst_sec + gap_sec
+        index += 1
+    
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes((samples * 32767).astype("<i2").tobytes())
+    
+    return SyntheticAudio(path, sample_rate, seconds, bursts)
+
+
+def read_frames(path: str, limit: int) -> List[np.ndarray]:
+    """Decode up to limit RGB frames from the start of a video"""
+    import cv2
+    
+    cap = cv2.VideoCapture(path)
+    frames = []
+    try:
+        while len(frames) < limit:
+            ok, bgr = cap.read()
+            if not ok:
+                break
+            frames.append(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB))
+    finally:
+        cap.release()
+    return frames
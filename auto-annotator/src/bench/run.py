@@ -0,0 +1,511 @@
+"""
+Offline benchmark suite
+Times every annotator's annotate/annotate_batch, the decode-once frame loop
+(with and without read-ahead decoding, optionally also chunked over worker
+processes) and response serialisation
+on synthetic media, and writes the results as
+JSON so runs can be compared. Real models are used when they load offline;
+otherwise deterministic stub backends stand in (see stubs.py). Needs no GPU
+and no network.
+
+Run with:
+    python -m src.bench.run --output bench.json
+    python -m src.bench.run --backend stub --compare bench.json
+    python -m src.bench.run --seconds 300 --chunk-workers 8
+"""
+
+import argparse
+import functools
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+from .media import SyntheticAudio, SyntheticVideo, read_frames, synthetic_audio, synthetic_video
+from .stubs import backend_factories, load_annotator
+from ..annotators.base import AnnotationResult
+from ..config import VIDEO_PREFETCH_FRAMES
+
+logger = logging.getLogger(__name__)
+
+FRAME_ANNOTATORS = ("hand_pose", "object", "sam3")
+VIDEO_ANNOTATORS = ("scene", "livecc")
+AUDIO_ANNOTATORS = ("speech", "transcript")
+ALL_ANNOTATORS = ("hand_pose", "object", "sam3", "action", "scene", "livecc", "speech", "transcript")
+
+# build_video_sinks toggle for each annotator
+VIDEO_TOGGLES = {
+    "hand_pose": "run_hands",
+    "object": "run_objects",
+    "sam3": "run_sam3",
+    "action": "run_actions",
+    "scene": "run_scenes",
+    "livecc": "run_livecc",
+}
+
+
+def summarize(seconds: List[float], items_per_call: float = 1.0) -> Dict[str, Any]:
+    """Latency statistics for a list of call durations"""
+    ms = np.asarray(seconds) * 1000
+    total = float(ms.sum())
+    p50, p95 = np.percentile(ms, [50, 95]).tolist()
+    return {
+        "calls": len(ms),
+        "items_per_call": items_per_call,
+        "total_ms": total,
+        "mean_ms": float(ms.mean()),
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "min_ms": float(ms.min()),
+        "items_per_sec": len(ms) * items_per_call / (total / 1000) if total else None,
+    }
+
+
+def time_calls(call: Callable[[int], Any], iterations: int, warmup: int = 1) -> Tuple[List[float], Any]:
+    """Run call(i) warmup + iterations times; returns the timed durations and the last result"""
+    result = None
+    for i in range(warmup):
+        result = call(i)
+    durations = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        result = call(i)
+        durations.append(time.perf_counter() - started)
+    return durations, result
+
+
+def _count(results: Any) -> int:
+    """Annotations in an annotate() result, or in an annotate_batch() list of them"""
+    if isinstance(results, list) and results and not isinstance(results[0], AnnotationResult):
+        return sum(len(r) for r in results)
+    return len(results)
+
+
+def bench_annotator(
+    name: str,
+    annotator: Any,
+    frames: List[np.ndarray],
+    video: SyntheticVideo,
+    audio: SyntheticAudio,
+    iterations: int,
+    batch_size: int,
+) -> Dict[str, Any]:
+    """
+    Time annotate and annotate_batch for one annotator on its natural input
+    
+    Items are frames for video annotators and seconds of audio for audio
+    annotators, so items_per_sec is a frame rate or a real-time factor.
+    """
+    fps = video.fps
+    if name in FRAME_ANNOTATORS:
+        unit = "frames"
+        single = lambda i: annotator.annotate(frames[i % len(frames)], i, i * 1000 / fps)
+        batch = lambda i: annotator.annotate_batch(frames[:batch_size])
+        single_items, batch_items = 1, min(batch_size, len(frames))
+        batch_iterations = max(1, iterations // batch_size)
+    elif name == "action":
+        unit = "frames"
+        window = np.stack(frames[:annotator.window_size])
+        clip = np.stack(frames)
+        single = lambda i: annotator.annotate(window, 0.0, fps)
+        batch = lambda i: annotator.annotate_batch(clip, fps)
+        single_items, batch_items = len(window), len(clip)
+        batch_iterations = max(1, iterations // 4)
+    elif name in VIDEO_ANNOTATORS:
+        unit = "frames"
+        single = lambda i: annotator.annotate(video.path, fps)
+        batch = lambda i: annotator.annotate_batch([video.path, video.path], fps=fps)
+        single_items, batch_items = video.frame_count, 2 * video.frame_count
+        iterations = batch_iterations = max(1, iterations // 10)
+    elif name in AUDIO_ANNOTATORS:
+        unit = "audio_seconds"
+        single = lambda i: annotator.annotate(audio.path)
+        batch = lambda i: annotator.annotate_batch([audio.path, audio.path])
+        single_items, batch_items = audio.seconds, 2 * audio.seconds
+        iterations = batch_iterations = max(1, iterations // 10)
+    else:
+        raise KeyError(name)
+    
+    durations, result = time_calls(single, iterations)
+    batch_durations, batch_result = time_calls(batch, batch_iterations)
+    return {
+        "unit": unit,
+        "annotate": {**summarize(durations, single_items), "annotations": _count(result)},
+        "annotate_batch": {**summarize(batch_durations, batch_items), "annotations": _count(batch_result)},
+    }
+
+
+def bench_decode(video: SyntheticVideo) -> Dict[str, Any]:
+    """Plain sequential decode + BGR->RGB, the floor for the frame loop"""
+    import cv2
+    
+    cap = cv2.VideoCapture(video.path)
+    frames = 0
+    started = time.perf_counter()
+    try:
+        while True:
+            ok, bgr = cap.read()
+            if not ok:
+                break
+            cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+            frames += 1
+    finally:
+        cap.release()
+    elapsed = time.perf_counter() - started
+    return {"frames": frames, "wall_ms": elapsed * 1000, "frames_per_sec": frames / elapsed if elapsed else None}
+
+
+def bench_frame_loop(
+    video: SyntheticVideo,
+    annotators: Dict[str, Any],
+    frame_interval: int,
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Run the full video pipeline (one decode pass, every video sink)
+    
+    Returns:
+        (results with a per-stage breakdown, the annotations produced)
+    """
+    from ..pipeline import annotate_video_file
+    from ..timings import collect_timings
+    
+    options = {toggle: name in annotators for name, toggle in VIDEO_TOGGLES.items()}
+    with collect_timings() as timings:
+        started = time.perf_counter()
+        annotations = annotate_video_file(
+            video.path,
+            annotators.__getitem__,
+            frame_interval=frame_interval,
+            use_cache=False,
+            **options,
+        )
+        elapsed = time.perf_counter() - started
+    
+    return {
+        "sinks": [name for name in VIDEO_TOGGLES if name in annotators],
+        "frame_interval": frame_interval,
+        "frames": video.frame_count,
+        "annotations": len(annotations),
+        "wall_ms": elapsed * 1000,
+        "frames_per_sec": video.frame_count / elapsed if elapsed else None,
+        "stages": timings.summary()["stages"],
+    }, annotations
+
+
+def _by_type(annotations: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for annotation in annotations:
+        grouped.setdefault(annotation["type"], []).append(annotation)
+    return grouped
+
+
+def bench_inline_decode(
+    video: SyntheticVideo,
+    annotators: Dict[str, Any],
+    frame_interval: int,
+    frame_loop: Dict[str, Any],
+    frame_loop_annotations: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    Run the frame loop with decoding inline instead of read ahead
+    
+    Returns:
+        Timings, how much faster the read-ahead frame loop was and whether
+        the annotations match it
+    """
+    from ..pipeline import FrameBus, build_video_sinks
+    
+    options = {toggle: name in annotators for name, toggle in VIDEO_TOGGLES.items()}
+    sinks = build_video_sinks(annotators.__getitem__, frame_interval=frame_interval, **options)
+    started = time.perf_counter()
+    annotations = FrameBus(video.path, sinks, prefetch=0).collect()
+    elapsed = time.perf_counter() - started
+    
+    return {
+        "annotations": len(annotations),
+        "wall_ms": elapsed * 1000,
+        "frames_per_sec": video.frame_count / elapsed if elapsed else None,
+        "prefetch_speedup": (elapsed * 1000) / frame_loop["wall_ms"] if frame_loop["wall_ms"] else None,
+        "matches_prefetch": _by_type(annotations) == _by_type(frame_loop_annotations),
+    }
+
+
+def bench_chunked(
+    video: SyntheticVideo,
+    annotators: Dict[str, Any],
+    frame_interval: int,
+    workers: int,
+    serial: Dict[str, Any],
+    serial_annotations: List[Dict[str, Any]],
+    backend: str,
+    latency_ms: float,
+) -> Dict[str, Any]:
+    """
+    Run the frame loop over keyframe-aligned chunks in worker processes
+    
+    One untimed pass starts the workers and loads their models first.
+    
+    Returns:
+        Timings, the speedup over the serial frame loop and whether the
+        annotations match it
+    """
+    from ..pipeline import build_video_sinks, iter_chunked_annotations, plan_chunks
+    
+    options = {toggle: name in annotators for name, toggle in VIDEO_TOGGLES.items()}
+    options.update(frame_interval=frame_interval)
+    sinks = build_video_sinks(annotators.__getitem__, **options)
+    plan = plan_chunks(video.path, workers, min_chunk_sec=0)
+    factories = functools.partial(backend_factories, backend, latency_ms)
+    
+    run = lambda: list(iter_chunked_annotations(video.path, sinks, plan, workers, factories=factories, **options))
+    run()
+    started = time.perf_counter()
+    annotations = run()
+    elapsed = time.perf_counter() - started
+    
+    mismatched = [
+        name for name in set(_by_type(serial_annotations)) | set(_by_type(annotations))
+        if _by_type(serial_annotations).get(name) != _by_type(annotations).get(name)
+    ]
+    return {
+        "workers": workers,
+        "chunks": plan.chunks,
+        "annotations": len(annotations),
+        "wall_ms": elapsed * 1000,
+        "frames_per_sec": video.frame_count / elapsed if elapsed else None,
+        "speedup": serial["wall_ms"] / (elapsed * 1000) if elapsed else None,
+        "matches_serial": not mismatched,
+        "mismatched_types": sorted(mismatched),
+    }
+
+
+def bench_serialisation(annotations: List[Dict[str, Any]], iterations: int) -> Dict[str, Any]:
+    """Encode an annotation response in every available format"""
+    from ..api import AnnotationResponse
+    from ..api.encoding import encode_arrow, encode_json, encode_msgpack
+    
+    payload = AnnotationResponse(success=True, annotations=annotations).model_dump()
+    results: Dict[str, Any] = {"annotations": len(annotations)}
+    for fmt, encode in (("json", encode_json), ("msgpack", encode_msgpack), ("arrow", encode_arrow)):
+        try:
+            durations, body = time_calls(lambda i: encode(payload), iterations)
+        except ImportError as e:
+            results[fmt] = {"skipped": str(e)}
+            continue
+        results[fmt] = {**summarize(durations, len(annotations)), "bytes": len(body)}
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    """Host and library versions, to tell comparable runs apart"""
+    import cv2
+    
+    info: Dict[str, Any] = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+    }
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        info["torch"] = torch.__version__
+        info["cuda"] = torch.cuda.is_available()
+    try:
+        info["git_commit"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        info["git_commit"] = None
+    return info
+
+
+def run_suite(
+    names: List[str],
+    backend: str = "auto",
+    seconds: float = 10.0,
+    audio_seconds: float = 10.0,
+    fps: float = 30.0,
+    width: int = 640,
+    height: int = 360,
+    iterations: int = 20,
+    batch_size: int = 8,
+    frame_interval: int = 30,
+    latency_ms: float = 0.0,
+    chunk_workers: int = 0,
+    workdir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Run every benchmark and return the results document
+    
+    Args:
+        names: Registry names of the annotators to benchmark
+        backend: "auto", "real" or "stub" model backends
+        seconds: Synthetic video duration
+        audio_seconds: Synthetic audio duration
+        fps: Synthetic video frame rate
+        width: Synthetic video width
+        height: Synthetic video height
+        iterations: Timed calls per single-input benchmark
+        batch_size: Frames per annotate_batch call for per-frame annotators
+        frame_interval: Sampling interval of the frame-loop run
+        latency_ms: Simulated model time per stub call
+        chunk_workers: Also run the frame loop chunked over this many
+            worker processes (0 to skip)
+        workdir: Where to write the synthetic media (a temp dir by default)
+    """
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        video = synthetic_video(os.path.join(tmp, "bench.mp4"), seconds, fps, width, height)
+        audio = synthetic_audio(os.path.join(tmp, "bench.wav"), audio_seconds)
+        frames = read_frames(video.path, max(batch_size, 32))
+        
+        annotators: Dict[str, Any] = {}
+        results: Dict[str, Any] = {}
+        for name in names:
+            annotator, used, reason = load_annotator(name, backend, latency_ms)
+            annotators[name] = annotator
+            logger.info(f"Benchmarking {name} ({used} backend)")
+            results[name] = {"backend": used, "backend_note": reason}
+            results[name].update(bench_annotator(name, annotator, frames, video, audio, iterations, batch_size))
+        
+        decode = bench_decode(video)
+        video_annotators = {n: a for n, a in annotators.items() if n in VIDEO_TOGGLES}
+        frame_loop, annotations = bench_frame_loop(video, video_annotators, frame_interval)
+        inline = bench_inline_decode(video, video_annotators, frame_interval, frame_loop, annotations)
+        chunked = None
+        if chunk_workers > 1:
+            chunked = bench_chunked(
+                video, video_annotators, frame_interval, chunk_workers,
+                frame_loop, annotations, backend, latency_ms,
+            )
+        serialisation = bench_serialisation(annotations, max(1, iterations // 4))
+        
+        for annotator in annotators.values():
+            annotator.cleanup()
+    
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": environment(),
+        "config": {
+            "backend": backend,
+            "iterations": iterations,
+            "batch_size": batch_size,
+            "frame_interval": frame_interval,
+            "stub_latency_ms": latency_ms,
+            "chunk_workers": chunk_workers,
+            "prefetch_frames": VIDEO_PREFETCH_FRAMES,
+        },
+        "media": {"video": video.to_dict(), "audio": audio.to_dict()},
+        "annotators": results,
+        "decode": decode,
+        "frame_loop": frame_loop,
+        "frame_loop_inline_decode": inline,
+        "frame_loop_chunked": chunked,
+        "serialisation": serialisation,
+    }
+
+
+def _metrics(document: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Flatten the timing and throughput leaves of a results document"""
+    flat = {}
+    for key, value in document.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_metrics(value, path + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and (
+            key.endswith("_ms") or key.endswith("_per_sec")
+        ):
+            flat[path] = float(value)
+    return flat
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Per-metric change between two results documents
+    
+    Returns:
+        Rows of {metric, baseline, current, change_pct, better}; a metric is
+        better when a time went down or a rate went up
+    """
+    before, after = _metrics(baseline), _metrics(current)
+    rows = []
+    for metric in sorted(before.keys() & after.keys()):
+        old, new = before[metric], after[metric]
+        change = (new - old) / old * 100 if old else None
+        better = None if change is None else (change > 0) == metric.endswith("_per_sec")
+        rows.append({"metric": metric, "baseline": old, "current": new, "change_pct": change, "better": better})
+    return rows
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Benchmark the annotators on synthetic media")
+    parser.add_argument("--annotators", default=",".join(ALL_ANNOTATORS), help="Comma-separated registry names")
+    parser.add_argument("--backend", choices=("auto", "real", "stub"), default="auto")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Synthetic video duration")
+    parser.add_argument("--audio-seconds", type=float, default=10.0)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=360)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--frame-interval", type=int, default=30)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated model time per stub call")
+    parser.add_argument("--chunk-workers", type=int, default=0, help="Also time a chunked frame loop over this many processes")
+    parser.add_argument("--output", help="Write the results JSON here (default: stdout)")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    args = parser.parse_args()
+    
+    # Real backends must not try to download weights
+    for var in ("HF_HUB_OFFLINE", "TRANSFORMERS_OFFLINE", "YOLO_OFFLINE"):
+        os.environ.setdefault(var, "1")
+    
+    names = [n.strip() for n in args.annotators.split(",") if n.strip()]
+    unknown = set(names) - set(ALL_ANNOTATORS)
+    if unknown:
+        parser.error(f"Unknown annotators: {', '.join(sorted(unknown))}")
+    
+    document = run_suite(
+        names,
+        backend=args.backend,
+        seconds=args.seconds,
+        audio_seconds=args.audio_seconds,
+        fps=args.fps,
+        width=args.width,
+        height=args.height,
+        iterations=args.iterations,
+        batch_size=args.batch_size,
+        frame_interval=args.frame_interval,
+        latency_ms=args.latency_ms,
+        chunk_workers=args.chunk_workers,
+    )
+    
+    if args.compare:
+        with open(args.compare) as f:
+            document["comparison"] = compare(json.load(f), document)
+        for row in document["comparison"]:
+            if row["change_pct"] is not None:
+                mark = "+" if row["better"] else "-"
+                print(
+                    f"{mark} {row['metric']}: {row['baseline']:.2f} -> {row['current']:.2f} "
+                    f"({row['change_pct']:+.1f}%)",
+                    file=sys.stderr,
+                )
+    
+    text = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+        logger.info(f"Wrote {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
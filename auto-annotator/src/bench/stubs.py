@@ -0,0 +1,339 @@
+"""
+Deterministic stub model backends
+Each stub stands in for the third-party model object an annotator wraps
+(MediaPipe Hands, YOLO, SAM3 predictor, Whisper, pyannote pipelines, the
+LiveCC generator). The annotator's own code still runs on top, so
+benchmarks and load tests measure the service around the models. Outputs
+depend only on the input, and an optional fixed latency per call stands in
+for model compute.
+"""
+
+import logging
+import time
+import wave
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+from ..annotators.base import BaseAnnotator
+from ..annotators.hand_pose import LANDMARK_NAMES
+
+logger = logging.getLogger(__name__)
+
+# Annotators whose backend is plain OpenCV/PySceneDetect code and needs no stub
+NATIVE_BACKENDS = {"action", "scene"}
+
+
+def _seed(array: np.ndarray) -> int:
+    """Cheap content fingerprint used to seed per-input outputs"""
+    return int(array[::16, ::16].sum(dtype=np.int64)) if array.ndim >= 2 else int(array.sum())
+
+
+def _pause(latency_ms: float) -> None:
+    if latency_ms > 0:
+        time.sleep(latency_ms / 1000)
+
+
+def _wav_samples(path: str) -> Tuple[np.ndarray, int]:
+    """Mono float samples of a 16-bit PCM WAV"""
+    with wave.open(path, "rb") as f:
+        rate = f.getframerate()
+        raw = f.readframes(f.getnframes())
+        channels = f.getnchannels()
+    samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def _voiced_segments(path: str, frame_sec: float = 0.05) -> List[Tuple[float, float]]:
+    """Energy-gated (start, end) intervals in seconds"""
+    samples, rate = _wav_samples(path)
+    hop = max(1, int(rate * frame_sec))
+    frames = samples[: len(samples) // hop * hop].reshape(-1, hop)
+    if len(frames) == 0:
+        return []
+    voiced = np.sqrt((frames ** 2).mean(axis=1)) > 0.02
+    
+    segments, start = [], None
+    for i, on in enumerate(voiced):
+        if on and start is None:
+            start = i
+        elif not on and start is not None:
+            segments.append((start * frame_sec, i * frame_sec))
+            start = None
+    if start is not None:
+        segments.append((start * frame_sec, len(voiced) * frame_sec))
+    return segments
+
+
+class StubHands:
+    """MediaPipe Hands.process() returning 0-2 hands placed from the frame content"""
+    
+    def __init__(self, max_hands: int = 2, latency_ms: float = 0.0):
+        self.max_hands = max_hands
+        self.latency_ms = latency_ms
+    
+    def process(self, frame: np.ndarray) -> Any:
+        _pause(self.latency_ms)
+        seed = _seed(frame)
+        rng = np.random.default_rng(seed)
+        n = seed % (self.max_hands + 1)
+        
+        hands, handedness = [], []
+        for h in range(n):
+            points = rng.random((len(LANDMARK_NAMES), 3), dtype=np.float32)
+            hands.append(SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y, z=z) for x, y, z in points.tolist()]))
+            handedness.append(SimpleNamespace(classification=[
+                SimpleNamespace(label="Left" if h % 2 else "Right", score=float(0.5 + points[0, 2] / 2))
+            ]))
+        return SimpleNamespace(multi_hand_landmarks=hands or None, multi_handedness=handedness or None)
+    
+    def close(self) -> None:
+        pass
+
+
+class _Tensor:
+    """Just enough of a torch tensor for ObjectDetector._parse_prediction"""
+    
+    def __init__(self, array: np.ndarray):
+        self._array = array
+    
+    def cpu(self) -> "_Tensor":
+        return self
+    
+    def numpy(self) -> np.ndarray:
+        return self._array
+
+
+class StubYOLO:
+    """Ultralytics YOLO model returning up to 8 boxes per image"""
+    
+    names = {0: "person", 1: "brick", 2: "piece", 3: "tool", 4: "cup"}
+    
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+    
+    def __call__(self, source: Any, conf: float = 0.25, **kwargs) -> List[Any]:
+        images = source if isinstance(source, list) else [source]
+        _pause(self.latency_ms * len(images))
+        return [self._predict(image, conf) for image in images]
+    
+    def _predict(self, image: np.ndarray, conf: float) -> Any:
+        height, width = image.shape[:2]
+        rng = np.random.default_rng(_seed(image))
+        n = int(rng.integers(0, 9))
+        xy = rng.random((n, 2)) * (width * 0.8, height * 0.8)
+        wh = rng.random((n, 2)) * (width * 0.2, height * 0.2) + 4
+        xyxy = np.hstack([xy, xy + wh]).astype(np.float32)
+        scores = rng.random(n).astype(np.float32)
+        classes = rng.integers(0, len(self.names), n).astype(np.float32)
+        
+        keep = scores >= conf
+        boxes = SimpleNamespace(
+            xyxy=_Tensor(xyxy[keep]), conf=_Tensor(scores[keep]), cls=_Tensor(classes[keep])
+        )
+        return SimpleNamespace(boxes=boxes)
+
+
+class StubSAM3Predictor:
+    """SAM3 predictor producing three rectangular masks per image"""
+    
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self._image: Optional[np.ndarray] = None
+    
+    def set_image(self, image: np.ndarray) -> None:
+        self._image = image
+    
+    def _masks(self, count: int) -> List[Tuple[np.ndarray, List[int], float]]:
+        height, width = self._image.shape[:2]
+        rng = np.random.default_rng(_seed(self._image))
+        masks = []
+        for _ in range(count):
+            x, y = int(rng.integers(0, width // 2)), int(rng.integers(0, height // 2))
+            w, h = int(rng.integers(8, width // 2)), int(rng.integers(8, height // 2))
+            mask = np.zeros((height, width), dtype=bool)
+            mask[y:y + h, x:x + w] = True
+            masks.append((mask, [x, y, w, h], float(rng.uniform(0.7, 1.0))))
+        return masks
+    
+    def generate_auto_masks(self) -> List[Dict[str, Any]]:
+        _pause(self.latency_ms)
+        return [
+            {"segmentation": mask, "bbox": bbox, "area": int(mask.sum()), "stability_score": score}
+            for mask, bbox, score in self._masks(3)
+        ]
+    
+    def predict(self, **kwargs) -> Tuple[np.ndarray, np.ndarray, None]:
+        _pause(self.latency_ms)
+        masks = self._masks(3)
+        return np.stack([m for m, _, _ in masks]), np.array([s for _, _, s in masks]), None
+
+
+class StubWhisper:
+    """Whisper model transcribing each voiced interval as one segment"""
+    
+    WORDS = ["pick", "the", "red", "brick", "and", "attach", "it", "on", "top"]
+    
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.device = "cpu"
+    
+    def transcribe(self, audio_path: str, word_timestamps: bool = True, **kwargs) -> Dict[str, Any]:
+        _pause(self.latency_ms)
+        segments = []
+        for index, (start, end) in enumerate(_voiced_segments(audio_path)):
+            words = [self.WORDS[(index + i) % len(self.WORDS)] for i in range(4)]
+            step = (end - start) / len(words)
+            segment = {
+                "start": start,
+                "end": end,
+                "text": " " + " ".join(words),
+                "avg_logprob": -0.2,
+                "no_speech_prob": 0.01,
+            }
+            if word_timestamps:
+                segment["words"] = [
+                    {"word": " " + w, "start": start + i * step, "end": start + (i + 1) * step}
+                    for i, w in enumerate(words)
+                ]
+            segments.append(segment)
+        return {"segments": segments, "language": kwargs.get("language") or "en"}
+
+
+class StubVADPipeline:
+    """pyannote voice activity detection over the file's energy envelope"""
+    
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+    
+    def __call__(self, audio_path: str, **kwargs) -> Any:
+        _pause(self.latency_ms)
+        segments = [SimpleNamespace(start=s, end=e) for s, e in _voiced_segments(audio_path)]
+        return SimpleNamespace(get_timeline=lambda: segments)
+
+
+class StubDiarizationPipeline:
+    """pyannote diarization alternating speakers between voiced intervals"""
+    
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+    
+    def __call__(self, audio_path: str, num_speakers: Optional[int] = None, **kwargs) -> Any:
+        _pause(self.latency_ms)
+        speakers = num_speakers or 2
+        tracks = [
+            (SimpleNamespace(start=s, end=e), None, f"SPEAKER_{i % speakers:02d}")
+            for i, (s, e) in enumerate(_voiced_segments(audio_path))
+        ]
+        return SimpleNamespace(itertracks=lambda yield_label=True: iter(tracks))
+
+
+def stub_captioner(latency_ms: float = 0.0) -> Callable[[List[np.ndarray], str], str]:
+    """Replacement for LiveCCAnnotator._generate_caption"""
+    captions = [
+        "The person picks up a red brick.",
+        "The person attaches the brick to the base.",
+        "The person looks at the instructions.",
+        "The person rotates the model.",
+    ]
+    
+    def generate(frames: List[np.ndarray], prompt: str) -> str:
+        _pause(latency_ms)
+        return captions[_seed(frames[0]) % len(captions)]
+    
+    return generate
+
+
+def install_stub_backend(name: str, annotator: BaseAnnotator, latency_ms: float = 0.0) -> None:
+    """
+    Swap an annotator's model for a deterministic stub and mark it loaded
+    
+    Args:
+        name: Registry name (hand_pose, object, sam3, speech, transcript, livecc;
+            action and scene run their native backends unchanged)
+        annotator: Instance of the matching annotator class
+        latency_ms: Simulated model time per call (per image for YOLO)
+    """
+    if name == "hand_pose":
+        annotator._hands = StubHands(annotator.max_hands, latency_ms)
+    elif name == "object":
+        annotator._model = StubYOLO(latency_ms)
+        annotator.device = "cpu"
+    elif name == "sam3":
+        annotator._model = "stub"
+        annotator._predictor = StubSAM3Predictor(latency_ms)
+    elif name == "speech":
+        annotator._vad_pipeline = StubVADPipeline(latency_ms)
+        annotator._diarization_pipeline = StubDiarizationPipeline(latency_ms)
+    elif name == "transcript":
+        annotator._model = StubWhisper(latency_ms)
+        annotator.device = "cpu"
+    elif name == "livecc":
+        annotator._generate_caption = stub_captioner(latency_ms)
+        annotator.device = "cpu"
+    elif name in NATIVE_BACKENDS:
+        annotator.load_model()
+    else:
+        raise KeyError(f"No stub backend for {name}")
+    annotator._is_loaded = True
+
+
+def stub_annotator(name: str, latency_ms: float = 0.0) -> BaseAnnotator:
+    """Annotator from the registry with a stub backend installed"""
+    from ..model_manager import ANNOTATOR_FACTORIES
+    
+    annotator = ANNOTATOR_FACTORIES[name]()
+    install_stub_backend(name, annotator, latency_ms)
+    return annotator
+
+
+def stub_factories(latency_ms: float = 0.0) -> Dict[str, Callable[[], BaseAnnotator]]:
+    """Registry of stub-backed annotators, for ModelManager(factories=...)"""
+    from ..model_manager import ANNOTATOR_FACTORIES
+    
+    return {name: (lambda name=name: stub_annotator(name, latency_ms)) for name in ANNOTATOR_FACTORIES}
+
+
+def backend_factories(backend: str = "auto", latency_ms: float = 0.0) -> Dict[str, Callable[[], BaseAnnotator]]:
+    """Registry choosing backends like load_annotator, for chunk worker processes"""
+    from ..model_manager import ANNOTATOR_FACTORIES
+    
+    return {
+        name: (lambda name=name: load_annotator(name, backend, latency_ms)[0])
+        for name in ANNOTATOR_FACTORIES
+    }
+
+
+def load_annotator(name: str, backend: str = "auto", latency_ms: float = 0.0) -> Tuple[BaseAnnotator, str, Optional[str]]:
+    """
+    Annotator with its real model, or a stub backend when that is unavailable
+    
+    Args:
+        name: Registry name
+        backend: "real", "stub" or "auto" (real, falling back to the stub);
+            action and scene always run their native backends
+        latency_ms: Simulated latency for stub backends
+        
+    Returns:
+        (annotator, backend used, reason the real model was not used)
+    """
+    from ..model_manager import ANNOTATOR_FACTORIES
+    
+    if name in NATIVE_BACKENDS:
+        backend = "real"
+    elif backend == "stub":
+        return stub_annotator(name, latency_ms), "stub", "requested"
+    
+    annotator = ANNOTATOR_FACTORIES[name]()
+    try:
+        annotator.ensure_loaded()
+        if name == "speech" and annotator._vad_pipeline == "fallback":
+            raise RuntimeError("pyannote pipelines unavailable")
+        return annotator, "real", None
+    except Exception as e:
+        if backend == "real":
+            raise
+        logger.info(f"Real {name} backend unavailable ({e}); using stub")
+        return stub_annotator(name, latency_ms), "stub", f"{type(e).__name__}: {e}"
@@ -0,0 +1,285 @@
+"""
+Annotation result cache
+Results are stored per annotator under a content-addressed key: the media
+hash, the annotator's model_name/model_version, its output-affecting
+settings and the call parameters. Re-submitting an asset with one extra
+annotator enabled only runs that annotator. Both backends evict the least
+recently used entries once the configured size is exceeded.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from .config import (
+    REDIS_URL,
+    RESULT_CACHE,
+    RESULT_CACHE_DIR,
+    RESULT_CACHE_MAX_BYTES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stat_hash(path: str) -> str:
+    """
+    SHA-256 of a file's real path, size and modification time
+    
+    A cheap stand-in for hash_file on large files that are annotated in
+    place: rewriting the file changes its hash without it being read.
+    """
+    path = os.path.realpath(path)
+    stat = os.stat(path)
+    identity = f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+def cache_key(
+    media_hash: str,
+    annotation_type: str,
+    annotator: Any,
+    params: Dict[str, Any],
+) -> str:
+    """Content-addressed key for one annotator's results on one asset"""
+    identity = {
+        "media": media_hash,
+        "type": annotation_type,
+        "model_name": annotator.model_name,
+        "model_version": annotator.model_version,
+        "settings": annotator.cache_params(),
+        "params": params,
+    }
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _encode(annotations: List[Dict[str, Any]]) -> bytes:
+    return zlib.compress(json.dumps(annotations).encode("utf-8"), 1)
+
+
+def _decode(payload: bytes) -> List[Dict[str, Any]]:
+    return json.loads(zlib.decompress(payload))
+
+
+class ResultCache(ABC):
+    """Size-bounded LRU store of annotation lists"""
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Cached annotations for key, or None"""
+        payload = self._read(key)
+        if payload is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return _decode(payload)
+    
+    def put(self, key: str, annotations: List[Dict[str, Any]]) -> None:
+        """Store annotations, evicting older entries if over budget"""
+        payload = _encode(annotations)
+        if len(payload) > self.max_bytes:
+            logger.debug(f"Skipping cache entry of {len(payload)} bytes")
+            return
+        self._write(key, payload)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "size_bytes": self.size_bytes(),
+            "max_bytes": self.max_bytes,
+        }
+    
+    backend: str = "base"
+    
+    @abstractmethod
+    def _read(self, key: str) -> Optional[bytes]:
+        pass
+    
+    @abstractmethod
+    def _write(self, key: str, payload: bytes) -> None:
+        pass
+    
+    @abstractmethod
+    def size_bytes(self) -> int:
+        pass
+
+
+class DiskResultCache(ResultCache):
+    """
+    One file per entry in a local directory
+    
+    Recency is tracked in memory and mirrored to file mtimes so it survives
+    restarts. Several processes may share the directory; each evicts based
+    on its own view, and files removed by another process count as misses.
+    """
+    
+    backend = "disk"
+    
+    def __init__(self, directory: Optional[str] = RESULT_CACHE_DIR, max_bytes: int = RESULT_CACHE_MAX_BYTES):
+        super().__init__(max_bytes)
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "harbor-annotator-cache")
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        
+        # Rebuild the LRU index from what is already on disk, oldest first
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".bin"):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total += size
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.bin")
+    
+    def _read(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                payload = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._total -= self._index.pop(key, 0)
+            return None
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+        return payload
+    
+    def _write(self, key: str, payload: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, self._path(key))
+        
+        with self._lock:
+            self._total += len(payload) - self._index.pop(key, 0)
+            self._index[key] = len(payload)
+            while self._total > self.max_bytes and self._index:
+                old_key, size = self._index.popitem(last=False)
+                self._total -= size
+                self.evictions += 1
+                try:
+                    os.unlink(self._path(old_key))
+                except FileNotFoundError:
+                    pass
+    
+    def size_bytes(self) -> int:
+        return self._total
+
+
+class RedisResultCache(ResultCache):
+    """
+    Entries stored in Redis, shared by every worker
+    
+    A sorted set of last-access times drives LRU eviction and a hash of
+    entry sizes keeps the running total.
+    """
+    
+    backend = "redis"
+    PREFIX = "annotator:cache"
+    
+    def __init__(self, client: Any = None, url: str = REDIS_URL, max_bytes: int = RESULT_CACHE_MAX_BYTES):
+        super().__init__(max_bytes)
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self._redis = client
+        self._lru_key = f"{self.PREFIX}:lru"
+        self._sizes_key = f"{self.PREFIX}:sizes"
+        self._total_key = f"{self.PREFIX}:bytes"
+    
+    def _entry_key(self, key: str) -> str:
+        return f"{self.PREFIX}:entry:{key}"
+    
+    def _read(self, key: str) -> Optional[bytes]:
+        payload = self._redis.get(self._entry_key(key))
+        if payload is not None:
+            self._redis.zadd(self._lru_key, {key: time.time()})
+        return payload
+    
+    def _write(self, key: str, payload: bytes) -> None:
+        previous = self._redis.hget(self._sizes_key, key)
+        pipe = self._redis.pipeline()
+        pipe.set(self._entry_key(key), payload)
+        pipe.zadd(self._lru_key, {key: time.time()})
+        pipe.hset(self._sizes_key, key, len(payload))
+        pipe.incrby(self._total_key, len(payload) - int(previous or 0))
+        pipe.execute()
+        
+        while self.size_bytes() > self.max_bytes:
+            oldest = self._redis.zpopmin(self._lru_key)
+            if not oldest:
+                break
+            old_key = oldest[0][0]
+            old_key = old_key.decode("utf-8") if isinstance(old_key, bytes) else old_key
+            size = int(self._redis.hget(self._sizes_key, old_key) or 0)
+            pipe = self._redis.pipeline()
+            pipe.delete(self._entry_key(old_key))
+            pipe.hdel(self._sizes_key, old_key)
+            pipe.decrby(self._total_key, size)
+            pipe.execute()
+            self.evictions += 1
+    
+    def size_bytes(self) -> int:
+        return int(self._redis.get(self._total_key) or 0)
+
+
+_cache: Optional[ResultCache] = None
+_cache_loaded = False
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Process-wide result cache, or None when RESULT_CACHE=none"""
+    global _cache, _cache_loaded
+    with _cache_lock:
+        if not _cache_loaded:
+            if RESULT_CACHE == "disk":
+                _cache = DiskResultCache()
+            elif RESULT_CACHE == "redis":
+                _cache = RedisResultCache()
+            elif RESULT_CACHE != "none":
+                raise ValueError(f"Unknown RESULT_CACHE: {RESULT_CACHE}")
+            _cache_loaded = True
+        return _cache
+
+
+def set_result_cache(cache: Optional[ResultCache]) -> None:
+    """Override the process-wide cache (e.g. with a fakeredis-backed one in tests)"""
+    global _cache, _cache_loaded
+    with _cache_lock:
+        _cache = cache
+        _cache_loaded = True
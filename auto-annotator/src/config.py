@@ -0,0 +1,99 @@
+"""
+Runtime configuration for the auto-annotator service
+Values are read from the environment once, at import time
+"""
+
+import os
+from typing import Dict
+
+
+def _limits(value: str) -> Dict[str, int]:
+    """Parse "video=2,livecc=1" into {"video": 2, "livecc": 1}"""
+    limits = {}
+    for part in value.split(","):
+        name, _, limit = part.partition("=")
+        if name.strip() and limit.strip():
+            limits[name.strip()] = int(limit)
+    return limits
+
+
+# Upload spooling
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(8 * 1024 ** 3)))  # 8 GiB
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))  # 1 MiB
+UPLOAD_DIR = os.getenv("UPLOAD_DIR") or None  # Defaults to the system temp dir
+
+# Local media (annotate files already on a shared volume, without uploading)
+LOCAL_MEDIA_DIRS = [d for d in os.getenv("LOCAL_MEDIA_DIRS", "").split(",") if d.strip()]  # Empty disables
+LOCAL_MEDIA_ASSET_PATH = os.getenv("LOCAL_MEDIA_ASSET_PATH", "{media_asset_id}")  # media_asset_id -> path under a dir
+
+# Frame sampling
+GOP_SIZE = int(os.getenv("GOP_SIZE", "0"))  # 0 = probe the stream with ffprobe
+DEFAULT_GOP_SIZE = int(os.getenv("DEFAULT_GOP_SIZE", "250"))  # Used when probing is unavailable
+GOP_PROBE_PACKETS = int(os.getenv("GOP_PROBE_PACKETS", "1000"))
+
+# Frames decoded (and resized for each annotator) ahead of inference on a
+# separate thread (0 = decode inline), and decode/view buffers kept for
+# reuse per frame size on top of the read-ahead; frames beyond them are
+# allocated and freed as usual
+VIDEO_PREFETCH_FRAMES = int(os.getenv("VIDEO_PREFETCH_FRAMES", "8"))
+FRAME_BUFFER_POOL_SIZE = int(os.getenv("FRAME_BUFFER_POOL_SIZE", "64"))
+
+# Chunked video annotation: long videos are split at keyframes and the
+# chunks annotated in this many worker processes (0 or 1 = in-process)
+VIDEO_CHUNK_WORKERS = int(os.getenv("VIDEO_CHUNK_WORKERS", "0"))
+VIDEO_CHUNK_MIN_SEC = float(os.getenv("VIDEO_CHUNK_MIN_SEC", "30"))  # Shortest chunk worth a process
+
+# Job queue
+JOB_BACKEND = os.getenv("JOB_BACKEND", "memory")  # "memory" or "redis"
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+JOB_STORAGE_DIR = os.getenv("JOB_STORAGE_DIR") or None  # Must be shared with workers when using redis
+JOB_RESULT_TTL_SEC = int(os.getenv("JOB_RESULT_TTL_SEC", str(24 * 3600)))
+JOB_PROGRESS_INTERVAL_SEC = float(os.getenv("JOB_PROGRESS_INTERVAL_SEC", "1.0"))
+JOB_HEARTBEAT_TTL_SEC = int(os.getenv("JOB_HEARTBEAT_TTL_SEC", "30"))  # Worker presumed dead after this long without a heartbeat
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "2"))  # Runs of a job before a crashed worker's job is failed instead of requeued
+EMBEDDED_JOB_WORKERS = int(os.getenv(
+    "EMBEDDED_JOB_WORKERS", "1" if JOB_BACKEND == "memory" else "0"
+))
+
+# Inference executors (override per pool with POOL_SIZE_<NAME>, e.g. POOL_SIZE_OBJECT=2)
+ANNOTATOR_POOL_SIZE = int(os.getenv("ANNOTATOR_POOL_SIZE", "1"))
+PIPELINE_POOL_SIZE = int(os.getenv("PIPELINE_POOL_SIZE", "4"))
+
+# Admission control: concurrent requests per endpoint (video, audio, hands,
+# objects, asr) and per annotator (hand_pose, object, ..., transcript)
+ENDPOINT_CONCURRENCY = _limits(os.getenv(
+    "ENDPOINT_CONCURRENCY", f"video={PIPELINE_POOL_SIZE},audio={PIPELINE_POOL_SIZE}"
+))
+ANNOTATOR_CONCURRENCY = _limits(os.getenv("ANNOTATOR_CONCURRENCY", ""))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))  # Waiting requests per limit; beyond it, 429
+ADMISSION_QUEUE_TIMEOUT_SEC = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SEC", "30"))  # Longest wait before 503
+ADMISSION_RETRY_AFTER_SEC = int(os.getenv("ADMISSION_RETRY_AFTER_SEC", "5"))  # Retry-After before any hold times are known
+
+# Cross-frame batching in the video pipeline (1 disables batching)
+OBJECT_BATCH_SIZE = int(os.getenv("OBJECT_BATCH_SIZE", "8"))
+SAM3_BATCH_SIZE = int(os.getenv("SAM3_BATCH_SIZE", "4"))
+
+# Cross-request micro-batching for /annotate/objects
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "16"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "5"))
+
+# Streaming responses
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "256"))  # Events buffered ahead of a slow client
+STREAM_PROGRESS_INTERVAL_SEC = float(os.getenv("STREAM_PROGRESS_INTERVAL_SEC", "1.0"))
+
+# Annotation result cache
+RESULT_CACHE = os.getenv("RESULT_CACHE", "disk")  # "disk", "redis" or "none"
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR") or None  # Defaults to <tmp>/harbor-annotator-cache
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))  # 2 GiB
+
+# Model manager
+MODEL_MEMORY_BUDGET_BYTES = int(os.getenv("MODEL_MEMORY_BUDGET_BYTES", "0"))  # 0 = unlimited
+PRELOAD_MODELS = [n.strip() for n in os.getenv("PRELOAD_MODELS", "").split(",") if n.strip()]  # or "all"
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "1").lower() not in ("0", "false", "no")
+
+# Shared model hosts (one process per model, shared by all HTTP workers)
+INFERENCE_REMOTE_MODELS = [n.strip() for n in os.getenv("INFERENCE_REMOTE_MODELS", "").split(",") if n.strip()]  # or "all"
+INFERENCE_SOCKET_DIR = os.getenv("INFERENCE_SOCKET_DIR") or None  # Defaults to <tmp>/harbor-annotator-inference
+INFERENCE_SHM_BYTES = int(os.getenv("INFERENCE_SHM_BYTES", str(64 * 1024 ** 2)))  # Initial per-connection segment
+INFERENCE_AUTHKEY = os.getenv("INFERENCE_AUTHKEY", "").encode() or None  # Defaults to a generated key in the socket dir
+INFERENCE_CONNECT_TIMEOUT_SEC = float(os.getenv("INFERENCE_CONNECT_TIMEOUT_SEC", "60"))
@@ -0,0 +1,120 @@
+"""
+Inference executors
+Blocking work (decoding, model inference) runs on named thread pools so the
+asyncio event loop stays responsive. Each annotator gets its own pool; its
+size bounds how many calls may run on that annotator at once, and the
+default of 1 serialises access to models that are not thread-safe.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from .config import ANNOTATOR_POOL_SIZE, PIPELINE_POOL_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Pools that drive whole pipelines rather than a single model
+PIPELINE_POOLS = {"video_pipeline", "audio_pipeline", "preprocess"}
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_lock = threading.Lock()
+# Keeps the placeholder tasks of concurrent exclusive calls from interleaving
+_exclusive_lock = threading.Lock()
+
+
+def pool_size(name: str) -> int:
+    """Configured worker count for a pool"""
+    default = PIPELINE_POOL_SIZE if name in PIPELINE_POOLS else ANNOTATOR_POOL_SIZE
+    return max(1, int(os.getenv(f"POOL_SIZE_{name.upper()}", str(default))))
+
+
+def get_executor(name: str) -> ThreadPoolExecutor:
+    """Get (or lazily create) the pool for an annotator or pipeline"""
+    with _lock:
+        executor = _executors.get(name)
+        if executor is None:
+            size = pool_size(name)
+            executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix=name)
+            _executors[name] = executor
+            logger.info(f"Created {name} pool with {size} workers")
+        return executor
+
+
+def submit(name: str, fn: Callable[..., Any], *args, **kwargs) -> Future:
+    """Submit a call to a named pool"""
+    return get_executor(name).submit(fn, *args, **kwargs)
+
+
+def submit_exclusive(name: str, fn: Callable[..., Any], *args, **kwargs) -> Future:
+    """
+    Submit a call that runs while nothing else runs on the pool
+    
+    One placeholder task per worker is queued; once every worker has
+    picked one up, the calls queued before them have finished and nothing
+    else can start. fn then runs on one worker while the others wait for
+    it. Used to unload a model without tearing it down under an inference
+    call on another worker of its pool.
+    """
+    executor = get_executor(name)
+    workers = executor._max_workers
+    result: Future = Future()
+    arrived = threading.Barrier(workers)
+    finished = threading.Event()
+    
+    def hold() -> None:
+        if arrived.wait() != 0:
+            finished.wait()
+            return
+        try:
+            result.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            result.set_exception(e)
+        finally:
+            finished.set()
+    
+    with _exclusive_lock:
+        for _ in range(workers):
+            executor.submit(hold)
+    return result
+
+
+def run_sync(name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a call on a named pool from a worker thread and wait for it"""
+    return submit(name, fn, *args, **kwargs).result()
+
+
+async def run_in_executor(name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Await a blocking call on a named pool without blocking the event loop
+    
+    Like asyncio.to_thread, the call runs in a copy of the caller's
+    context, so request-scoped context variables (stage timings) follow it.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+    return await loop.run_in_executor(get_executor(name), call)
+
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    """Worker count and queued (not yet started) calls per pool"""
+    with _lock:
+        executors = dict(_executors)
+    return {
+        name: {"workers": executor._max_workers, "queued": executor._work_queue.qsize()}
+        for name, executor in executors.items()
+    }
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    """Shut down every pool (called on application shutdown)"""
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
@@ -0,0 +1,15 @@
+"""
+Shared model hosts
+Serve each model from one process to every HTTP worker on the machine
+"""
+
+from .client import RemoteAnnotator, RemoteAnnotatorError
+from .host import ModelHost, run_host, socket_path
+
+__all__ = [
+    "RemoteAnnotator",
+    "RemoteAnnotatorError",
+    "ModelHost",
+    "run_host",
+    "socket_path",
+]
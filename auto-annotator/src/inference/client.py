@@ -0,0 +1,172 @@
+"""
+Client side of the model hosts
+RemoteAnnotator stands in for a local annotator inside each HTTP worker and
+forwards calls to the shared model host, passing frames through shared
+memory.
+"""
+
+import logging
+import threading
+import time
+from multiprocessing.connection import Client, Connection
+from typing import Any, Dict, List, Optional, Tuple
+
+from .host import authkey, socket_path
+from .shm import SharedFrameBuffer
+from ..annotators.base import BaseAnnotator
+from ..config import INFERENCE_CONNECT_TIMEOUT_SEC, INFERENCE_SHM_BYTES
+
+logger = logging.getLogger(__name__)
+
+
+class RemoteAnnotatorError(RuntimeError):
+    """An annotator call failed inside the model host"""
+
+
+class RemoteAnnotator(BaseAnnotator):
+    """
+    Proxy for an annotator served by a model host
+    
+    Each calling thread gets its own connection and shared memory
+    segment, so concurrent calls do not interleave. Public settings
+    (window_size, stride, ...) are read from the host once on load;
+    other public methods (caption_segment, detect_language, ...) are
+    forwarded as remote calls.
+    """
+    
+    def __init__(self, name: str, path: Optional[str] = None):
+        super().__init__()
+        self._name = name
+        self._path = path or socket_path(name)
+        self._info: Dict[str, Any] = {}
+        self._local = threading.local()
+        self._channels: List[Tuple[Connection, SharedFrameBuffer]] = []
+        self._channels_lock = threading.Lock()
+    
+    @property
+    def model_name(self) -> str:
+        self.ensure_loaded()
+        return self._info["model_name"]
+    
+    @property
+    def model_version(self) -> str:
+        self.ensure_loaded()
+        return self._info["model_version"]
+    
+    @property
+    def input_size(self) -> Optional[int]:
+        self.ensure_loaded()
+        return self._info["input_size"]
+    
+    @property
+    def input_color(self) -> str:
+        self.ensure_loaded()
+        return self._info["input_color"]
+    
+    def load_model(self) -> None:
+        """Wait for the host to accept connections and fetch the annotator's settings"""
+        conn, _ = self._channel()
+        conn.send(("info",))
+        self._info = self._reply(conn.recv(), "info")
+        logger.info(f"Using shared {self._name} host ({self._info['model_name']} v{self._info['model_version']})")
+    
+    def annotate(self, input_data: Any, *args, **kwargs) -> Any:
+        return self.call("annotate", input_data, *args, **kwargs)
+    
+    def annotate_batch(self, inputs: List[Any], **kwargs) -> Any:
+        return self.call("annotate_batch", inputs, **kwargs)
+    
+    def cache_params(self) -> Dict[str, Any]:
+        self.ensure_loaded()
+        return dict(self._info["cache_params"])
+    
+    def warmup(self) -> None:
+        # The host warms up its model at startup; this only checks the round trip
+        self.ensure_loaded()
+    
+    def call(self, method: str, *args, **kwargs) -> Any:
+        """
+        Run a method of the hosted annotator
+        
+        Arrays in the arguments travel through shared memory; the
+        result comes back pickled. A dropped connection (host restart)
+        is re-established once.
+        
+        Raises:
+            RemoteAnnotatorError: If the call raised in the host
+        """
+        self.ensure_loaded()
+        for attempt in range(2):
+            conn, buffer = self._channel()
+            try:
+                packed_args, packed_kwargs = buffer.pack((args, kwargs))
+                conn.send(("call", buffer.name, method, packed_args, packed_kwargs))
+                return self._reply(conn.recv(), method)
+            except (EOFError, ConnectionError, BrokenPipeError) as e:
+                self._drop_channel()
+                if attempt:
+                    raise RemoteAnnotatorError(f"{self._name} host unavailable: {e}") from e
+                logger.warning(f"Lost connection to {self._name} host; reconnecting")
+    
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for names not defined locally
+        if name.startswith("_"):
+            raise AttributeError(name)
+        self.ensure_loaded()
+        attributes = self._info["attributes"]
+        if name in attributes:
+            return attributes[name]
+        return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+    
+    def _reply(self, reply: Tuple[Any, ...], method: str) -> Any:
+        if reply[0] == "ok":
+            return reply[1]
+        _, error_type, message = reply
+        raise RemoteAnnotatorError(f"{self._name}.{method} failed in host: {error_type}: {message}")
+    
+    def _channel(self) -> Tuple[Connection, SharedFrameBuffer]:
+        channel = getattr(self._local, "channel", None)
+        if channel is None:
+            channel = (self._connect(), SharedFrameBuffer(INFERENCE_SHM_BYTES))
+            self._local.channel = channel
+            with self._channels_lock:
+                self._channels.append(channel)
+        return channel
+    
+    def _connect(self) -> Connection:
+        # Also checks that the socket's directory is private to this user
+        key = authkey(self._path)
+        deadline = time.monotonic() + INFERENCE_CONNECT_TIMEOUT_SEC
+        while True:
+            try:
+                return Client(self._path, family="AF_UNIX", authkey=key)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() >= deadline:
+                    raise RemoteAnnotatorError(
+                        f"No {self._name} model host at {self._path}; "
+                        f"start it with: python -m src.inference.host {self._name}"
+                    )
+                time.sleep(0.5)
+    
+    def _drop_channel(self) -> None:
+        channel = getattr(self._local, "channel", None)
+        self._local.channel = None
+        if channel is not None:
+            with self._channels_lock:
+                self._channels.remove(channel)
+            self._close(channel)
+    
+    @staticmethod
+    def _close(channel: Tuple[Connection, SharedFrameBuffer]) -> None:
+        conn, buffer = channel
+        conn.close()
+        buffer.close()
+    
+    def cleanup(self) -> None:
+        """Close every thread's connection and remove its shared memory"""
+        with self._channels_lock:
+            channels, self._channels = self._channels, []
+        for channel in channels:
+            self._close(channel)
+        self._local = threading.local()
+        super().cleanup()
@@ -0,0 +1,282 @@
+"""
+Model host process
+Loads one annotator and serves it to every HTTP worker on the machine over a
+Unix socket, so N gunicorn workers share a single copy of the model
+(and of its GPU memory) instead of loading N.
+
+Run one host per shared model before starting the API workers:
+    python -m src.inference.host hand_pose
+"""
+
+import argparse
+import gc
+import inspect
+import logging
+import os
+import secrets
+import stat
+import tempfile
+import threading
+from multiprocessing.connection import Connection, Listener
+from typing import Any, Dict, Optional
+
+from .shm import attach, unpack
+from ..config import INFERENCE_AUTHKEY, INFERENCE_SOCKET_DIR, MODEL_WARMUP
+from ..executors import run_sync
+
+logger = logging.getLogger(__name__)
+
+
+# Authkey file kept next to the sockets when INFERENCE_AUTHKEY is not set
+AUTHKEY_FILE = "authkey"
+
+_authkeys: Dict[str, bytes] = {}
+_authkeys_lock = threading.Lock()
+
+
+def check_private_dir(path: str) -> None:
+    """
+    Make sure a socket directory is only accessible to this user
+    
+    Anyone who can write to it could plant a socket that workers connect
+    to and unpickle replies from, so it must be a real directory (not a
+    symlink) owned by the current user with mode 0700.
+    
+    Raises:
+        PermissionError: If it is not
+    """
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"Inference socket directory {path} is not a directory")
+    if info.st_uid != os.getuid():
+        raise PermissionError(f"Inference socket directory {path} is owned by uid {info.st_uid}, not {os.getuid()}")
+    if stat.S_IMODE(info.st_mode) != 0o700:
+        raise PermissionError(
+            f"Inference socket directory {path} has mode {stat.S_IMODE(info.st_mode):o}; it must be 700"
+        )
+
+
+def socket_dir() -> str:
+    """
+    Directory holding the model host sockets (private to the service user)
+    
+    Raises:
+        PermissionError: If an existing directory is not private (see check_private_dir)
+    """
+    path = INFERENCE_SOCKET_DIR or os.path.join(tempfile.gettempdir(), "harbor-annotator-inference")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    check_private_dir(path)
+    return path
+
+
+def socket_path(name: str) -> str:
+    """Socket a model host listens on"""
+    return os.path.join(socket_dir(), f"{name}.sock")
+
+
+def authkey(path: str) -> bytes:
+    """
+    Secret hosts and workers authenticate connections to a socket with
+    
+    INFERENCE_AUTHKEY when set; otherwise a random key kept in the
+    socket's (private) directory, created by whichever host or worker
+    gets there first.
+    
+    Args:
+        path: Socket path
+        
+    Raises:
+        PermissionError: If the socket directory or key file is not private
+    """
+    if INFERENCE_AUTHKEY:
+        return INFERENCE_AUTHKEY
+    directory = os.path.dirname(os.path.abspath(path))
+    with _authkeys_lock:
+        key = _authkeys.get(directory)
+        if key is None:
+            check_private_dir(directory)
+            key = _read_or_create_authkey(os.path.join(directory, AUTHKEY_FILE))
+            _authkeys[directory] = key
+        return key
+
+
+def _read_or_create_authkey(path: str) -> bytes:
+    if not os.path.exists(path):
+        # Written in full under another name, then linked into place, so a
+        # concurrent reader never sees a partial key and only one key wins
+        tmp = f"{path}.{os.getpid()}.{secrets.token_hex(4)}"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_hex(32))
+            try:
+                os.link(tmp, path)
+            except FileExistsError:
+                pass
+        finally:
+            os.unlink(tmp)
+    
+    info = os.lstat(path)
+    if not stat.S_ISREG(info.st_mode) or info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) & 0o077:
+        raise PermissionError(f"Inference authkey {path} must be a regular file owned by this user with mode 600")
+    with open(path) as f:
+        key = f.read().strip()
+    if not key:
+        raise PermissionError(f"Inference authkey {path} is empty")
+    return key.encode()
+
+
+def annotator_info(annotator) -> Dict[str, Any]:
+    """Identity, cache parameters and public settings sent to clients on connect"""
+    return {
+        "model_name": annotator.model_name,
+        "model_version": annotator.model_version,
+        "cache_params": annotator.cache_params(),
+        "input_size": annotator.input_size,
+        "input_color": annotator.input_color,
+        "attributes": _public_settings(annotator),
+    }
+
+
+def _public_settings(annotator) -> Dict[str, Any]:
+    """
+    Public scalar attributes of an annotator, set on the instance or its classes
+    
+    Class-level settings (e.g. LiveCCAnnotator.frames_per_segment) count
+    too; methods and properties are left to remote calls. Attributes are
+    looked up statically, so no descriptor runs on the host.
+    """
+    settings = {}
+    for key in dir(annotator):
+        if key.startswith("_"):
+            continue
+        value = inspect.getattr_static(annotator, key)
+        if isinstance(value, (bool, int, float, str, type(None))):
+            settings[key] = value
+    return settings
+
+
+class ModelHost:
+    """
+    Serves one loaded annotator to many client connections
+    
+    Each connection gets a thread; calls from all connections go through
+    the model's executor pool (POOL_SIZE_<NAME>), which bounds concurrency
+    exactly as it does in-process.
+    """
+    
+    def __init__(self, name: str, annotator):
+        self.name = name
+        self.annotator = annotator
+        self._info = annotator_info(annotator)
+    
+    def serve(self, path: str) -> None:
+        """
+        Accept connections forever
+        
+        The socket must be in a private directory (see check_private_dir)
+        and is created with mode 0600; every connection has to
+        authenticate with authkey().
+        """
+        key = authkey(path)
+        if os.path.lexists(path):
+            os.unlink(path)
+        # Bind with a umask that leaves the socket private from the start
+        umask = os.umask(0o177)
+        try:
+            listener = Listener(path, family="AF_UNIX", authkey=key)
+        finally:
+            os.umask(umask)
+        logger.info(f"Serving {self.name} on {path}")
+        
+        try:
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    logger.warning(f"Rejected connection: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            listener.close()
+    
+    def _handle(self, conn: Connection) -> None:
+        shm = None
+        try:
+            while True:
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    return
+                
+                if message[0] == "info":
+                    conn.send(("ok", self._info))
+                    continue
+                
+                _, shm_name, method, args, kwargs = message
+                if shm_name and (shm is None or shm.name.lstrip("/") != shm_name.lstrip("/")):
+                    shm = self._reattach(shm, shm_name)
+                conn.send(self._call(shm, method, args, kwargs))
+        finally:
+            conn.close()
+            self._release(shm)
+    
+    def _call(self, shm, method: str, args: Any, kwargs: Dict[str, Any]):
+        fn = getattr(self.annotator, method, None) if not method.startswith("_") else None
+        if not callable(fn):
+            return ("error", "AttributeError", f"{self.name} has no method {method}")
+        
+        if shm is not None:
+            args, kwargs = unpack((args, kwargs), shm)
+        try:
+            return ("ok", run_sync(self.name, fn, *args, **kwargs))
+        except Exception as e:
+            logger.error(f"{self.name}.{method} failed: {e}")
+            return ("error", type(e).__name__, str(e))
+        finally:
+            # Views into the segment must be gone before it can be re-mapped
+            del args, kwargs
+    
+    def _reattach(self, shm, name: str):
+        self._release(shm)
+        return attach(name)
+    
+    @staticmethod
+    def _release(shm) -> None:
+        if shm is None:
+            return
+        gc.collect()
+        try:
+            shm.close()
+        except BufferError:
+            logger.warning(f"Segment {shm.name} still referenced; leaving it mapped")
+
+
+def run_host(name: str, warmup: bool = MODEL_WARMUP, path: Optional[str] = None) -> None:
+    """Load, warm up and serve the named annotator"""
+    from ..model_manager import ANNOTATOR_FACTORIES
+    
+    if name not in ANNOTATOR_FACTORIES:
+        raise SystemExit(f"Unknown annotator {name}; choose from {', '.join(ANNOTATOR_FACTORIES)}")
+    
+    annotator = ANNOTATOR_FACTORIES[name]()
+    run_sync(name, annotator.ensure_loaded)
+    if warmup:
+        run_sync(name, annotator.warmup)
+    
+    ModelHost(name, annotator).serve(path or socket_path(name))
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Serve one annotator to all API workers")
+    parser.add_argument("name", help="Annotator registry name (e.g. hand_pose, object)")
+    parser.add_argument("--no-warmup", action="store_true", help="Skip the warm-up inference")
+    parser.add_argument("--socket", help="Socket path (default: INFERENCE_SOCKET_DIR/<name>.sock)")
+    args = parser.parse_args()
+    
+    run_host(args.name, warmup=MODEL_WARMUP and not args.no_warmup, path=args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Shared-memory frame transport
+Arrays in a remote call are copied once into a shared memory segment owned
+by the client connection, and replaced in the message by a small reference.
+The model host maps them back as numpy views of the same memory, so frames
+are never pickled or sent through the socket.
+"""
+
+import logging
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, List, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Keep each array 64-byte aligned within the segment
+_ALIGN = 64
+
+
+@dataclass(frozen=True)
+class ShmRef:
+    """Location of one array inside the connection's segment"""
+    offset: int
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+def _arrays(value: Any) -> List[np.ndarray]:
+    """Arrays contained in a call argument (directly or in lists/tuples/dicts)"""
+    if isinstance(value, np.ndarray):
+        return [value]
+    if isinstance(value, (list, tuple)):
+        return [a for v in value for a in _arrays(v)]
+    if isinstance(value, dict):
+        return [a for v in value.values() for a in _arrays(v)]
+    return []
+
+
+def _aligned(n: int) -> int:
+    return -(-n // _ALIGN) * _ALIGN
+
+
+class SharedFrameBuffer:
+    """
+    Client-owned shared memory segment for one connection
+    
+    A connection carries one call at a time, so every call packs its
+    arrays from the start of the segment. The segment is replaced by a
+    larger one when a call does not fit; the host re-attaches by name.
+    """
+    
+    def __init__(self, size: int):
+        self.shm = shared_memory.SharedMemory(create=True, size=max(size, _ALIGN))
+    
+    @property
+    def name(self) -> str:
+        return self.shm.name
+    
+    def pack(self, value: Any) -> Any:
+        """Copy arrays in value into the segment, returning value with ShmRefs in their place"""
+        needed = sum(_aligned(a.nbytes) for a in _arrays(value))
+        if needed > self.shm.size:
+            self._grow(needed)
+        self._offset = 0
+        return self._pack(value)
+    
+    def _pack(self, value: Any) -> Any:
+        if isinstance(value, np.ndarray):
+            ref = ShmRef(self._offset, value.shape, value.dtype.str)
+            view = np.ndarray(value.shape, dtype=value.dtype, buffer=self.shm.buf, offset=self._offset)
+            view[...] = value
+            self._offset += _aligned(value.nbytes)
+            return ref
+        if isinstance(value, list):
+            return [self._pack(v) for v in value]
+        if isinstance(value, tuple):
+            return tuple(self._pack(v) for v in value)
+        if isinstance(value, dict):
+            return {k: self._pack(v) for k, v in value.items()}
+        return value
+    
+    def _grow(self, needed: int) -> None:
+        size = max(needed, self.shm.size * 2)
+        logger.info(f"Growing shared frame buffer to {size / 1024 ** 2:.0f} MiB")
+        self.close()
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+    
+    def close(self) -> None:
+        """Release and remove the segment"""
+        try:
+            self.shm.close()
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Map a client's segment in the model host
+    
+    The client owns and unlinks the segment, so the host stops the
+    resource tracker from removing it when the host exits.
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+def unpack(value: Any, shm: shared_memory.SharedMemory) -> Any:
+    """Replace ShmRefs with numpy views into the attached segment"""
+    if isinstance(value, ShmRef):
+        return np.ndarray(value.shape, dtype=np.dtype(value.dtype), buffer=shm.buf, offset=value.offset)
+    if isinstance(value, list):
+        return [unpack(v, shm) for v in value]
+    if isinstance(value, tuple):
+        return tuple(unpack(v, shm) for v in value)
+    if isinstance(value, dict):
+        return {k: unpack(v, shm) for k, v in value.items()}
+    return value
@@ -0,0 +1,25 @@
+"""Job queue exports"""
+
+from .queue import (
+    InMemoryJobQueue,
+    Job,
+    JobQueue,
+    JobStatus,
+    RedisJobQueue,
+    get_job_queue,
+    set_job_queue,
+)
+from .worker import execute_job, run_worker, start_embedded_workers
+
+__all__ = [
+    "InMemoryJobQueue",
+    "Job",
+    "JobQueue",
+    "JobStatus",
+    "RedisJobQueue",
+    "get_job_queue",
+    "set_job_queue",
+    "execute_job",
+    "run_worker",
+    "start_embedded_workers",
+]
@@ -0,0 +1,402 @@
+"""
+Annotation job queue
+Jobs are submitted by the API, consumed by worker processes, and polled by
+clients. A Redis backend is used in production; an in-process backend
+serves local development and tests.
+"""
+
+import json
+import logging
+import os
+import queue as queue_module
+import socket
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from enum import Enum
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+
+from ..config import (
+    JOB_BACKEND,
+    JOB_HEARTBEAT_TTL_SEC,
+    JOB_MAX_ATTEMPTS,
+    JOB_RESULT_TTL_SEC,
+    REDIS_URL,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class Job(BaseModel):
+    """Queued annotation job"""
+    id: str
+    kind: str                      # "video" or "audio"
+    status: JobStatus = JobStatus.QUEUED
+    input_path: str
+    keep_input: bool = False       # Local file named by the request, not removed by the worker
+    params: Dict[str, Any] = {}
+    progress: float = 0.0          # 0.0 - 1.0
+    attempts: int = 0              # Times a worker has started the job
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+class JobQueue(ABC):
+    """Abstract job queue shared by the API and workers"""
+    
+    def submit(self, kind: str, input_path: str, params: Dict[str, Any], keep_input: bool = False) -> Job:
+        """Create a job and enqueue it"""
+        job = Job(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            input_path=input_path,
+            keep_input=keep_input,
+            params=params,
+            created_at=time.time(),
+        )
+        self._enqueue(job)
+        return job
+    
+    @abstractmethod
+    def _enqueue(self, job: Job) -> None:
+        pass
+    
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by id"""
+        pass
+    
+    @abstractmethod
+    def next(self, timeout: float = 5.0) -> Optional[Job]:
+        """Block until a job is available and claim it for this worker"""
+        pass
+    
+    @abstractmethod
+    def start(self, job_id: str) -> Job:
+        """Mark a claimed job running, once the worker is ready to run it"""
+        pass
+    
+    @abstractmethod
+    def set_progress(self, job_id: str, progress: float) -> None:
+        """Record job progress (0.0 - 1.0)"""
+        pass
+    
+    @abstractmethod
+    def complete(self, job_id: str, annotations: List[Dict[str, Any]]) -> None:
+        """Store results and mark the job completed"""
+        pass
+    
+    @abstractmethod
+    def fail(self, job_id: str, error: str) -> None:
+        """Mark the job failed"""
+        pass
+    
+    @abstractmethod
+    def result(self, job_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Annotations of a completed job"""
+        pass
+    
+    @abstractmethod
+    def depth(self) -> int:
+        """Number of jobs waiting to be picked up"""
+        pass
+    
+    def reap(self) -> List[Job]:
+        """
+        Recover the jobs of workers that died while running them
+        
+        Returns:
+            Jobs failed because they ran out of attempts; their inputs
+            are left for the caller to remove
+        """
+        return []
+
+
+class InMemoryJobQueue(JobQueue):
+    """In-process queue for development and tests"""
+    
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+        self._results: Dict[str, List[Dict[str, Any]]] = {}
+        self._pending: "queue_module.Queue[str]" = queue_module.Queue()
+        self._lock = threading.Lock()
+    
+    def _enqueue(self, job: Job) -> None:
+        with self._lock:
+            self._jobs[job.id] = job
+        self._pending.put(job.id)
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.model_copy() if job else None
+    
+    def next(self, timeout: float = 5.0) -> Optional[Job]:
+        try:
+            job_id = self._pending.get(timeout=timeout)
+        except queue_module.Empty:
+            return None
+        with self._lock:
+            return self._jobs[job_id].model_copy()
+    
+    def start(self, job_id: str) -> Job:
+        with self._lock:
+            job = self._jobs[job_id]
+            job.status = JobStatus.RUNNING
+            job.started_at = time.time()
+            job.attempts += 1
+            return job.model_copy()
+    
+    def set_progress(self, job_id: str, progress: float) -> None:
+        with self._lock:
+            self._jobs[job_id].progress = progress
+    
+    def complete(self, job_id: str, annotations: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._results[job_id] = annotations
+            job = self._jobs[job_id]
+            job.status = JobStatus.COMPLETED
+            job.progress = 1.0
+            job.finished_at = time.time()
+    
+    def fail(self, job_id: str, error: str) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job.status = JobStatus.FAILED
+            job.error = error
+            job.finished_at = time.time()
+    
+    def result(self, job_id: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            return self._results.get(job_id)
+    
+    def depth(self) -> int:
+        return self._pending.qsize()
+
+
+class RedisJobQueue(JobQueue):
+    """
+    Redis-backed queue
+    
+    Job state lives in a hash per job, results under a separate key so
+    polling never transfers them, and pending ids in a list. A worker
+    takes an id with BLMOVE into its own processing list, where it stays
+    until the job completes or fails, and keeps a heartbeat key alive
+    while it runs. reap() hands the processing lists of workers whose
+    heartbeat expired back to the queue, so a crashed or restarted
+    worker's jobs are not stuck as running. Any redis-py compatible
+    client works, including fakeredis.
+    """
+    
+    QUEUE_KEY = "annotator:jobs:queue"
+    PROCESSING_PREFIX = "annotator:jobs:processing:"
+    HEARTBEAT_PREFIX = "annotator:worker:"
+    
+    def __init__(
+        self,
+        client: Any = None,
+        url: str = REDIS_URL,
+        ttl_sec: int = JOB_RESULT_TTL_SEC,
+        heartbeat_ttl_sec: int = JOB_HEARTBEAT_TTL_SEC,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+    ):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url, decode_responses=True)
+        self._redis = client
+        self.ttl_sec = ttl_sec
+        self.heartbeat_ttl_sec = max(1, heartbeat_ttl_sec)
+        self.max_attempts = max(1, max_attempts)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._heartbeat: Optional[threading.Thread] = None
+        self._heartbeat_lock = threading.Lock()
+    
+    @property
+    def _processing_key(self) -> str:
+        return self.PROCESSING_PREFIX + self.worker_id
+    
+    @staticmethod
+    def _job_key(job_id: str) -> str:
+        return f"annotator:job:{job_id}"
+    
+    @staticmethod
+    def _result_key(job_id: str) -> str:
+        return f"annotator:job:{job_id}:result"
+    
+    def _enqueue(self, job: Job) -> None:
+        pipe = self._redis.pipeline()
+        pipe.hset(self._job_key(job.id), mapping={"data": job.model_dump_json()})
+        pipe.expire(self._job_key(job.id), self.ttl_sec)
+        pipe.rpush(self.QUEUE_KEY, job.id)
+        pipe.execute()
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        fields = self._redis.hgetall(self._job_key(job_id))
+        if not fields:
+            return None
+        fields = {self._text(k): self._text(v) for k, v in fields.items()}
+        job = Job.model_validate_json(fields["data"])
+        
+        # Progress is written to its own field to keep updates cheap
+        if "progress" in fields:
+            job.progress = float(fields["progress"])
+        return job
+    
+    def next(self, timeout: float = 5.0) -> Optional[Job]:
+        self._start_heartbeat()
+        job_id = self._redis.blmove(
+            self.QUEUE_KEY, self._processing_key, max(1, int(timeout)), "LEFT", "RIGHT"
+        )
+        if job_id is None:
+            return None
+        job_id = self._text(job_id)
+        job = self.get(job_id)
+        if job is None:
+            # Expired before a worker got to it
+            self._redis.lrem(self._processing_key, 0, job_id)
+            return None
+        return job
+    
+    def start(self, job_id: str) -> Job:
+        job = self.get(job_id)
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+        job.attempts += 1
+        self._save(job)
+        return job
+    
+    def set_progress(self, job_id: str, progress: float) -> None:
+        self._redis.hset(self._job_key(job_id), "progress", progress)
+    
+    def complete(self, job_id: str, annotations: List[Dict[str, Any]]) -> None:
+        job = self.get(job_id)
+        job.status = JobStatus.COMPLETED
+        job.progress = 1.0
+        job.finished_at = time.time()
+        self._redis.set(self._result_key(job_id), json.dumps(annotations), ex=self.ttl_sec)
+        self._save(job)
+        self._redis.lrem(self._processing_key, 0, job_id)
+    
+    def fail(self, job_id: str, error: str) -> None:
+        job = self.get(job_id)
+        if job is not None:
+            job.status = JobStatus.FAILED
+            job.error = error
+            job.finished_at = time.time()
+            self._save(job)
+        self._redis.lrem(self._processing_key, 0, job_id)
+    
+    def result(self, job_id: str) -> Optional[List[Dict[str, Any]]]:
+        raw = self._redis.get(self._result_key(job_id))
+        return json.loads(raw) if raw is not None else None
+    
+    def depth(self) -> int:
+        return int(self._redis.llen(self.QUEUE_KEY))
+    
+    def reap(self) -> List[Job]:
+        """
+        Requeue the running jobs of workers whose heartbeat has expired
+        
+        A job that has already been started max_attempts times is failed
+        instead, so one that kills its worker does not take the others
+        down in turn. Ids are popped one at a time, so concurrent reapers
+        never recover the same job twice.
+        """
+        failed = []
+        for key in self._redis.scan_iter(match=self.PROCESSING_PREFIX + "*"):
+            key = self._text(key)
+            worker_id = key[len(self.PROCESSING_PREFIX):]
+            if worker_id == self.worker_id or self._redis.exists(self.HEARTBEAT_PREFIX + worker_id):
+                continue
+            while True:
+                job_id = self._redis.lpop(key)
+                if job_id is None:
+                    break
+                job = self.get(self._text(job_id))
+                if job is None:
+                    continue
+                if job.attempts >= self.max_attempts:
+                    logger.warning(f"Job {job.id} was running on dead worker {worker_id}; giving up after {job.attempts} attempts")
+                    job.status = JobStatus.FAILED
+                    job.error = f"Worker died while running the job ({job.attempts} attempts)"
+                    job.finished_at = time.time()
+                    self._save(job)
+                    failed.append(job)
+                else:
+                    logger.warning(f"Requeueing job {job.id} from dead worker {worker_id}")
+                    job.status = JobStatus.QUEUED
+                    job.progress = 0.0
+                    job.started_at = None
+                    self._save(job)
+                    self._redis.rpush(self.QUEUE_KEY, job.id)
+        return failed
+    
+    def _start_heartbeat(self) -> None:
+        """Keep this worker's heartbeat key alive for as long as the process runs"""
+        with self._heartbeat_lock:
+            if self._heartbeat is not None:
+                return
+            self._beat()
+            self._heartbeat = threading.Thread(target=self._beat_forever, name="job-heartbeat", daemon=True)
+            self._heartbeat.start()
+    
+    def _beat(self) -> None:
+        self._redis.set(self.HEARTBEAT_PREFIX + self.worker_id, time.time(), ex=self.heartbeat_ttl_sec)
+    
+    def _beat_forever(self) -> None:
+        while True:
+            time.sleep(self.heartbeat_ttl_sec / 3)
+            try:
+                self._beat()
+            except Exception as e:
+                logger.warning(f"Job worker heartbeat failed: {e}")
+    
+    def _save(self, job: Job) -> None:
+        pipe = self._redis.pipeline()
+        pipe.hset(self._job_key(job.id), mapping={
+            "data": job.model_dump_json(),
+            "progress": job.progress,
+        })
+        pipe.expire(self._job_key(job.id), self.ttl_sec)
+        pipe.execute()
+    
+    @staticmethod
+    def _text(value: Any) -> str:
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Process-wide job queue for the configured backend"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            if JOB_BACKEND == "redis":
+                _queue = RedisJobQueue()
+            elif JOB_BACKEND == "memory":
+                _queue = InMemoryJobQueue()
+            else:
+                raise ValueError(f"Unknown JOB_BACKEND: {JOB_BACKEND}")
+            logger.info(f"Using {JOB_BACKEND} job queue")
+        return _queue
+
+
+def set_job_queue(job_queue: Optional[JobQueue]) -> None:
+    """Override the process-wide queue (e.g. with a fakeredis-backed one in tests)"""
+    global _queue
+    with _queue_lock:
+        _queue = job_queue
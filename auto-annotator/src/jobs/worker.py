@@ -0,0 +1,155 @@
+"""
+Annotation job worker
+Consumes the job queue and runs the video/audio pipelines
+
+Run standalone with:
+    python -m src.jobs.worker
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+from .queue import Job, JobQueue, get_job_queue
+from ..admission import get_admission_controller
+from ..config import JOB_HEARTBEAT_TTL_SEC, JOB_PROGRESS_INTERVAL_SEC
+from ..pipeline import annotate_audio_file, annotate_video_file, audio_annotators, video_annotators
+
+logger = logging.getLogger(__name__)
+
+
+def _progress_reporter(job_queue: JobQueue, job_id: str) -> Callable[[int, int], None]:
+    """Progress callback that writes to the queue at most every JOB_PROGRESS_INTERVAL_SEC"""
+    last_report = [0.0]
+    
+    def report(done: int, total: int) -> None:
+        now = time.monotonic()
+        if total <= 0 or now - last_report[0] < JOB_PROGRESS_INTERVAL_SEC:
+            return
+        last_report[0] = now
+        job_queue.set_progress(job_id, min(done / total, 0.99))
+    
+    return report
+
+
+def release_input(job: Job) -> None:
+    """Remove a job's spooled input file; local inputs named by the request are kept"""
+    if job.keep_input:
+        return
+    try:
+        os.unlink(job.input_path)
+    except FileNotFoundError:
+        pass
+
+
+def reap_jobs(job_queue: JobQueue) -> None:
+    """Recover jobs of dead workers, removing the inputs of those given up on"""
+    try:
+        failed = job_queue.reap()
+    except Exception as e:
+        logger.warning(f"Reaping dead workers' jobs failed: {e}")
+        return
+    for job in failed:
+        release_input(job)
+
+
+def execute_job(job: Job, job_queue: JobQueue, get_annotator: Callable[[str], Any]) -> None:
+    """
+    Run a single job and record its outcome; a spooled input file is removed afterwards
+    
+    The job first waits, still queued, for the same endpoint and
+    annotator admission slots a request would take, and holds them
+    while it runs.
+    """
+    ticket = None
+    try:
+        if job.kind == "video":
+            annotators = video_annotators(**job.params)
+        elif job.kind == "audio":
+            annotators = audio_annotators(**job.params)
+        else:
+            raise ValueError(f"Unknown job kind: {job.kind}")
+        ticket = get_admission_controller().admit_job(job.kind, annotators)
+        job = job_queue.start(job.id)
+        logger.info(f"Running {job.kind} job {job.id}")
+        
+        if job.kind == "video":
+            annotations = annotate_video_file(
+                job.input_path,
+                get_annotator,
+                on_progress=_progress_reporter(job_queue, job.id),
+                **job.params,
+            )
+        else:
+            annotations = annotate_audio_file(job.input_path, get_annotator, **job.params)
+        
+        job_queue.complete(job.id, annotations)
+        logger.info(f"Job {job.id} completed with {len(annotations)} annotations")
+    except Exception as e:
+        logger.error(f"Job {job.id} failed: {e}")
+        job_queue.fail(job.id, str(e))
+    finally:
+        if ticket is not None:
+            ticket.release()
+        release_input(job)
+
+
+def run_worker(
+    job_queue: JobQueue,
+    get_annotator: Callable[[str], Any],
+    stop_event: Optional[threading.Event] = None,
+    poll_timeout: float = 5.0,
+) -> None:
+    """
+    Consume jobs until stop_event is set
+    
+    Every JOB_HEARTBEAT_TTL_SEC (checked between jobs), the jobs of
+    workers that died mid-job are recovered (see JobQueue.reap).
+    """
+    stop_event = stop_event or threading.Event()
+    next_reap = 0.0
+    while not stop_event.is_set():
+        if time.monotonic() >= next_reap:
+            reap_jobs(job_queue)
+            next_reap = time.monotonic() + JOB_HEARTBEAT_TTL_SEC
+        job = job_queue.next(timeout=poll_timeout)
+        if job is not None:
+            execute_job(job, job_queue, get_annotator)
+
+
+def start_embedded_workers(
+    count: int,
+    job_queue: JobQueue,
+    get_annotator: Callable[[str], Any],
+    stop_event: threading.Event,
+) -> List[threading.Thread]:
+    """Start worker threads inside the API process"""
+    threads = []
+    for i in range(count):
+        thread = threading.Thread(
+            target=run_worker,
+            args=(job_queue, get_annotator, stop_event, 1.0),
+            name=f"job-worker-{i}",
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+    return threads
+
+
+def main() -> None:
+    """Standalone worker process entry point"""
+    from ..main import get_annotator
+    
+    logging.basicConfig(level=logging.INFO)
+    logger.info("Worker ready, waiting for jobs")
+    try:
+        run_worker(get_job_queue(), get_annotator)
+    except KeyboardInterrupt:
+        logger.info("Worker stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,58 +3,73 @@ Harbor ML Auto-Annotator Microservice
 FastAPI entry point for ML annotation services
 """
 
+import asyncio
 import os
+import threading
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 import logging
 
 from .api import router as api_router
-from .annotators import (
-    HandPoseAnnotator,
-    ObjectDetector,
-    ActionRecognizer,
-    SceneSegmenter,
-    SpeechAnnotator,
-    TranscriptAnnotator,
-)
+from .api.batching import close_batchers
+from .api.jobs import router as jobs_router
+from .api.uploads import UploadLimitMiddleware
+from .admission import get_admission_controller
+from .cache import get_result_cache
+from .config import EMBEDDED_JOB_WORKERS
+from .executors import shutdown_executors
+from .jobs import get_job_queue, start_embedded_workers
+from .metrics import MetricsMiddleware, register_service_collector, render
+from .model_manager import ModelManager
+from .pipeline.chunked import shutdown_chunk_pool
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Global annotator instances
-annotators: Dict[str, Any] = {}
+# Annotators are created on first request and their models loaded on first
+# use; the manager unloads least recently used models over the memory budget
+model_manager = ModelManager()
+annotators = model_manager.annotators
+register_service_collector(model_manager)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Load ML models on startup, cleanup on shutdown"""
-    logger.info("Loading ML models...")
+    """Preload models and start job workers on startup, release models on shutdown"""
+    if model_manager.budget_bytes:
+        logger.info(f"Model memory budget: {model_manager.budget_bytes / 1024 ** 2:.0f} MiB")
     
-    try:
-        # Initialize annotators (lazy loading for GPU efficiency)
-        annotators["hand_pose"] = HandPoseAnnotator()
-        annotators["object"] = ObjectDetector()
-        annotators["action"] = ActionRecognizer()
-        annotators["scene"] = SceneSegmenter()
-        annotators["speech"] = SpeechAnnotator()
-        annotators["transcript"] = TranscriptAnnotator()
-        
-        logger.info("All models loaded successfully")
-    except Exception as e:
-        logger.error(f"Error loading models: {e}")
-        raise
+    # Models listed in PRELOAD_MODELS load and warm up in parallel in the
+    # background; /ready reports 503 until they are done
+    model_manager.start_preload()
+    
+    # In-process job workers (the redis backend normally uses src.jobs.worker processes)
+    # take their admission slots on this loop, alongside the requests
+    get_admission_controller().bind_loop(asyncio.get_running_loop())
+    stop_workers = threading.Event()
+    worker_threads = start_embedded_workers(
+        EMBEDDED_JOB_WORKERS, get_job_queue(), get_annotator, stop_workers
+    )
     
     yield
     
     # Cleanup
+    stop_workers.set()
+    for thread in worker_threads:
+        thread.join(timeout=5.0)
+    
+    # Batched requests still in flight need the executors
+    await close_batchers()
+    shutdown_executors()
+    shutdown_chunk_pool()
+    
     logger.info("Shutting down annotators...")
-    for name, annotator in annotators.items():
-        if hasattr(annotator, "cleanup"):
-            annotator.cleanup()
+    model_manager.unload_all()
 
 
 # Create FastAPI app
@@ -73,22 +88,49 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+# Video/audio uploads over MAX_UPLOAD_BYTES are refused before their body is read
+app.add_middleware(
+    UploadLimitMiddleware,
+    paths=["/api/annotate/video", "/api/annotate/audio", "/api/annotate/asr", "/api/jobs"],
+)
 
 # Include API routes
 app.include_router(api_router, prefix="/api")
+app.include_router(jobs_router, prefix="/api")
 
 
 # Health check
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    cache = get_result_cache()
+    admission = get_admission_controller().stats()
     return {
         "status": "healthy",
-        "models_loaded": list(annotators.keys()),
+        "accepting": admission["accepting"],
+        "models_loaded": model_manager.loaded(),
+        "models": model_manager.stats(),
         "gpu_available": _check_gpu(),
+        "result_cache": cache.stats() if cache else None,
+        "admission": admission,
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until every preloaded model is loaded and warmed up"""
+    readiness = model_manager.readiness()
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics"""
+    body, content_type = render()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/models")
 async def list_models():
     """List available annotation models"""
@@ -97,34 +139,44 @@ async def list_models():
             "hand_pose": {
                 "name": "MediaPipe Hands",
                 "version": "0.10.7",
-                "loaded": "hand_pose" in annotators,
+                "loaded": model_manager.is_loaded("hand_pose"),
             },
             "object_detection": {
                 "name": "YOLOv8",
                 "version": "8.0.0",
-                "loaded": "object" in annotators,
+                "loaded": model_manager.is_loaded("object"),
             },
             "action_recognition": {
                 "name": "TimesFormer",
                 "version": "1.0.0",
-                "loaded": "action" in annotators,
+                "loaded": model_manager.is_loaded("action"),
             },
             "scene_segmentation": {
                 "name": "PySceneDetect",
                 "version": "0.6.2",
-                "loaded": "scene" in annotators,
+                "loaded": model_manager.is_loaded("scene"),
+            },
+            "sam3_segmentation": {
+                "name": "SAM3",
+                "version": "3.0",
+                "loaded": model_manager.is_loaded("sam3"),
+            },
+            "dense_captioning": {
+                "name": "LiveCC",
+                "version": "1.0",
+                "loaded": model_manager.is_loaded("livecc"),
             },
         },
         "audio": {
             "vad_diarization": {
                 "name": "pyannote.audio",
                 "version": "3.0.0",
-                "loaded": "speech" in annotators,
+                "loaded": model_manager.is_loaded("speech"),
             },
             "asr": {
                 "name": "Whisper",
                 "version": "large-v3",
-                "loaded": "transcript" in annotators,
+                "loaded": model_manager.is_loaded("transcript"),
             },
         },
     }
@@ -142,6 +194,7 @@ def _check_gpu() -> bool:
 # Export annotators for route handlers
 def get_annotator(name: str):
     """Get annotator instance by name"""
-    if name not in annotators:
-        raise HTTPException(status_code=500, detail=f"Annotator {name} not loaded")
-    return annotators[name]
+    try:
+        return model_manager.get(name)
+    except KeyError:
+        raise HTTPException(status_code=500, detail=f"Annotator {name} not available")
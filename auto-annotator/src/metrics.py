@@ -0,0 +1,251 @@
+"""
+Prometheus metrics
+Inference latency is recorded by a wrapper around every annotator's
+annotate/annotate_batch, frame throughput by the frame bus (flushed in
+batches, not per frame) and HTTP activity by an ASGI middleware. Model,
+cache, pool and queue state is read from its owners only when /metrics is
+scraped, so it costs nothing between scrapes.
+
+With several gunicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty
+directory so counters and histograms are aggregated across workers.
+"""
+
+import functools
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+# Spans a single MediaPipe call (~ms) up to a LiveCC segment or Whisper file (~minutes)
+INFERENCE_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0,
+)
+REQUEST_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+INFERENCE_SECONDS = Histogram(
+    "annotator_inference_seconds",
+    "Wall time of annotator annotate/annotate_batch calls",
+    ["annotator", "method"],
+    buckets=INFERENCE_BUCKETS,
+)
+FRAMES_DECODED = Counter(
+    "annotator_frames_decoded_total",
+    "Video frames decoded by the frame bus (retrieved, or grabbed past between samples)",
+)
+FRAMES_ANNOTATED = Counter(
+    "annotator_frames_annotated_total",
+    "Decoded frames handed to each annotation sink",
+    ["annotation_type"],
+)
+CACHE_LOOKUPS = Counter(
+    "annotator_result_cache_lookups_total",
+    "Result cache lookups by annotation type and outcome",
+    ["annotation_type", "result"],
+)
+HTTP_IN_FLIGHT = Gauge(
+    "annotator_http_requests_in_flight",
+    "HTTP requests currently being handled",
+    multiprocess_mode="livesum",
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "annotator_http_request_seconds",
+    "Time until the response started, by route template and status",
+    ["route", "status"],
+    buckets=REQUEST_BUCKETS,
+)
+
+# (annotator, method) -> histogram child, so the hot path skips labels()
+_inference_children: Dict[Tuple[str, str], Any] = {}
+
+
+def timed_inference(method: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Wrap an annotator method so each call is recorded in INFERENCE_SECONDS
+    
+    The annotator label is the model registry name when the annotator is
+    managed, else its class name.
+    """
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(self, *args, **kwargs)
+        finally:
+            label = (self._registry_name or type(self).__name__, method)
+            child = _inference_children.get(label)
+            if child is None:
+                child = _inference_children[label] = INFERENCE_SECONDS.labels(*label)
+            child.observe(time.perf_counter() - started)
+    
+    return wrapper
+
+
+def record_frames(decoded: int, annotated: Dict[str, int]) -> None:
+    """Add a batch of frame counts from the frame bus"""
+    if decoded:
+        FRAMES_DECODED.inc(decoded)
+    for annotation_type, count in annotated.items():
+        if count:
+            FRAMES_ANNOTATED.labels(annotation_type).inc(count)
+
+
+def record_cache_lookup(annotation_type: str, hit: bool) -> None:
+    CACHE_LOOKUPS.labels(annotation_type, "hit" if hit else "miss").inc()
+
+
+class MetricsMiddleware:
+    """ASGI middleware tracking in-flight requests and time to response start"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status = [500]
+        
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                # Route is resolved by now; streaming bodies are not included
+                route = getattr(scope.get("route"), "path", "unmatched")
+                HTTP_REQUEST_SECONDS.labels(route, str(status[0])).observe(time.perf_counter() - started)
+            await send(message)
+        
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+
+
+class ServiceCollector:
+    """Scrape-time view of model, cache, pool and job queue state"""
+    
+    def __init__(self, model_manager):
+        self.model_manager = model_manager
+    
+    def collect(self) -> Iterator[Any]:
+        from .admission import get_admission_controller
+        from .cache import get_result_cache
+        from .executors import pool_stats
+        from .jobs import get_job_queue
+        
+        yield from self._models()
+        
+        cache = get_result_cache()
+        if cache is not None:
+            stats = cache.stats()
+            for field in ("hits", "misses", "evictions"):
+                counter = CounterMetricFamily(
+                    f"annotator_result_cache_{field}", f"Result cache {field} in this process"
+                )
+                counter.add_metric([], stats[field])
+                yield counter
+            yield _gauge("annotator_result_cache_hit_ratio", "Result cache hits / lookups", stats["hit_ratio"])
+            yield _gauge("annotator_result_cache_size_bytes", "Result cache size", stats["size_bytes"])
+        
+        queued = GaugeMetricFamily(
+            "annotator_pool_queue_depth", "Calls waiting for a worker in each executor pool", labels=["pool"]
+        )
+        workers = GaugeMetricFamily("annotator_pool_workers", "Threads in each executor pool", labels=["pool"])
+        for name, stats in pool_stats().items():
+            queued.add_metric([name], stats["queued"])
+            workers.add_metric([name], stats["workers"])
+        yield queued
+        yield workers
+        
+        try:
+            depth = get_job_queue().depth()
+        except Exception as e:
+            logger.warning(f"Could not read job queue depth: {e}")
+            depth = None
+        yield _gauge("annotator_job_queue_depth", "Jobs waiting in the job queue", depth)
+        
+        yield from self._admission(get_admission_controller().stats())
+    
+    def _admission(self, stats: Dict[str, Any]) -> Iterator[Any]:
+        gauges = {
+            field: GaugeMetricFamily(f"annotator_admission_{field}", help_text, labels=["limit"])
+            for field, help_text in (
+                ("limit", "Concurrent requests allowed by each admission limit"),
+                ("active", "Requests holding a slot of each admission limit"),
+                ("queued", "Requests waiting for a slot of each admission limit"),
+            )
+        }
+        turned_away = CounterMetricFamily(
+            "annotator_admission_rejected", "Requests turned away by each admission limit", labels=["limit", "reason"]
+        )
+        for name, limit in stats["limits"].items():
+            for field, gauge in gauges.items():
+                gauge.add_metric([name], limit[field])
+            turned_away.add_metric([name, "queue_full"], limit["rejected"])
+            turned_away.add_metric([name, "timeout"], limit["timed_out"])
+        yield from gauges.values()
+        yield turned_away
+    
+    def _models(self) -> Iterator[Any]:
+        stats = self.model_manager.stats()
+        families = {
+            field: GaugeMetricFamily(f"annotator_model_{field}", help_text, labels=["model"])
+            for field, help_text in (
+                ("loaded", "Whether the model is in memory"),
+                ("load_seconds", "Duration of the model's last load"),
+                ("warmup_seconds", "Duration of the model's warm-up inference"),
+                ("memory_bytes", "Measured footprint of the model's last load"),
+            )
+        }
+        for name, model in stats["models"].items():
+            for field, family in families.items():
+                value = model[field]
+                if value is not None:
+                    family.add_metric([name], float(value))
+        yield from families.values()
+        
+        evictions = CounterMetricFamily("annotator_model_evictions", "Models unloaded to stay within the budget")
+        evictions.add_metric([], stats["evictions"])
+        yield evictions
+        yield _gauge("annotator_model_resident_bytes", "Measured footprint of loaded models", stats["resident_bytes"])
+
+
+def _gauge(name: str, help_text: str, value: Optional[float]) -> GaugeMetricFamily:
+    gauge = GaugeMetricFamily(name, help_text)
+    if value is not None:
+        gauge.add_metric([], float(value))
+    return gauge
+
+
+_registry: Optional[CollectorRegistry] = None
+
+
+def register_service_collector(model_manager) -> None:
+    """Expose model_manager and shared service state on /metrics"""
+    global _registry
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        _registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(_registry)
+    else:
+        _registry = REGISTRY
+    _registry.register(ServiceCollector(model_manager))
+
+
+def render() -> Tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, with its content type"""
+    return generate_latest(_registry or REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,330 @@
+"""
+Model manager
+Creates annotators on first request, loads their models on first use (or
+in parallel at startup, with a warm-up inference) and keeps the total
+resident size under a memory budget by unloading the least recently used
+models. Loads and warm-ups run on the model's own executor pool. An
+unload waits until every worker of that pool is idle (executors.
+submit_exclusive), so a model is never torn down under an inference call,
+however many workers its pool has.
+"""
+
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from .annotators import (
+    BaseAnnotator,
+    HandPoseAnnotator,
+    ObjectDetector,
+    ActionRecognizer,
+    SceneSegmenter,
+    SpeechAnnotator,
+    TranscriptAnnotator,
+    SAM3Annotator,
+    LiveCCAnnotator,
+)
+from .config import INFERENCE_REMOTE_MODELS, MODEL_MEMORY_BUDGET_BYTES, MODEL_WARMUP, PRELOAD_MODELS
+from .executors import submit, submit_exclusive
+
+logger = logging.getLogger(__name__)
+
+# Registry name -> factory; names double as executor pool names
+ANNOTATOR_FACTORIES: Dict[str, Callable[[], BaseAnnotator]] = {
+    "hand_pose": HandPoseAnnotator,
+    "object": ObjectDetector,
+    "action": ActionRecognizer,
+    "scene": SceneSegmenter,
+    "speech": SpeechAnnotator,
+    "transcript": TranscriptAnnotator,
+    "sam3": SAM3Annotator,
+    "livecc": LiveCCAnnotator,
+}
+
+# Annotators the video pipeline drives locally (SceneSink runs the detector itself)
+LOCAL_ONLY = {"scene"}
+
+
+def annotator_factories(remote: List[str] = INFERENCE_REMOTE_MODELS) -> Dict[str, Callable[[], BaseAnnotator]]:
+    """
+    Registry with the named annotators served by shared model hosts
+    
+    Args:
+        remote: Registry names to proxy to `python -m src.inference.host <name>`,
+            or ["all"]
+            
+    Returns:
+        Registry name -> factory
+    """
+    from .inference import RemoteAnnotator
+    
+    factories = dict(ANNOTATOR_FACTORIES)
+    names = [n for n in ANNOTATOR_FACTORIES if n not in LOCAL_ONLY] if remote == ["all"] else remote
+    for name in names:
+        if name in LOCAL_ONLY or name not in factories:
+            logger.warning(f"Annotator {name} cannot be served by a model host; loading it locally")
+            continue
+        factories[name] = functools.partial(RemoteAnnotator, name)
+    return factories
+
+
+def _resident_bytes() -> int:
+    """Current process RSS (0 where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _gpu_bytes() -> int:
+    """CUDA memory allocated by torch, if torch is already in use"""
+    torch = sys.modules.get("torch")
+    if torch is None:
+        return 0
+    try:
+        return torch.cuda.memory_allocated() if torch.cuda.is_available() else 0
+    except Exception:
+        return 0
+
+
+class ModelManager:
+    """
+    Lazily loaded annotators under a shared memory budget
+    
+    Each model's footprint is measured as the RSS plus CUDA allocation
+    growth across its load_model() call. With a budget set, loads are
+    serialised so the delta is attributable (concurrent inference still
+    makes it approximate); without one, different models load in
+    parallel and the sizes are indicative only. Freed host memory is reused by later loads even when
+    the allocator does not return it to the OS.
+    """
+    
+    def __init__(
+        self,
+        factories: Optional[Dict[str, Callable[[], BaseAnnotator]]] = None,
+        budget_bytes: int = MODEL_MEMORY_BUDGET_BYTES,
+    ):
+        self.factories = dict(factories) if factories is not None else annotator_factories()
+        self.budget_bytes = budget_bytes
+        self.annotators: Dict[str, BaseAnnotator] = {}
+        self._names: Dict[int, str] = {}
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._model_locks: Dict[str, threading.Lock] = {}
+        
+        # Loaded models in least-recently-used order, with their measured size
+        self._resident: "OrderedDict[str, int]" = OrderedDict()
+        self._evicting: Set[str] = set()
+        self._sizes: Dict[str, int] = {}
+        self._load_seconds: Dict[str, float] = {}
+        self._warmup_seconds: Dict[str, float] = {}
+        self._states: Dict[str, str] = {}
+        self._errors: Dict[str, str] = {}
+        self._preload: Dict[str, Future] = {}
+        self.evictions = 0
+    
+    def get(self, name: str) -> BaseAnnotator:
+        """
+        Annotator instance by registry name, created on first request
+        
+        The model itself loads on the annotator's first call.
+        
+        Raises:
+            KeyError: If no annotator is registered under name
+        """
+        with self._lock:
+            annotator = self.annotators.get(name)
+            if annotator is None:
+                if name not in self.factories:
+                    raise KeyError(name)
+                annotator = self.factories[name]()
+                self.register(name, annotator)
+            return annotator
+    
+    def register(self, name: str, annotator: BaseAnnotator) -> None:
+        """Put an existing annotator instance under this manager's control"""
+        with self._lock:
+            annotator._manager = self
+            annotator._registry_name = name
+            self.annotators[name] = annotator
+            self._names[id(annotator)] = name
+            self._model_locks.setdefault(name, threading.Lock())
+    
+    def touch(self, annotator: BaseAnnotator) -> None:
+        """Mark a model as used, loading it first if needed (called from ensure_loaded)"""
+        name = self._names[id(annotator)]
+        with self._lock:
+            if name in self._resident and annotator._is_loaded:
+                self._resident.move_to_end(name)
+                if name in self._evicting:
+                    # Used again before its unload ran; keep it and pick another victim
+                    self._evicting.discard(name)
+                    self._evict(keep=name)
+                return
+        self._load(name, annotator)
+    
+    def _load(self, name: str, annotator: BaseAnnotator) -> None:
+        measure_lock = self._load_lock if self.budget_bytes > 0 else nullcontext()
+        with self._model_locks[name], measure_lock:
+            if annotator._is_loaded:
+                # Loaded by another thread meanwhile, or before it was registered
+                with self._lock:
+                    self._resident[name] = self._sizes.get(name, 0)
+                    self._resident.move_to_end(name)
+                    self._evicting.discard(name)
+                return
+            
+            self._states[name] = "loading"
+            rss_before, gpu_before = _resident_bytes(), _gpu_bytes()
+            started = time.monotonic()
+            try:
+                annotator.load_model()
+            except Exception as e:
+                self._states[name] = "failed"
+                self._errors[name] = str(e)
+                raise
+            annotator._is_loaded = True
+            elapsed = time.monotonic() - started
+            size = max(0, _resident_bytes() - rss_before) + max(0, _gpu_bytes() - gpu_before)
+            
+            with self._lock:
+                self._states[name] = "ready"
+                self._errors.pop(name, None)
+                self._sizes[name] = size
+                self._load_seconds[name] = elapsed
+                self._resident[name] = size
+                self._evict(keep=name)
+        
+        logger.info(f"Loaded {name} in {elapsed:.1f}s ({size / 1024 ** 2:.0f} MiB resident)")
+    
+    def _evict(self, keep: str) -> None:
+        """Schedule least recently used models for unload until within budget; caller holds _lock"""
+        if self.budget_bytes <= 0:
+            return
+        
+        def retained() -> int:
+            return sum(size for n, size in self._resident.items() if n not in self._evicting)
+        
+        while retained() > self.budget_bytes:
+            victim = next((n for n in self._resident if n != keep and n not in self._evicting), None)
+            if victim is None:
+                logger.warning(
+                    f"{keep} alone uses {self._resident[keep] / 1024 ** 2:.0f} MiB, "
+                    f"over the {self.budget_bytes / 1024 ** 2:.0f} MiB model budget"
+                )
+                return
+            self._evicting.add(victim)
+            self.evictions += 1
+            logger.info(f"Evicting {victim} to stay within the model memory budget")
+            submit_exclusive(victim, self._unload, victim)
+    
+    def _unload(self, name: str) -> None:
+        """
+        Release a model, unless it was used again since eviction
+        
+        Runs with the model's pool drained. The manager lock only covers
+        the bookkeeping, so a slow cleanup() does not hold up other
+        models; the model's own lock makes a reload wait for it.
+        """
+        with self._model_locks[name]:
+            with self._lock:
+                if name not in self._evicting:
+                    return
+                self._evicting.discard(name)
+                self._resident.pop(name, None)
+                self._states[name] = "not_loaded"
+                annotator = self.annotators[name]
+            annotator.cleanup()
+    
+    def start_preload(self, names: List[str] = PRELOAD_MODELS, warmup: bool = MODEL_WARMUP) -> None:
+        """
+        Load (and optionally warm up) models in the background, in parallel
+        
+        Each model loads on its own executor pool. readiness() stays false
+        until every one of them has finished.
+        
+        Args:
+            names: Registry names, or ["all"] for every registered annotator
+            warmup: Run each annotator's synthetic warm-up inference after loading
+        """
+        if names == ["all"]:
+            names = list(self.factories)
+        for name in names:
+            if name not in self.factories:
+                logger.warning(f"Cannot preload unknown annotator {name}")
+                continue
+            self._states[name] = "queued"
+            self._preload[name] = submit(name, self._preload_one, name, warmup)
+    
+    def _preload_one(self, name: str, warmup: bool) -> None:
+        try:
+            annotator = self.get(name)
+            annotator.ensure_loaded()
+            if warmup:
+                self._states[name] = "warming_up"
+                started = time.monotonic()
+                annotator.warmup()
+                self._warmup_seconds[name] = time.monotonic() - started
+                logger.info(f"Warmed up {name} in {self._warmup_seconds[name]:.1f}s")
+            self._states[name] = "ready"
+        except Exception as e:
+            logger.error(f"Preloading {name} failed: {e}")
+            self._states[name] = "failed"
+            self._errors[name] = str(e)
+            raise
+    
+    def readiness(self) -> Dict[str, Any]:
+        """Whether every preloaded model is loaded and warmed up, with per-model state"""
+        ready = all(f.done() and f.exception() is None for f in self._preload.values())
+        return {
+            "ready": ready,
+            "models": {name: self._states.get(name, "not_loaded") for name in self._preload},
+        }
+    
+    def is_loaded(self, name: str) -> bool:
+        annotator = self.annotators.get(name)
+        return annotator is not None and annotator.is_loaded
+    
+    def loaded(self) -> List[str]:
+        """Names of models currently in memory"""
+        return [name for name in self.annotators if self.is_loaded(name)]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Per-model residency and the budget, for /health"""
+        with self._lock:
+            resident = dict(self._resident)
+            evicting = sorted(self._evicting)
+        return {
+            "budget_bytes": self.budget_bytes or None,
+            "resident_bytes": sum(resident.values()),
+            "pending_unload": evicting,
+            "evictions": self.evictions,
+            "models": {
+                name: {
+                    "state": self._states.get(name, "not_loaded"),
+                    "loaded": self.is_loaded(name),
+                    "memory_bytes": self._sizes.get(name),
+                    "load_seconds": self._load_seconds.get(name),
+                    "warmup_seconds": self._warmup_seconds.get(name),
+                    "error": self._errors.get(name),
+                }
+                for name in self.factories
+            },
+        }
+    
+    def unload_all(self) -> None:
+        """Release every model (shutdown)"""
+        with self._lock:
+            self._resident.clear()
+            self._evicting.clear()
+            self._states.clear()
+        for annotator in self.annotators.values():
+            annotator.cleanup()
@@ -0,0 +1,25 @@
+"""Annotation pipeline exports"""
+
+from .audio import annotate_audio_file, audio_annotators
+from .chunked import ChunkPlan, iter_chunked_annotations, plan_chunks
+from .frame_bus import Frame, FrameBus, FrameSink, VideoInfo
+from .video import annotate_video_file, build_video_sinks, iter_video_annotations, video_annotators
+from .windows import TimeRange, time_ranges
+
+__all__ = [
+    "ChunkPlan",
+    "Frame",
+    "TimeRange",
+    "FrameBus",
+    "FrameSink",
+    "VideoInfo",
+    "annotate_audio_file",
+    "annotate_video_file",
+    "audio_annotators",
+    "build_video_sinks",
+    "iter_chunked_annotations",
+    "iter_video_annotations",
+    "plan_chunks",
+    "time_ranges",
+    "video_annotators",
+]
@@ -0,0 +1,99 @@
+"""
+Audio annotation pipeline
+Runs VAD/diarization and ASR over an audio file; model calls are
+dispatched to each annotator's executor pool
+"""
+
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from ..annotators.batch import annotation_dicts
+from ..cache import ResultCache, cache_key, get_result_cache, hash_file
+from ..executors import run_sync
+from ..metrics import record_cache_lookup
+from ..timings import timed
+
+logger = logging.getLogger(__name__)
+
+
+def _run_cached(
+    cache: Optional[ResultCache],
+    media_hash: Optional[str],
+    annotation_type: str,
+    annotator: Any,
+    params: Dict[str, Any],
+    run: Callable[[], List[Any]],
+) -> List[Dict[str, Any]]:
+    """Return cached annotations for this annotator, or run it and store the result"""
+    key = None
+    if cache is not None:
+        key = cache_key(media_hash, annotation_type, annotator, params)
+        cached = cache.get(key)
+        record_cache_lookup(annotation_type, cached is not None)
+        if cached is not None:
+            return cached
+    
+    annotations = annotation_dicts(timed(f"inference.{annotation_type}", run)(), annotation_type)
+    if key is not None:
+        cache.put(key, annotations)
+    return annotations
+
+
+def audio_annotators(run_vad: bool = True, run_asr: bool = True, **_) -> List[str]:
+    """Registry names of the annotators annotate_audio_file uses for these toggles"""
+    return [name for enabled, name in ((run_vad, "speech"), (run_asr, "transcript")) if enabled]
+
+
+def annotate_audio_file(
+    audio_path: str,
+    get_annotator: Callable[[str], Any],
+    run_vad: bool = True,
+    run_diarization: bool = True,
+    run_asr: bool = True,
+    language: Optional[str] = None,
+    media_hash: Optional[str] = None,
+    use_cache: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Run the enabled audio annotators over a file
+    
+    Args:
+        audio_path: Path to audio file
+        get_annotator: Lookup for loaded annotator instances
+        run_*: Annotator toggles (see AudioAnnotationRequest)
+        language: Accepted for API compatibility; ASR uses the annotator's language
+        media_hash: SHA-256 of the file, if already known (hashed on demand otherwise)
+        use_cache: Read and populate the result cache
+        
+    Returns:
+        Annotation dicts tagged with their "type"
+    """
+    all_annotations = []
+    
+    cache = get_result_cache() if use_cache and (run_vad or run_asr) else None
+    if cache is not None:
+        media_hash = media_hash or hash_file(audio_path)
+    
+    # Speech detection (VAD + diarization)
+    if run_vad:
+        speech_annotator = get_annotator("speech")
+        all_annotations += _run_cached(
+            cache, media_hash, "speech_segment", speech_annotator,
+            {"run_diarization": run_diarization},
+            lambda: run_sync(
+                "speech",
+                speech_annotator.annotate,
+                audio_path,
+                run_diarization=run_diarization,
+            ),
+        )
+    
+    # ASR
+    if run_asr:
+        transcript_annotator = get_annotator("transcript")
+        all_annotations += _run_cached(
+            cache, media_hash, "transcript", transcript_annotator, {},
+            lambda: run_sync("transcript", transcript_annotator.annotate, audio_path),
+        )
+    
+    return all_annotations
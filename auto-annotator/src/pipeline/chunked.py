@@ -0,0 +1,295 @@
+"""
+Chunked video annotation
+Splits a long video at keyframes into one chunk per worker process and runs
+the frame bus over every chunk in parallel. Each sink sees the frames of its
+chunk_window(), so together the chunks produce the annotations of a serial
+pass: frame ids and timestamps are absolute, action windows and caption
+segments belong to the chunk they start in, and scene cuts are filtered
+across the whole video by SceneStitcher.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .frame_bus import FrameBus, FrameSink
+from .keyframes import probe_keyframes
+from .sinks import CaptionSink, SceneSink
+from .windows import FrameSpan
+from ..annotators.batch import annotation_dicts
+from ..config import VIDEO_CHUNK_MIN_SEC
+
+logger = logging.getLogger(__name__)
+
+# Builds the annotator registry inside a worker process; must be picklable
+# (e.g. functools.partial(stub_factories, 20.0))
+FactoriesBuilder = Callable[[], Dict[str, Callable[[], Any]]]
+
+
+@dataclass
+class ChunkPlan:
+    """How a video is split for a chunked run"""
+    fps: float
+    frame_count: int
+    chunks: List[FrameSpan]
+
+
+def plan_chunks(
+    video_path: str,
+    workers: int,
+    min_chunk_sec: float = VIDEO_CHUNK_MIN_SEC,
+) -> ChunkPlan:
+    """
+    Split a video into up to `workers` chunks starting on keyframes
+    
+    Boundaries are the keyframes nearest to an even split, so each chunk's
+    first seek lands on a keyframe and no frame is decoded twice; without
+    ffprobe the even split is used as is.
+    
+    Args:
+        video_path: Path to video file
+        workers: Largest number of chunks
+        min_chunk_sec: Shortest chunk; shorter videos stay in one piece
+        
+    Returns:
+        The plan; its last chunk runs to the end of the stream
+    """
+    import cv2
+    
+    cap = cv2.VideoCapture(video_path)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    finally:
+        cap.release()
+    
+    count = min(workers, int(frame_count // max(1.0, min_chunk_sec * fps)))
+    if count < 2:
+        return ChunkPlan(fps, frame_count, [(0, None)])
+    
+    keyframes = probe_keyframes(video_path, fps) or []
+    boundaries: List[int] = []
+    for i in range(1, count):
+        boundary = round(frame_count * i / count)
+        if keyframes:
+            index = bisect_left(keyframes, boundary)
+            nearby = keyframes[max(0, index - 1):index + 1]
+            boundary = min(nearby, key=lambda k: abs(k - boundary))
+        if (boundaries[-1] if boundaries else 0) < boundary < frame_count:
+            boundaries.append(boundary)
+    
+    chunks: List[FrameSpan] = list(zip([0] + boundaries, boundaries + [None]))
+    logger.debug(f"Split {video_path} into {len(chunks)} chunks at {boundaries}")
+    return ChunkPlan(fps, frame_count, chunks)
+
+
+class SceneStitcher:
+    """
+    Scenes of a serial pass, rebuilt from the cut candidates of consecutive chunks
+    
+    Chunks run their detectors without a minimum scene length; their
+    candidates are replayed here, in frame order, through the detector's
+    own filter. Between two candidates, only the first frame min_scene_len
+    past the earlier one can change the filter's state, so that is the
+    only under-threshold frame fed to it.
+    """
+    
+    def __init__(self, segmenter, fps: float):
+        self.segmenter = segmenter
+        self.fps = fps
+        self._filter = segmenter.create_cut_filter(fps)
+        self._last_over: Optional[int] = None
+        self._last_cut = 0
+        self._scene_index = 0
+        # The first frame has nothing to be compared with
+        self._filter(0, False)
+    
+    def add(self, candidates: List[int]) -> List[Dict[str, Any]]:
+        """Scenes closed by the next chunk's candidates"""
+        cuts: List[int] = []
+        for frame in candidates:
+            cuts += self._settle(frame)
+            cuts += self._filter(frame, True)
+            self._last_over = frame
+        return self._close(cuts)
+    
+    def finish(self, total_frames: int) -> List[Dict[str, Any]]:
+        """Remaining scenes once the last chunk is done"""
+        annotations = self._close(self._settle(total_frames))
+        
+        # Like SceneSink, a video without cuts yields no scenes
+        if self._scene_index > 0 and self._last_cut < total_frames:
+            annotations += self._emit(self._last_cut, total_frames)
+        return annotations
+    
+    def _settle(self, before: int) -> List[int]:
+        """Feed the under-threshold frame that may end a merge, if it comes before `before`"""
+        if self._last_over is None:
+            return []
+        frame = self._last_over + max(1, self.segmenter.min_scene_len)
+        return self._filter(frame, False) if frame < before else []
+    
+    def _close(self, cuts: List[int]) -> List[Dict[str, Any]]:
+        annotations = []
+        for cut in cuts:
+            annotations += self._emit(self._last_cut, cut)
+            self._last_cut = cut
+        return annotations
+    
+    def _emit(self, start_frame: int, end_frame: int) -> List[Dict[str, Any]]:
+        result = self.segmenter.scene_result(self._scene_index, start_frame, end_frame, self.fps)
+        self._scene_index += 1
+        return annotation_dicts([result], SceneSink.name)
+
+
+# Model manager of a worker process
+_manager = None
+
+
+def _init_worker(factories: Optional[FactoriesBuilder], threads: int) -> None:
+    """Worker process setup: share the cores with the other workers, then create a model manager"""
+    global _manager
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ.setdefault(name, str(threads))
+    import cv2
+    cv2.setNumThreads(threads)
+    
+    from ..model_manager import ModelManager
+    _manager = ModelManager(factories() if factories is not None else None)
+
+
+def _run_chunk(
+    video_path: str,
+    chunk: FrameSpan,
+    sink_names: List[str],
+    options: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Annotate one chunk in a worker process"""
+    from .video import build_video_sinks
+    
+    sinks: List[FrameSink] = []
+    for sink in build_video_sinks(_manager.get, **options):
+        if sink.name not in sink_names:
+            continue
+        if isinstance(sink, SceneSink):
+            sink = SceneSink(sink.segmenter, cuts_only=True)
+        sinks.append(sink)
+    
+    bus = FrameBus(video_path, sinks, chunk=chunk)
+    annotations = bus.collect()
+    return {
+        "annotations": annotations,
+        "scene_cuts": next((s.cuts for s in sinks if isinstance(s, SceneSink)), []),
+        "end_frame": bus.end_frame,
+    }
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_config: Optional[Tuple[int, Optional[FactoriesBuilder]]] = None
+_pool_lock = threading.Lock()
+
+
+def get_chunk_pool(workers: int, factories: Optional[FactoriesBuilder] = None) -> ProcessPoolExecutor:
+    """
+    Worker processes for chunked runs, created on first use and kept so
+    each loads its models once
+    
+    Workers are spawned rather than forked, since neither the executor
+    threads nor a CUDA context of this process survive a fork.
+    """
+    global _pool, _pool_config
+    with _pool_lock:
+        if _pool is not None and _pool_config != (workers, factories):
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        if _pool is None:
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(factories, threads),
+            )
+            _pool_config = (workers, factories)
+            logger.info(f"Created video chunk pool with {workers} processes ({threads} threads each)")
+        return _pool
+
+
+def shutdown_chunk_pool(wait: bool = True) -> None:
+    """Stop the worker processes (called on application shutdown)"""
+    global _pool, _pool_config
+    with _pool_lock:
+        pool, _pool, _pool_config = _pool, None, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def iter_chunked_annotations(
+    video_path: str,
+    sinks: List[FrameSink],
+    plan: ChunkPlan,
+    workers: int,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    factories: Optional[FactoriesBuilder] = None,
+    **options
+) -> Iterator[Dict[str, Any]]:
+    """
+    Run the sinks' annotators over every chunk of a plan in worker processes
+    
+    Args:
+        video_path: Path to video file
+        sinks: Sinks built by build_video_sinks(**options) to run; worker
+            processes build their own copies
+        plan: From plan_chunks
+        workers: Worker processes
+        on_progress: Called with (frames_done, frame_count) as chunks complete
+        factories: Builds each worker's annotator registry (default: the
+            service registry, honouring INFERENCE_REMOTE_MODELS so workers
+            can share model hosts)
+        **options: build_video_sinks options
+        
+    Yields:
+        Annotation dicts, a chunk's once it and every chunk before it are
+        done. Each type comes in serial order; scenes are emitted as the
+        cuts closing them are confirmed.
+    """
+    names = [sink.name for sink in sinks]
+    scene = next((s for s in sinks if isinstance(s, SceneSink)), None)
+    stitcher = SceneStitcher(scene.segmenter, plan.fps) if scene is not None else None
+    
+    pool = get_chunk_pool(workers, factories)
+    futures = [pool.submit(_run_chunk, video_path, chunk, names, options) for chunk in plan.chunks]
+    try:
+        steps = 0
+        done = 0
+        end_frame = 0
+        for (start, end), future in zip(plan.chunks, futures):
+            result = future.result()
+            for annotation in result["annotations"]:
+                # Caption steps are numbered across the whole video
+                if annotation["type"] == CaptionSink.name and annotation["data"].get("is_step"):
+                    steps += 1
+                    annotation["data"]["step_number"] = steps
+                yield annotation
+            if stitcher is not None:
+                yield from stitcher.add(result["scene_cuts"])
+            
+            end_frame = result["end_frame"] or end_frame
+            done += (end if end is not None else end_frame) - start
+            if on_progress:
+                on_progress(done, max(plan.frame_count, done))
+        
+        if stitcher is not None:
+            yield from stitcher.finish(end_frame)
+    except BrokenProcessPool:
+        shutdown_chunk_pool(wait=False)
+        raise
+    finally:
+        for future in futures:
+            future.cancel()
@@ -0,0 +1,81 @@
+"""
+Pre-decoded frame input
+A video may also be given as a .npy file holding its RGB frames as one
+(T, H, W, 3) uint8 array, e.g. written by a backend that has already
+decoded it. The file is memory-mapped and frames are handed to the sinks
+in place, so nothing is decoded or copied up front.
+"""
+
+from typing import Optional, Tuple
+import numpy as np
+
+FRAME_ARRAY_SUFFIX = ".npy"
+
+# Frame rate assumed when a request does not give one
+DEFAULT_FRAME_ARRAY_FPS = 30.0
+
+
+def is_frame_array(path: str) -> bool:
+    """Whether a video path names a frame array rather than an encoded video"""
+    return path.lower().endswith(FRAME_ARRAY_SUFFIX)
+
+
+def open_frame_array(path: str) -> np.ndarray:
+    """
+    Memory-map a frame array read-only
+    
+    Args:
+        path: .npy file of shape (T, H, W, 3), dtype uint8, RGB
+        
+    Returns:
+        The mapped array; frames are read from the file as they are used
+        
+    Raises:
+        ValueError: If the file is not a frame array of that layout
+    """
+    try:
+        frames = np.load(path, mmap_mode="r", allow_pickle=False)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Could not open frame array {path}: {e}") from e
+    if frames.ndim != 4 or frames.shape[-1] != 3 or frames.dtype != np.uint8:
+        raise ValueError(
+            f"Frame array must be (T, H, W, 3) uint8 RGB, got {frames.shape} {frames.dtype}: {path}"
+        )
+    return frames
+
+
+class ArraySampler:
+    """
+    FrameSampler counterpart for a frame array
+    
+    Any frame can be read directly, so there is nothing to grab or seek
+    past; reads return views into the mapped file.
+    """
+    
+    # Channel order of the frames read
+    color = "rgb"
+    
+    def __init__(self, frames: np.ndarray):
+        self.frames = frames
+        self.frame_count = len(frames)
+        self.position = 0  # Index of the next frame
+        self.grabbed = 0
+        self.retrieved = 0
+        self.seeks = 0
+    
+    def read(self, target: int, out: Optional[np.ndarray] = None) -> Optional[Tuple[int, np.ndarray]]:
+        """
+        The frame at index target, or None past the end
+        
+        Args:
+            target: Frame index to read; must not be behind the current position
+            out: Ignored; frames are not copied
+        """
+        if target < self.position:
+            raise ValueError(f"Cannot read frame {target} behind position {self.position}")
+        if target >= self.frame_count:
+            self.position = self.frame_count
+            return None
+        self.position = target + 1
+        self.retrieved += 1
+        return target, self.frames[target]
@@ -0,0 +1,499 @@
+"""
+Decode-once frame bus
+Opens a video a single time and fans each decoded frame out to every sink
+that asked for it, so annotators no longer re-open and re-decode the file
+"""
+
+import logging
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+import numpy as np
+
+from .frame_array import DEFAULT_FRAME_ARRAY_FPS, ArraySampler, is_frame_array, open_frame_array
+from .prefetch import prefetched
+from .sampler import FrameSampler, resolve_gop_size
+from .views import BufferPool, FrameView
+from .windows import FrameSpan, TimeRange, frame_spans
+from ..config import FRAME_BUFFER_POOL_SIZE, VIDEO_PREFETCH_FRAMES
+from ..metrics import record_frames
+from ..timings import current_timings, stage
+
+logger = logging.getLogger(__name__)
+
+# Frames between flushes of the throughput counters
+METRICS_FLUSH_FRAMES = 64
+
+# cv2 names (cv2 is imported lazily) of the resize modes and of the
+# colour conversions between the channel orders frames come in
+_INTERPOLATION = {"area": "INTER_AREA", "linear": "INTER_LINEAR"}
+_CONVERSIONS = {
+    ("bgr", "rgb"): "COLOR_BGR2RGB",
+    ("bgr", "gray"): "COLOR_BGR2GRAY",
+    ("rgb", "bgr"): "COLOR_RGB2BGR",
+    ("rgb", "gray"): "COLOR_RGB2GRAY",
+}
+
+
+@dataclass
+class VideoInfo:
+    """Stream properties reported by the decoder"""
+    fps: float
+    frame_count: int
+    width: int
+    height: int
+
+
+class Frame:
+    """
+    A frame shared by all sinks
+    
+    Frames come decoded as BGR, or as RGB from a frame array. The other
+    channel order and every resized view are built at most once per
+    frame, into buffers from the bus's pool when one is given.
+    """
+    
+    __slots__ = ("frame_id", "timestamp_ms", "_bgr", "_rgb", "_color", "_views", "_buffers")
+    
+    def __init__(
+        self,
+        frame_id: int,
+        timestamp_ms: float,
+        bgr: Optional[np.ndarray] = None,
+        buffers: Optional[BufferPool] = None,
+        rgb: Optional[np.ndarray] = None,
+    ):
+        if (bgr is None) == (rgb is None):
+            raise ValueError("A frame needs either bgr or rgb pixels")
+        self.frame_id = frame_id
+        self.timestamp_ms = timestamp_ms
+        self._bgr = bgr
+        self._rgb = rgb
+        # Channel order the frame arrived in
+        self._color = "bgr" if bgr is not None else "rgb"
+        self._views: Dict[FrameView, np.ndarray] = {}
+        self._buffers = buffers
+    
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """(height, width, 3) of the frame as it arrived"""
+        return self._source.shape
+    
+    @property
+    def bgr(self) -> np.ndarray:
+        """Frame in BGR order (cached)"""
+        if self._bgr is None:
+            self._bgr = self._convert(self._rgb, "bgr")
+        return self._bgr
+    
+    @property
+    def rgb(self) -> np.ndarray:
+        """Frame in RGB order (cached)"""
+        if self._rgb is None:
+            self._rgb = self._convert(self._bgr, "rgb")
+        return self._rgb
+    
+    def view(self, view: FrameView) -> np.ndarray:
+        """Frame at a view's resolution and colour space (cached)"""
+        array = self._views.get(view)
+        if array is None:
+            array = self._build(view)
+            self._views[view] = array
+        return array
+    
+    @property
+    def _source(self) -> np.ndarray:
+        return self._bgr if self._color == "bgr" else self._rgb
+    
+    def _convert(self, source: np.ndarray, color: str) -> np.ndarray:
+        import cv2
+        with stage("rgb_convert", source.nbytes):
+            code = getattr(cv2, _CONVERSIONS[self._color, color])
+            return cv2.cvtColor(source, code, dst=self._buffer(source.shape))
+    
+    def _build(self, view: FrameView) -> np.ndarray:
+        import cv2
+        
+        source = self._source
+        height, width = source.shape[:2]
+        if view.width in (0, width) and view.height in (0, height):
+            if view.color == "bgr":
+                return self.bgr
+            if view.color == "rgb":
+                return self.rgb
+        elif view.color == self._color:
+            interpolation = getattr(cv2, _INTERPOLATION[view.interpolation])
+            with stage("resize", source.nbytes):
+                return cv2.resize(
+                    source,
+                    (view.width, view.height),
+                    dst=self._buffer((view.height, view.width, 3)),
+                    interpolation=interpolation,
+                )
+        else:
+            # Convert after shrinking: other colour spaces share the resized view
+            source = self.view(view.with_color(self._color))
+        
+        code = getattr(cv2, _CONVERSIONS[self._color, view.color])
+        shape = source.shape[:2] if view.color == "gray" else source.shape
+        with stage("resize", source.nbytes):
+            return cv2.cvtColor(source, code, dst=self._buffer(shape))
+    
+    def _buffer(self, shape: Tuple[int, ...]) -> Optional[np.ndarray]:
+        return self._buffers.get(shape) if self._buffers is not None else None
+
+
+# Deferred sink output: call to wait for the annotations
+Pending = Callable[[], List[Dict[str, Any]]]
+
+
+class FrameSink(ABC):
+    """
+    Consumer attached to a FrameBus
+    
+    Each sink declares its own sampling rule through wants() and returns
+    annotation dicts (already tagged with "type") as soon as it has them.
+    """
+    
+    name: str = "sink"
+    # Resolution and colour space the sink reads frames in, set by start()
+    # once the stream size is known; None for sinks that read frame.bgr
+    view: Optional[FrameView] = None
+    
+    def start(self, info: VideoInfo) -> None:
+        """Called once before the first frame"""
+        self.info = info
+    
+    def start_range(self, start_frame: int) -> None:
+        """
+        Called before each requested frame span (once, at frame 0, for a whole video)
+        
+        Sinks that carry state from frame to frame reset it here, so
+        nothing spans the gap between two time windows. Each span is
+        closed with finish(end_frame).
+        
+        In a chunked run the chunk continues the video rather than
+        starting a new span, so sinks get start_range(0) and then only the
+        frames of their chunk_window().
+        """
+        pass
+    
+    def chunk_window(self, start_frame: int, end_frame: Optional[int]) -> FrameSpan:
+        """
+        Frames this sink must see to produce its output for one chunk
+        
+        A chunked run (see pipeline.chunked) splits a video into
+        [start_frame, end_frame) pieces processed separately. A sink
+        must emit exactly the annotations a serial run would emit for
+        the chunk's frames, so sinks whose output spans several frames
+        extend the window past end_frame, or move its start up to their
+        next boundary. The default suits sinks that annotate frames
+        independently.
+        """
+        return start_frame, end_frame
+    
+    @abstractmethod
+    def wants(self, frame_id: int) -> bool:
+        """
+        Whether this sink needs the given frame
+        
+        Frames are decoded ahead of push(), so this and next_frame() may
+        only depend on the frame id and on state set up by start().
+        """
+        pass
+    
+    def next_frame(self, frame_id: int) -> Optional[int]:
+        """
+        First frame at or after frame_id that this sink wants
+        
+        Sinks with a periodic rule should override this; the default scans
+        wants() up to the reported frame count.
+        """
+        frame_count = self.info.frame_count
+        if frame_count <= 0:
+            return frame_id
+        while frame_id < frame_count:
+            if self.wants(frame_id):
+                return frame_id
+            frame_id += 1
+        return None
+    
+    def push(self, frame: Frame) -> List[Dict[str, Any]]:
+        """Consume a frame, returning any annotations completed by it"""
+        return self.push_async(frame)()
+    
+    def push_async(self, frame: Frame) -> "Pending":
+        """
+        Start consuming a frame without waiting for model calls
+        
+        Returns a callable that blocks until the annotations are ready.
+        Sinks that dispatch to executor pools override this so the bus can
+        run every sink on a frame concurrently; the default runs inline.
+        """
+        annotations = self.push(frame)
+        return lambda: annotations
+    
+    def finish(self, total_frames: int) -> List[Dict[str, Any]]:
+        """Flush state after the last frame (of the video, or of the current span)"""
+        return []
+    
+    def cache_identity(self) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """
+        Annotator and call parameters that determine this sink's output
+        
+        Used to key the result cache; None means the sink is not cached.
+        """
+        return None
+
+
+class FrameBus:
+    """Single decode pass over a video file feeding multiple sinks"""
+    
+    def __init__(
+        self,
+        video_path: str,
+        sinks: List[FrameSink],
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        ranges: Optional[List[TimeRange]] = None,
+        chunk: Optional[FrameSpan] = None,
+        prefetch: int = VIDEO_PREFETCH_FRAMES,
+        fps: Optional[float] = None,
+    ):
+        """
+        Args:
+            video_path: Path to video file, or to a .npy frame array
+                (see frame_array)
+            sinks: Consumers, in output order
+            on_progress: Called with (frames_done, frame_count) after each sampled frame
+            ranges: Sorted, non-overlapping (start_ms, end_ms) windows to
+                annotate (see windows.time_ranges); None for the whole video
+            chunk: (start_frame, end_frame) piece of a chunked run; each
+                sink sees the frames of its chunk_window()
+            prefetch: Frames decoded ahead of the sinks on a separate
+                thread (0 decodes inline)
+            fps: Frame rate of a frame array (default DEFAULT_FRAME_ARRAY_FPS);
+                encoded videos use their own
+        """
+        self.video_path = video_path
+        self.sinks = sinks
+        self.on_progress = on_progress
+        self.ranges = ranges
+        self.chunk = chunk
+        self.prefetch = max(0, prefetch)
+        self.fps = fps
+        self.info: Optional[VideoInfo] = None
+        self._annotated: Dict[str, int] = {}
+        self._reported_decodes = 0
+        # Frame window per sink (by id) in a chunked run
+        self._windows: Dict[int, FrameSpan] = {}
+        # Frame the last span was finished at (the decoded length after a
+        # whole-video pass)
+        self.end_frame: Optional[int] = None
+        # Decode and view buffers, reused from frame to frame; frames
+        # waiting in the read-ahead queue hold theirs too
+        self.buffers = BufferPool(FRAME_BUFFER_POOL_SIZE + self.prefetch)
+    
+    def run(self) -> Iterator[Dict[str, Any]]:
+        """
+        Decode the video once and yield annotations as sinks produce them
+        
+        Only frames some sink wants are retrieved; the FrameSampler grabs or
+        seeks past everything in between. With time windows, each window is
+        reached with a seek (decoding from the keyframe before it) and
+        decoding stops at its end, so the cost follows the windows' length.
+        
+        With prefetch > 0, decoding and building the sinks' frame views
+        run on a separate thread up to that many frames ahead, so the
+        decoder works while the annotators run.
+        
+        A frame array is read in place from its memory map instead: there
+        is nothing to decode, and sinks get views into the file.
+        """
+        if is_frame_array(self.video_path):
+            frames = open_frame_array(self.video_path)
+            self.info = VideoInfo(
+                fps=self.fps or DEFAULT_FRAME_ARRAY_FPS,
+                frame_count=len(frames),
+                width=frames.shape[2],
+                height=frames.shape[1],
+            )
+            yield from self._run_sampler(ArraySampler(frames))
+            return
+        
+        import cv2
+        
+        cap = cv2.VideoCapture(self.video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video: {self.video_path}")
+        
+        try:
+            self.info = VideoInfo(
+                fps=cap.get(cv2.CAP_PROP_FPS) or 30.0,
+                frame_count=int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+                width=int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                height=int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            )
+            sampler = FrameSampler(
+                cap,
+                gop_size=resolve_gop_size(self.video_path, self.info.fps),
+                frame_count=self.info.frame_count,
+            )
+            yield from self._run_sampler(sampler)
+        finally:
+            cap.release()
+    
+    def _run_sampler(self, sampler: Union[FrameSampler, ArraySampler]) -> Iterator[Dict[str, Any]]:
+        """Feed the sinks the frames they want from an opened source"""
+        try:
+            for sink in self.sinks:
+                sink.start(self.info)
+            
+            spans: List[FrameSpan] = [(0, None)]
+            if self.chunk is not None:
+                self._windows = {id(s): s.chunk_window(*self.chunk) for s in self.sinks}
+                ends = [end for _, end in self._windows.values()]
+                spans = [(self.chunk[0], None if None in ends else max(ends, default=self.chunk[1]))]
+            elif self.ranges is not None:
+                spans = frame_spans(self.ranges, self.info.fps, self.info.frame_count)
+            # Progress counts frames of the requested spans only
+            span_total = sum((end or self.info.frame_count) - start for start, end in spans)
+            covered = 0
+            since_flush = 0
+            
+            events = self._decode(sampler, spans)
+            if self.prefetch > 0:
+                events = prefetched(events, self.prefetch, name="frame-decode")
+            try:
+                for event in events:
+                    if isinstance(event, Frame):
+                        yield from self._run_frame(event)
+                        if self.on_progress:
+                            self.on_progress(covered + event.frame_id + 1 - span_start, span_total)
+                        
+                        since_flush += 1
+                        if since_flush >= METRICS_FLUSH_FRAMES:
+                            self._flush_metrics(sampler)
+                            since_flush = 0
+                    elif event[0] == "start":
+                        _, span_start, span_end = event
+                        for sink in self.sinks:
+                            sink.start_range(0 if self.chunk is not None else span_start)
+                    else:
+                        _, span_done = event
+                        for sink in self.sinks:
+                            end = self._windows.get(id(sink), (span_start, span_end))[1]
+                            yield from sink.finish(span_done if end is None else min(span_done, end))
+                        self.end_frame = span_done
+                        covered += (span_end or self.info.frame_count) - span_start
+            finally:
+                # Stops a read-ahead thread before the capture is released
+                events.close()
+        finally:
+            self._flush_metrics(sampler)
+            logger.debug(
+                f"Sampled {self.video_path}: {sampler.retrieved} retrieved, "
+                f"{sampler.grabbed} grabbed, {sampler.seeks} seeks"
+            )
+    
+    def _decode(self, sampler: Union[FrameSampler, ArraySampler], spans: List[FrameSpan]) -> Iterator[Any]:
+        """
+        Decode the frames the sinks want, span by span
+        
+        Yields ("start", span_start, span_end) before a span, each Frame
+        with the views of the sinks that want it already built, and
+        ("end", span_done) after it. Only the sinks' sampling rules and
+        windows are read here, so this can run ahead of the sinks on
+        another thread.
+        """
+        timings = current_timings()
+        decode_shape = (self.info.height, self.info.width, 3) if self.info.width > 0 and self.info.height > 0 else None
+        if sampler.color != "bgr":
+            # Frame arrays are read in place, not into buffers
+            decode_shape = None
+        for span_start, span_end in spans:
+            yield "start", span_start, span_end
+            
+            # A seek may have landed past the span start
+            frame_id = max(span_start, sampler.position)
+            span_done = None
+            at_eof = False
+            while True:
+                targets = []
+                for sink in self.sinks:
+                    start, end = self._windows.get(id(sink), (span_start, span_end))
+                    target = sink.next_frame(max(frame_id, start))
+                    if target is not None and (end is None or target < end):
+                        targets.append(target)
+                if not targets:
+                    # No sink needs anything further; trust the reported length
+                    span_done = span_end if span_end is not None else max(sampler.position, self.info.frame_count)
+                    break
+                
+                started = time.perf_counter()
+                out = self.buffers.get(decode_shape) if decode_shape is not None else None
+                read = sampler.read(min(targets), out)
+                if read is None:
+                    span_done, at_eof = sampler.position, True
+                    break
+                frame_id, pixels = read
+                if timings is not None:
+                    # Includes grabbing/seeking past the frames no sink wanted
+                    timings.add("decode", time.perf_counter() - started, pixels.nbytes)
+                if span_end is not None and frame_id >= span_end:
+                    span_done = span_end
+                    break
+                
+                timestamp_ms = (frame_id / self.info.fps) * 1000
+                if sampler.color == "bgr":
+                    frame = Frame(frame_id, timestamp_ms, pixels, self.buffers)
+                else:
+                    frame = Frame(frame_id, timestamp_ms, buffers=self.buffers, rgb=pixels)
+                for sink in self._active(frame_id):
+                    if sink.view is not None:
+                        frame.view(sink.view)
+                yield frame
+                frame_id += 1
+            
+            yield "end", span_done
+            if at_eof:
+                break
+    
+    def _run_frame(self, frame: Frame) -> Iterator[Dict[str, Any]]:
+        """
+        Execution plan for one frame
+        
+        Every sink that wants the frame is started before any is waited on,
+        so independent annotators run concurrently on their executor pools
+        (native inference releases the GIL). Results are joined in sink
+        order, keeping output deterministic.
+        """
+        active = self._active(frame.frame_id)
+        for sink in active:
+            self._annotated[sink.name] = self._annotated.get(sink.name, 0) + 1
+        
+        pending = [sink.push_async(frame) for sink in active]
+        for wait in pending:
+            yield from wait()
+    
+    def _active(self, frame_id: int) -> List[FrameSink]:
+        """Sinks that take the frame"""
+        return [s for s in self.sinks if s.wants(frame_id) and self._in_window(s, frame_id)]
+    
+    def _in_window(self, sink: FrameSink, frame_id: int) -> bool:
+        window = self._windows.get(id(sink))
+        if window is None:
+            return True
+        start, end = window
+        return frame_id >= start and (end is None or frame_id < end)
+    
+    def _flush_metrics(self, sampler: Union[FrameSampler, ArraySampler]) -> None:
+        """Report frame counts accumulated since the last flush"""
+        decoded = sampler.retrieved + sampler.grabbed
+        record_frames(decoded - self._reported_decodes, self._annotated)
+        self._reported_decodes = decoded
+        self._annotated = {}
+    
+    def collect(self) -> List[Dict[str, Any]]:
+        """Run the bus to completion and return all annotations"""
+        return list(self.run())
@@ -0,0 +1,74 @@
+"""
+Keyframe probing
+Reads packet flags with ffprobe (no decoding) to locate keyframes and
+estimate the GOP size of a video stream
+"""
+
+import json
+import logging
+import shutil
+import subprocess
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def probe_keyframes(
+    video_path: str,
+    fps: float,
+    max_packets: Optional[int] = None,
+    timeout_sec: float = 60.0,
+) -> Optional[List[int]]:
+    """
+    List the frame indices of keyframes in the first video stream
+    
+    Args:
+        video_path: Path to video file
+        fps: Frames per second used to convert packet timestamps to frame indices
+        max_packets: Only inspect this many packets from the start (None for all)
+        timeout_sec: ffprobe timeout
+        
+    Returns:
+        Sorted keyframe indices, or None if ffprobe is unavailable or fails
+    """
+    ffprobe = shutil.which("ffprobe")
+    if ffprobe is None:
+        return None
+    
+    cmd = [
+        ffprobe, "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "json",
+    ]
+    if max_packets:
+        cmd += ["-read_intervals", f"%+#{max_packets}"]
+    cmd.append(video_path)
+    
+    try:
+        output = subprocess.run(
+            cmd, capture_output=True, check=True, timeout=timeout_sec
+        ).stdout
+        packets = json.loads(output).get("packets", [])
+    except (subprocess.SubprocessError, ValueError) as e:
+        logger.warning(f"Keyframe probe failed for {video_path}: {e}")
+        return None
+    
+    keyframes = set()
+    for packet in packets:
+        if "K" not in packet.get("flags", ""):
+            continue
+        try:
+            keyframes.add(int(round(float(packet["pts_time"]) * fps)))
+        except (KeyError, ValueError):
+            continue
+    
+    return sorted(keyframes)
+
+
+def estimate_gop_size(keyframes: Optional[List[int]]) -> Optional[int]:
+    """Median distance between consecutive keyframes, if there are enough of them"""
+    if not keyframes or len(keyframes) < 2:
+        return None
+    gaps = sorted(b - a for a, b in zip(keyframes, keyframes[1:]))
+    return max(1, gaps[len(gaps) // 2])
@@ -0,0 +1,80 @@
+"""
+Read-ahead for the frame bus
+Runs an iterator on a background thread, a bounded number of items ahead
+of its consumer, so decoding the next frames overlaps with running the
+annotators on the current one
+"""
+
+import contextvars
+import queue
+import threading
+from typing import Iterator, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Marks the end of the producer's items (with the exception it raised, if any)
+_END = object()
+
+# How often a producer blocked on a full queue checks whether to give up
+_PUT_POLL_SEC = 0.1
+
+
+def prefetched(iterator: Iterator[T], depth: int, name: str = "prefetch") -> Iterator[T]:
+    """
+    Iterate over `iterator` on a background thread, up to depth items ahead
+    
+    The producer runs in a copy of the caller's context, so stage timings
+    it records count towards the caller's request. An exception in the
+    producer is raised in the consumer once the items before it are
+    consumed. Closing the returned generator early stops the producer and
+    waits for it, so whatever it reads from can be released afterwards.
+    
+    Args:
+        iterator: Items to produce; closed on the producer thread when done
+        depth: Largest number of items produced but not yet consumed
+        name: Thread name
+        
+    Yields:
+        The iterator's items, in order
+    """
+    items: "queue.Queue[Tuple[object, Optional[BaseException]]]" = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+    
+    def put(item: object, error: Optional[BaseException] = None) -> bool:
+        # Block while the queue is full, but give up once the consumer has gone
+        while not stop.is_set():
+            try:
+                items.put((item, error), timeout=_PUT_POLL_SEC)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def produce() -> None:
+        try:
+            for item in iterator:
+                if not put(item):
+                    return
+            put(_END)
+        except BaseException as e:
+            put(_END, e)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+    
+    thread = threading.Thread(
+        target=contextvars.copy_context().run, args=(produce,), name=name, daemon=True
+    )
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is _END:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+        thread.join()
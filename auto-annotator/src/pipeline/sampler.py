@@ -0,0 +1,88 @@
+"""
+Sparse frame sampler
+Advances a cv2.VideoCapture to requested frames without paying for frames
+nobody uses: short gaps are skipped with grab() (decode only, no colour
+conversion or copy) and gaps longer than a GOP are jumped with a seek,
+which only decodes from the keyframe preceding the target
+"""
+
+import logging
+from typing import Any, Optional, Tuple
+import numpy as np
+
+from .keyframes import estimate_gop_size, probe_keyframes
+from ..config import DEFAULT_GOP_SIZE, GOP_PROBE_PACKETS, GOP_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_gop_size(video_path: str, fps: float) -> int:
+    """GOP size from config, else probed from the stream, else the default"""
+    if GOP_SIZE > 0:
+        return GOP_SIZE
+    keyframes = probe_keyframes(video_path, fps, max_packets=GOP_PROBE_PACKETS)
+    return estimate_gop_size(keyframes) or DEFAULT_GOP_SIZE
+
+
+class FrameSampler:
+    """Reads selected frames from an open capture, choosing grab or seek per gap"""
+    
+    # Channel order of the frames read
+    color = "bgr"
+    
+    def __init__(self, cap: Any, gop_size: int = DEFAULT_GOP_SIZE, frame_count: int = 0):
+        self.cap = cap
+        self.gop_size = max(1, gop_size)
+        self.frame_count = frame_count
+        self.position = 0  # Index of the next frame the decoder will return
+        self.grabbed = 0
+        self.retrieved = 0
+        self.seeks = 0
+    
+    def read(self, target: int, out: Optional[np.ndarray] = None) -> Optional[Tuple[int, np.ndarray]]:
+        """
+        Decode the frame at index target (or the first frame after it)
+        
+        Args:
+            target: Frame index to read; must not be behind the current position
+            out: Buffer to decode into when its shape matches the frame
+            
+        Returns:
+            (frame_id, BGR frame), or None at end of stream
+        """
+        if target < self.position:
+            raise ValueError(f"Cannot read frame {target} behind position {self.position}")
+        
+        if self._should_seek(target - self.position, target):
+            self._seek(target)
+        
+        while self.position < target:
+            if not self.cap.grab():
+                return None
+            self.position += 1
+            self.grabbed += 1
+        
+        ret, frame = self.cap.read(out)
+        if not ret:
+            return None
+        frame_id = self.position
+        self.position += 1
+        self.retrieved += 1
+        return frame_id, frame
+    
+    def _should_seek(self, gap: int, target: int) -> bool:
+        # A seek restarts decoding at the keyframe before the target, so it
+        # only wins once the gap is longer than a GOP. Seeking past the
+        # reported end is left to sequential grabs so EOF is detected exactly.
+        if gap <= self.gop_size:
+            return False
+        return self.frame_count <= 0 or target < self.frame_count
+    
+    def _seek(self, target: int) -> None:
+        import cv2
+        
+        if not self.cap.set(cv2.CAP_PROP_POS_FRAMES, target):
+            return
+        self.seeks += 1
+        position = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
+        self.position = position if position >= 0 else target
@@ -0,0 +1,387 @@
+"""
+Frame sinks for the video pipeline
+Each sink adapts one annotator to the FrameBus with its own sampling rule
+"""
+
+import logging
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+import numpy as np
+
+from .frame_bus import Frame, FrameSink, Pending, VideoInfo
+from .views import FrameView
+from .windows import FrameSpan
+from ..annotators.base import BaseAnnotator
+from ..annotators.batch import Results, annotation_dicts
+from ..executors import submit
+from ..timings import stage, timed
+
+logger = logging.getLogger(__name__)
+
+
+def _dispatch(
+    pool: Optional[str],
+    annotation_type: str,
+    fn: Callable[..., Any],
+    *args,
+    **kwargs
+) -> Callable[[], Any]:
+    """
+    Start an annotator call on its executor pool (or inline when no pool is set)
+    
+    The call is timed as the "inference.<annotation_type>" stage when the
+    request collects timings. Returns a callable that waits for and returns
+    the call's result.
+    """
+    fn = timed(f"inference.{annotation_type}", fn)
+    if pool is None:
+        result = fn(*args, **kwargs)
+        return lambda: result
+    return submit(pool, fn, *args, **kwargs).result
+
+
+def _done(annotations: List[Dict[str, Any]]) -> Pending:
+    return lambda: annotations
+
+
+def _tagged(annotation_type: str, results: Results) -> List[Dict[str, Any]]:
+    """Convert results to response dicts tagged with their annotation type"""
+    return annotation_dicts(results, annotation_type)
+
+
+def _annotator_view(info: VideoInfo, annotator: BaseAnnotator) -> FrameView:
+    """View matching the input size and colour an annotator declares"""
+    return FrameView.fit(info.width, info.height, annotator.input_size, annotator.input_color)
+
+
+def _scale_kwargs(frame: Frame, image: np.ndarray) -> Dict[str, Any]:
+    """scale argument mapping a downscaled view's pixels back to the frame's"""
+    scale = frame.shape[1] / image.shape[1]
+    return {"scale": scale} if scale != 1.0 else {}
+
+
+class AnnotatorSink(FrameSink):
+    """
+    Runs a per-frame annotator (hands, objects, SAM3) on every Nth frame
+    
+    Frames are handed over at the annotator's input_size; annotators
+    reporting pixel coordinates get the factor back to the source size as
+    a scale argument. With batch_size > 1, sampled frames are collected and sent through
+    annotate_batch in one call, flushing when the batch is full and at the
+    end of the stream.
+    """
+    
+    def __init__(
+        self,
+        annotation_type: str,
+        annotator: BaseAnnotator,
+        frame_interval: int = 30,
+        pool: Optional[str] = None,
+        batch_size: int = 1,
+    ):
+        self.name = annotation_type
+        self.annotation_type = annotation_type
+        self.annotator = annotator
+        self.frame_interval = max(1, frame_interval)
+        self.pool = pool
+        self.batch_size = max(1, batch_size)
+        self._pending: List[Tuple[int, float, np.ndarray]] = []
+        self._scale: Dict[str, Any] = {}
+    
+    def start(self, info: VideoInfo) -> None:
+        super().start(info)
+        self.view = _annotator_view(info, self.annotator)
+        self._pending = []
+    
+    def wants(self, frame_id: int) -> bool:
+        return frame_id % self.frame_interval == 0
+    
+    def next_frame(self, frame_id: int) -> Optional[int]:
+        return -(-frame_id // self.frame_interval) * self.frame_interval
+    
+    def push_async(self, frame: Frame) -> Pending:
+        image = frame.view(self.view)
+        self._scale = _scale_kwargs(frame, image)
+        if self.batch_size == 1:
+            wait = _dispatch(
+                self.pool, self.name, self.annotator.annotate,
+                image, frame.frame_id, frame.timestamp_ms, **self._scale
+            )
+            return lambda: _tagged(self.annotation_type, wait())
+        
+        self._pending.append((frame.frame_id, frame.timestamp_ms, image))
+        if len(self._pending) >= self.batch_size:
+            return self._flush()
+        return _done([])
+    
+    def finish(self, total_frames: int) -> List[Dict[str, Any]]:
+        if self._pending:
+            return self._flush()()
+        return []
+    
+    def cache_identity(self) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        return self.annotator, {"frame_interval": self.frame_interval, "input_size": self.annotator.input_size}
+    
+    def _flush(self) -> Pending:
+        pending, self._pending = self._pending, []
+        wait = _dispatch(
+            self.pool,
+            self.name,
+            self.annotator.annotate_batch,
+            [image for _, _, image in pending],
+            frame_ids=[frame_id for frame_id, _, _ in pending],
+            timestamps_ms=[timestamp_ms for _, timestamp_ms, _ in pending],
+            **self._scale,
+        )
+        
+        def collect() -> List[Dict[str, Any]]:
+            annotations = []
+            for results in wait():
+                annotations += _tagged(self.annotation_type, results)
+            return annotations
+        
+        return collect
+
+
+class SceneSink(FrameSink):
+    """
+    Streams every frame through a PySceneDetect ContentDetector
+    
+    Frames are downscaled the same way SceneManager does before detection
+    (as a BGR view built by the frame), and each scene is emitted as soon as the cut closing it is found.
+    
+    With cuts_only, the detector runs without its minimum scene length and
+    the frames it flags are collected in self.cuts instead of being turned
+    into scenes; chunked runs stitch them with chunked.SceneStitcher.
+    """
+    
+    name = "scene_segment"
+    
+    def __init__(self, segmenter, cuts_only: bool = False):
+        self.segmenter = segmenter
+        self.cuts_only = cuts_only
+    
+    def start(self, info: VideoInfo) -> None:
+        super().start(info)
+        from scenedetect.scene_manager import compute_downscale_factor
+        
+        self.segmenter.ensure_loaded()
+        downscale = compute_downscale_factor(info.width) if info.width > 0 else 1
+        self.view = FrameView(color="bgr")
+        if downscale > 1:
+            size = (round(info.width / downscale), round(info.height / downscale))
+            self.view = FrameView(*size, color="bgr", interpolation="linear")
+        self._scene_index = 0
+        self.cuts: List[int] = []
+    
+    def start_range(self, start_frame: int) -> None:
+        # A cut is only detected between frames of the same span
+        self._detector = self.segmenter.create_detector(min_scene_len=0 if self.cuts_only else None)
+        self._last_cut: Optional[int] = None
+        self._span_scenes = 0
+    
+    def wants(self, frame_id: int) -> bool:
+        # Content detection compares consecutive frames
+        return True
+    
+    def next_frame(self, frame_id: int) -> Optional[int]:
+        return frame_id
+    
+    def chunk_window(self, start_frame: int, end_frame: Optional[int]) -> FrameSpan:
+        # The first frame of a chunk has nothing to be compared with, so
+        # the previous chunk scores it against its own last frame
+        return start_frame, None if end_frame is None else end_frame + 1
+    
+    def push(self, frame: Frame) -> List[Dict[str, Any]]:
+        if self._last_cut is None:
+            self._last_cut = frame.frame_id
+        with stage(f"inference.{self.name}"):
+            cuts = self._detector.process_frame(self._timecode(frame.frame_id), frame.view(self.view))
+        if self.cuts_only:
+            self.cuts += [self._frame_num(cut) for cut in cuts]
+            return []
+        return self._close_scenes(cuts)
+    
+    def finish(self, total_frames: int) -> List[Dict[str, Any]]:
+        if self.cuts_only:
+            return []
+        annotations = self._close_scenes(self._detector.post_process(self._timecode(total_frames)))
+        
+        # Like scenedetect.detect(), a video (or span) without cuts yields no scenes
+        if self._span_scenes > 0 and self._last_cut < total_frames:
+            annotations += self._emit(self._last_cut, total_frames)
+        return annotations
+    
+    def cache_identity(self) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        return self.segmenter, {}
+    
+    def _close_scenes(self, cuts: List[Any]) -> List[Dict[str, Any]]:
+        annotations = []
+        for cut in cuts:
+            cut_frame = self._frame_num(cut)
+            annotations += self._emit(self._last_cut, cut_frame)
+            self._last_cut = cut_frame
+        return annotations
+    
+    def _emit(self, start_frame: int, end_frame: int) -> List[Dict[str, Any]]:
+        result = self.segmenter.scene_result(self._scene_index, start_frame, end_frame, self.info.fps)
+        self._scene_index += 1
+        self._span_scenes += 1
+        return _tagged("scene_segment", [result])
+    
+    @staticmethod
+    def _frame_num(cut: Any) -> int:
+        return int(cut.frame_num) if hasattr(cut, "frame_num") else int(cut)
+    
+    def _timecode(self, frame_id: int):
+        from scenedetect import FrameTimecode
+        return FrameTimecode(frame_id, self.info.fps)
+
+
+class ActionSink(FrameSink):
+    """
+    Sliding-window action recognition over sampled frames
+    
+    Mirrors ActionRecognizer.annotate_batch, but keeps only the current
+    window in memory instead of the whole video, at the recognizer's
+    input size and colour. Windows start every stride sampled frames
+    counted from the start of the video, so a time window or chunk yields
+    the same windows as a full pass.
+    """
+    
+    name = "action_segment"
+    
+    def __init__(self, recognizer, frame_step: int = 2, pool: Optional[str] = None):
+        self.recognizer = recognizer
+        self.frame_step = max(1, frame_step)
+        self.pool = pool
+    
+    def start(self, info: VideoInfo) -> None:
+        super().start(info)
+        self.recognizer.ensure_loaded()
+        self.view = _annotator_view(info, self.recognizer)
+    
+    def start_range(self, start_frame: int) -> None:
+        # Windows never span the gap between two time ranges
+        self._window: Deque[Tuple[float, np.ndarray]] = deque(maxlen=self.recognizer.window_size)
+    
+    def wants(self, frame_id: int) -> bool:
+        return frame_id % self.frame_step == 0
+    
+    def next_frame(self, frame_id: int) -> Optional[int]:
+        return -(-frame_id // self.frame_step) * self.frame_step
+    
+    def chunk_window(self, start_frame: int, end_frame: Optional[int]) -> FrameSpan:
+        # Windows starting in the chunk are completed past its end
+        if end_frame is None:
+            return start_frame, None
+        return start_frame, end_frame + (self.recognizer.window_size - 1) * self.frame_step
+    
+    def push_async(self, frame: Frame) -> Pending:
+        image = frame.view(self.view)
+        self._window.append((frame.timestamp_ms, image))
+        
+        window_size = self.recognizer.window_size
+        if len(self._window) < window_size:
+            return _done([])
+        first_sample = frame.frame_id // self.frame_step - window_size + 1
+        if first_sample % self.recognizer.stride != 0:
+            return _done([])
+        
+        start_ms = self._window[0][0]
+        frames = [image for _, image in self._window]
+        wait = _dispatch(
+            self.pool, self.name, self.recognizer.annotate,
+            frames, start_ms, self.info.fps / self.frame_step, **_scale_kwargs(frame, image)
+        )
+        return lambda: _tagged("action_segment", wait())
+    
+    def cache_identity(self) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        return self.recognizer, {"frame_step": self.frame_step, "input_size": self.recognizer.input_size}
+
+
+class CaptionSink(FrameSink):
+    """
+    LiveCC dense captioning over segment-sampled frames
+    
+    Uses the same sampling as LiveCCAnnotator.annotate: the first
+    frames_per_segment frames of every caption interval. Each segment
+    runs from the last frame of the previous one (or the start of the
+    span) to its own last sampled frame.
+    """
+    
+    name = "dense_caption"
+    
+    def __init__(self, captioner, context: Optional[str] = None, pool: Optional[str] = None):
+        self.captioner = captioner
+        self.prompt = context or captioner.default_prompt
+        self.pool = pool
+    
+    def start(self, info: VideoInfo) -> None:
+        super().start(info)
+        self.captioner.ensure_loaded()
+        self.view = _annotator_view(info, self.captioner)
+        # Intervals shorter than a segment sample every frame, in
+        # back-to-back segments
+        self._period = max(self.captioner.segment_interval(info.fps), self.captioner.frames_per_segment)
+        self._step_number = 0
+    
+    def start_range(self, start_frame: int) -> None:
+        self._buffer: List[np.ndarray] = []
+        self._span_start = start_frame
+        self._segment = 0
+    
+    def wants(self, frame_id: int) -> bool:
+        return frame_id % self._period < self.captioner.frames_per_segment
+    
+    def next_frame(self, frame_id: int) -> Optional[int]:
+        offset = frame_id % self._period
+        if offset < self.captioner.frames_per_segment:
+            return frame_id
+        return frame_id + self._period - offset
+    
+    def chunk_window(self, start_frame: int, end_frame: Optional[int]) -> FrameSpan:
+        # A segment belongs to the chunk it starts in, which completes it
+        first = -(-start_frame // self._period) * self._period
+        if end_frame is None:
+            return first, None
+        last = (end_frame - 1) // self._period * self._period
+        return first, max(end_frame, last + self.captioner.frames_per_segment)
+    
+    def push_async(self, frame: Frame) -> Pending:
+        if not self._buffer:
+            self._segment = frame.frame_id - frame.frame_id % self._period
+        self._buffer.append(frame.view(self.view))
+        if frame.frame_id - self._segment == self.captioner.frames_per_segment - 1:
+            return self._flush(frame.frame_id)
+        return _done([])
+    
+    def finish(self, total_frames: int) -> List[Dict[str, Any]]:
+        if self._buffer:
+            return self._flush(total_frames - 1)()
+        return []
+    
+    def cache_identity(self) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        return self.captioner, {"prompt": self.prompt}
+    
+    def _flush(self, end_frame: int) -> Pending:
+        # The previous segment ended on its last sampled frame
+        previous_end = self._segment - self._period + self.captioner.frames_per_segment - 1
+        wait = _dispatch(
+            self.pool,
+            self.name,
+            self.captioner.caption_segment,
+            self._buffer, self.prompt, max(self._span_start, previous_end), end_frame, self.info.fps,
+        )
+        self._buffer = []
+        
+        def collect() -> List[Dict[str, Any]]:
+            result = wait()
+            
+            # Number sequential steps; the bus joins segments in order
+            if result.data.get("is_step"):
+                self._step_number += 1
+                result.data["step_number"] = self._step_number
+            return _tagged("dense_caption", [result])
+        
+        return collect
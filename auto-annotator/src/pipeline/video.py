@@ -0,0 +1,218 @@
+"""
+Video annotation pipeline
+Builds the frame sinks for a request and runs them over one decode pass,
+or over keyframe-aligned chunks in worker processes for long videos
+"""
+
+import logging
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .chunked import iter_chunked_annotations, plan_chunks
+from .frame_array import is_frame_array
+from .frame_bus import FrameBus, FrameSink
+from .sinks import ActionSink, AnnotatorSink, CaptionSink, SceneSink
+from .windows import TimeRange
+from ..cache import cache_key, get_result_cache, hash_file
+from ..metrics import record_cache_lookup
+from ..config import OBJECT_BATCH_SIZE, SAM3_BATCH_SIZE, VIDEO_CHUNK_WORKERS
+
+logger = logging.getLogger(__name__)
+
+LIVECC_CONTEXT = "LEGO assembly video - describe each building step"
+
+
+def build_video_sinks(
+    get_annotator: Callable[[str], Any],
+    run_hands: bool = True,
+    run_objects: bool = True,
+    run_actions: bool = True,
+    run_scenes: bool = True,
+    run_sam3: bool = False,
+    run_livecc: bool = False,
+    frame_interval: int = 30,
+    object_batch_size: int = OBJECT_BATCH_SIZE,
+    sam3_batch_size: int = SAM3_BATCH_SIZE,
+) -> List[FrameSink]:
+    """
+    Create one sink per enabled annotator
+    
+    Args:
+        get_annotator: Lookup for loaded annotator instances
+        run_*: Annotator toggles (see VideoAnnotationRequest)
+        frame_interval: Per-frame annotators run on every Nth frame
+        object_batch_size: Sampled frames per YOLO call
+        sam3_batch_size: Sampled frames per SAM3 call
+        
+    Returns:
+        Sinks in output order
+    """
+    sinks: List[FrameSink] = []
+    
+    # Model calls run on each annotator's executor pool; scene detection
+    # uses a per-video detector and runs inline on the pipeline thread
+    if run_hands:
+        sinks.append(AnnotatorSink(
+            "hand_pose", get_annotator("hand_pose"), frame_interval, pool="hand_pose"
+        ))
+    if run_objects:
+        sinks.append(AnnotatorSink(
+            "object_detection", get_annotator("object"), frame_interval,
+            pool="object", batch_size=object_batch_size,
+        ))
+    if run_sam3:
+        sinks.append(AnnotatorSink(
+            "sam3_segmentation", get_annotator("sam3"), frame_interval,
+            pool="sam3", batch_size=sam3_batch_size,
+        ))
+    if run_scenes:
+        sinks.append(SceneSink(get_annotator("scene")))
+    if run_actions:
+        sinks.append(ActionSink(get_annotator("action"), pool="action"))
+    if run_livecc:
+        sinks.append(CaptionSink(get_annotator("livecc"), context=LIVECC_CONTEXT, pool="livecc"))
+    
+    return sinks
+
+
+def video_annotators(
+    run_hands: bool = True,
+    run_objects: bool = True,
+    run_actions: bool = True,
+    run_scenes: bool = True,
+    run_sam3: bool = False,
+    run_livecc: bool = False,
+    **_
+) -> List[str]:
+    """Registry names of the annotators build_video_sinks uses for these toggles"""
+    toggles = (
+        (run_hands, "hand_pose"),
+        (run_objects, "object"),
+        (run_sam3, "sam3"),
+        (run_scenes, "scene"),
+        (run_actions, "action"),
+        (run_livecc, "livecc"),
+    )
+    return [name for enabled, name in toggles if enabled]
+
+
+def _run_sinks(
+    video_path: str,
+    sinks: List[FrameSink],
+    on_progress: Optional[Callable[[int, int], None]],
+    ranges: Optional[List[TimeRange]],
+    chunk_workers: int,
+    options: Dict[str, Any],
+    fps: Optional[float] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Run sinks over the video, split into chunks when it is long enough to pay off"""
+    # Time windows are usually short and reset sink state, so they stay
+    # in-process; frame arrays have nothing to decode, so neither do they
+    if chunk_workers > 1 and ranges is None and sinks and not is_frame_array(video_path):
+        plan = plan_chunks(video_path, chunk_workers)
+        if len(plan.chunks) > 1:
+            return iter_chunked_annotations(
+                video_path, sinks, plan, chunk_workers, on_progress=on_progress, **options
+            )
+    return FrameBus(video_path, sinks, on_progress=on_progress, ranges=ranges, fps=fps).run()
+
+
+def iter_video_annotations(
+    video_path: str,
+    get_annotator: Callable[[str], Any],
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    media_hash: Optional[str] = None,
+    use_cache: bool = True,
+    ranges: Optional[List[TimeRange]] = None,
+    chunk_workers: int = VIDEO_CHUNK_WORKERS,
+    fps: Optional[float] = None,
+    **options
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield annotations as the single decode pass produces them
+    
+    Sinks whose results are already in the result cache are replayed from
+    it and left off the frame bus; the video is not decoded at all when
+    every enabled annotator hits.
+    
+    Args:
+        video_path: Path to video file
+        get_annotator: Lookup for loaded annotator instances
+        on_progress: Called with (frames_done, frame_count) while decoding
+        media_hash: SHA-256 of the file, if already known (hashed on demand otherwise)
+        use_cache: Read and populate the result cache
+        ranges: (start_ms, end_ms) windows to annotate, from
+            windows.time_ranges (None for the whole video)
+        chunk_workers: Worker processes for chunked runs of long videos
+            (see chunked.plan_chunks); 0 or 1 decodes in this process
+        fps: Frame rate when video_path is a .npy frame array
+            (see frame_array); ignored for encoded videos
+        **options: Annotator toggles and frame_interval for build_video_sinks
+        
+    Yields:
+        Annotation dicts tagged with their "type"
+    """
+    sinks = build_video_sinks(get_annotator, **options)
+    cache = get_result_cache() if use_cache else None
+    if cache is None or not sinks:
+        yield from _run_sinks(video_path, sinks, on_progress, ranges, chunk_workers, options, fps)
+        return
+    
+    media_hash = media_hash or hash_file(video_path)
+    live: List[FrameSink] = []
+    keys: Dict[str, str] = {}
+    for sink in sinks:
+        identity = sink.cache_identity()
+        if identity is None:
+            live.append(sink)
+            continue
+        annotator, params = identity
+        if ranges is not None:
+            params = {**params, "ranges": ranges}
+        if fps is not None and is_frame_array(video_path):
+            # Timestamps of a frame array follow the rate it was given
+            params = {**params, "fps": fps}
+        key = cache_key(media_hash, sink.name, annotator, params)
+        cached = cache.get(key)
+        record_cache_lookup(sink.name, cached is not None)
+        if cached is None:
+            live.append(sink)
+            keys[sink.name] = key
+        else:
+            logger.debug(f"Result cache hit for {sink.name}")
+            yield from cached
+    
+    if not live:
+        return
+    
+    # Results are held per sink until the pass completes, so an interrupted
+    # run (e.g. a disconnected stream) never stores a partial entry
+    collected: Dict[str, List[Dict[str, Any]]] = {name: [] for name in keys}
+    for annotation in _run_sinks(video_path, live, on_progress, ranges, chunk_workers, options, fps):
+        if annotation["type"] in collected:
+            collected[annotation["type"]].append(annotation)
+        yield annotation
+    
+    for name, key in keys.items():
+        cache.put(key, collected[name])
+
+
+def annotate_video_file(
+    video_path: str,
+    get_annotator: Callable[[str], Any],
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    **options
+) -> List[Dict[str, Any]]:
+    """
+    Run every enabled video annotator over a single decode of the file
+    
+    Args:
+        video_path: Path to video file
+        get_annotator: Lookup for loaded annotator instances
+        on_progress: Called with (frames_done, frame_count) while decoding
+        **options: media_hash/use_cache/ranges/chunk_workers/fps and the
+            build_video_sinks options
+            
+    Returns:
+        Annotation dicts tagged with their "type"
+    """
+    return list(iter_video_annotations(video_path, get_annotator, on_progress, **options))
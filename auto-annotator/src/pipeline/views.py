@@ -0,0 +1,79 @@
+"""
+Frame views for the video pipeline
+Sinks declare the resolution and colour space their annotator works at as
+a FrameView; each decoded Frame builds every distinct view once, into
+buffers reused from frame to frame, so no annotator has to shrink or
+convert full-size frames itself
+"""
+
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from ..annotators.frames import fit_size
+from ..config import FRAME_BUFFER_POOL_SIZE
+
+
+@dataclass(frozen=True)
+class FrameView:
+    """
+    A resolution and colour space a sink wants frames in
+    
+    width/height 0 mean the decoded size. color is "rgb", "bgr" or
+    "gray"; interpolation ("area" or "linear") is used when resizing.
+    """
+    width: int = 0
+    height: int = 0
+    color: str = "rgb"
+    interpolation: str = "area"
+    
+    @classmethod
+    def fit(cls, width: int, height: int, max_side: Optional[int], color: str = "rgb") -> "FrameView":
+        """
+        View of a width x height stream with a long side of at most max_side
+        
+        An unknown stream size (0) keeps frames at their decoded size.
+        """
+        if width <= 0 or height <= 0:
+            return cls(color=color)
+        width, height = fit_size(width, height, max_side)
+        return cls(width, height, color)
+    
+    def with_color(self, color: str) -> "FrameView":
+        return FrameView(self.width, self.height, color, self.interpolation)
+
+
+class BufferPool:
+    """
+    uint8 output arrays reused across frames
+    
+    A buffer is handed out again only once nothing outside the pool refers
+    to it, so sinks may keep frames as long as they need and the pool grows
+    to cover them. Frames nobody keeps recycle their buffers straight away.
+    Up to max_buffers arrays are kept per shape; a decode pass needs a few
+    per view, plus whatever its sinks hold on to (batches, action windows,
+    caption segments).
+    """
+    
+    def __init__(self, max_buffers: int = FRAME_BUFFER_POOL_SIZE):
+        self.max_buffers = max_buffers
+        self._buffers: Dict[Tuple[int, ...], List[np.ndarray]] = {}
+        self._lock = threading.Lock()
+        self.allocated = 0
+    
+    def get(self, shape: Tuple[int, ...]) -> np.ndarray:
+        """A free buffer of the given shape (contents undefined)"""
+        with self._lock:
+            buffers = self._buffers.setdefault(shape, [])
+            for buffer in buffers:
+                # Referenced only by the list, the loop variable and
+                # getrefcount's argument
+                if sys.getrefcount(buffer) <= 3:
+                    return buffer
+            buffer = np.empty(shape, dtype=np.uint8)
+            self.allocated += 1
+            if len(buffers) < self.max_buffers:
+                buffers.append(buffer)
+            return buffer
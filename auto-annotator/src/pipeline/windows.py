@@ -0,0 +1,89 @@
+"""
+Time windows for partial video annotation
+Requests may restrict annotation to one or more [start_ms, end_ms) ranges.
+Ranges are normalised here and mapped to frame spans once the stream's
+frame rate is known; annotations keep timestamps relative to the start of
+the video.
+"""
+
+import math
+from typing import List, Optional, Sequence, Tuple
+
+# (start_ms, end_ms); end_ms None runs to the end of the video
+TimeRange = Tuple[float, Optional[float]]
+# (start_frame, end_frame) with end exclusive; None runs to the end
+FrameSpan = Tuple[int, Optional[int]]
+
+
+def time_ranges(
+    start_ms: Optional[float] = None,
+    end_ms: Optional[float] = None,
+    ranges: Optional[Sequence[Sequence[Optional[float]]]] = None,
+) -> Optional[List[TimeRange]]:
+    """
+    Combine start_ms/end_ms or a list of ranges into sorted, merged ranges
+    
+    Args:
+        start_ms: Start of a single window (default: start of the video)
+        end_ms: End of a single window (default: end of the video)
+        ranges: [[start_ms, end_ms], ...] for several windows
+        
+    Returns:
+        Merged ranges, or None when the whole video is requested
+        
+    Raises:
+        ValueError: For negative, empty or inverted ranges, or when both
+            forms are given
+    """
+    if ranges is not None and (start_ms is not None or end_ms is not None):
+        raise ValueError("Pass either start_ms/end_ms or ranges, not both")
+    if ranges is None:
+        if start_ms is None and end_ms is None:
+            return None
+        ranges = [(start_ms or 0.0, end_ms)]
+    
+    normalised: List[TimeRange] = []
+    for entry in ranges:
+        if len(entry) != 2:
+            raise ValueError(f"Range must be [start_ms, end_ms]: {list(entry)}")
+        start, end = entry
+        start = float(start or 0.0)
+        end = None if end is None else float(end)
+        if start < 0 or (end is not None and end <= start):
+            raise ValueError(f"Invalid range [{start}, {end}]")
+        normalised.append((start, end))
+    if not normalised:
+        raise ValueError("ranges is empty")
+    
+    normalised.sort(key=lambda r: r[0])
+    merged = [normalised[0]]
+    for start, end in normalised[1:]:
+        last_start, last_end = merged[-1]
+        if last_end is None or start <= last_end:
+            merged[-1] = (last_start, None if last_end is None or end is None else max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _frame_at(ms: float, fps: float) -> int:
+    """First frame whose timestamp is at or after ms"""
+    return max(0, math.ceil(ms * fps / 1000 - 1e-6))
+
+
+def frame_spans(ranges: List[TimeRange], fps: float, frame_count: int = 0) -> List[FrameSpan]:
+    """
+    Frame spans covering the frames whose timestamps fall in the ranges
+    
+    Spans starting past a known frame count are dropped, so an
+    out-of-range request decodes nothing.
+    """
+    spans: List[FrameSpan] = []
+    for start_ms, end_ms in ranges:
+        start = _frame_at(start_ms, fps)
+        end = None if end_ms is None else _frame_at(end_ms, fps)
+        if frame_count > 0 and start >= frame_count:
+            continue
+        if end is None or end > start:
+            spans.append((start, end))
+    return spans
@@ -0,0 +1,124 @@
+"""
+Per-request stage timings
+When a request asks for timings=true, the route opens a StageTimings
+collection; the pipeline records upload, decode, colour conversion,
+per-annotator inference and serialisation into it. Collection is carried in
+a context variable, so when no request is collecting, each instrumentation
+point costs a single lookup.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import numpy as np
+
+_current: ContextVar[Optional["StageTimings"]] = ContextVar("stage_timings", default=None)
+
+
+class StageTimings:
+    """
+    Durations (and bytes processed) per pipeline stage for one request
+    
+    Each add() is one sample: one upload, one decoded frame, one model
+    call. Appends are safe from the executor threads a request fans out to.
+    """
+    
+    def __init__(self):
+        self._started = time.perf_counter()
+        self._samples: Dict[str, List[float]] = {}
+        self._bytes: Dict[str, int] = {}
+    
+    def add(self, stage: str, seconds: float, nbytes: int = 0) -> None:
+        self._samples.setdefault(stage, []).append(seconds)
+        if nbytes:
+            self._bytes[stage] = self._bytes.get(stage, 0) + nbytes
+    
+    def summary(self) -> Dict[str, Any]:
+        """
+        Totals and per-sample percentiles for every stage seen so far
+        
+        Returns:
+            {"wall_ms": ..., "stages": {name: {count, total_ms, mean_ms,
+            p50_ms, p95_ms, p99_ms, max_ms[, bytes, mb_per_sec]}}}
+        """
+        stages = {}
+        for stage, samples in list(self._samples.items()):
+            ms = np.asarray(samples) * 1000
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99]).tolist()
+            entry = {
+                "count": len(ms),
+                "total_ms": float(ms.sum()),
+                "mean_ms": float(ms.mean()),
+                "p50_ms": p50,
+                "p95_ms": p95,
+                "p99_ms": p99,
+                "max_ms": float(ms.max()),
+            }
+            nbytes = self._bytes.get(stage)
+            if nbytes:
+                entry["bytes"] = nbytes
+                entry["mb_per_sec"] = nbytes / 1024 ** 2 / (entry["total_ms"] / 1000) if entry["total_ms"] else None
+            stages[stage] = entry
+        return {"wall_ms": (time.perf_counter() - self._started) * 1000, "stages": stages}
+    
+    def server_timing(self, **extra_seconds: float) -> str:
+        """Server-Timing header value with each stage's total (plus extra stages measured afterwards)"""
+        totals = {stage: sum(samples) for stage, samples in list(self._samples.items())}
+        totals.update(extra_seconds)
+        totals["total"] = time.perf_counter() - self._started
+        return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in totals.items())
+
+
+def current_timings() -> Optional[StageTimings]:
+    """Timings being collected for the current request, if any"""
+    return _current.get()
+
+
+@contextmanager
+def collect_timings(enabled: bool = True) -> Iterator[Optional[StageTimings]]:
+    """Collect stage timings for everything run inside the block (yields None when disabled)"""
+    if not enabled:
+        yield None
+        return
+    timings = StageTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def stage(name: str, nbytes: int = 0) -> Iterator[None]:
+    """Time the block as one sample of a stage, if timings are being collected"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started, nbytes)
+
+
+def timed(name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Wrap fn so each call is a sample of a stage, if timings are being collected
+    
+    The collection is bound when timed() is called, so the wrapper can run
+    on an executor thread. Returns fn itself when nothing is collecting.
+    """
+    timings = _current.get()
+    if timings is None:
+        return fn
+    
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            timings.add(name, time.perf_counter() - started)
+    
+    return wrapper